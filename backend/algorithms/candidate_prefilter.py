@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+两阶段兼容性分析
+第一阶段用向量相似度（VectorUserMatcher）或标签重合度为每个用户筛选top_k候选，
+第二阶段只把候选对交给LLM分析。结果按 (无序用户对, 双方档案版本) 缓存，
+档案内容不变时重复运行不再调用LLM。
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from backend.models import CompatibilityResult
+from backend.algorithms.llm_compatibility_analyzer import KimiCompatibilityAnalyzer, profile_file_version
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+@dataclass
+class PrefilterReport:
+    """一次运行的统计"""
+    total_pairs: int = 0        # 全量两两分析需要的对数
+    shortlisted_pairs: int = 0  # 第一阶段保留的候选对数
+    cache_hits: int = 0         # 命中结果缓存的候选对数
+    llm_calls: int = 0          # 实际交给LLM分析的对数
+
+    @property
+    def llm_calls_avoided(self) -> int:
+        return self.total_pairs - self.llm_calls
+
+def profile_tags(profile: Dict) -> Set[str]:
+    """读取档案中的标签，兼容 {类别: [标签]} 和 [标签] 两种格式"""
+    tags = profile.get('metadata', {}).get('tags') or profile.get('tags') or []
+    if isinstance(tags, dict):
+        return {tag for values in tags.values() for tag in values}
+    return set(tags)
+
+class CandidatePrefilterPipeline:
+    """先检索候选再做LLM分析的两阶段流水线"""
+
+    def __init__(self, analyzer: KimiCompatibilityAnalyzer, top_k: int = 5,
+                 vector_matcher=None, min_similarity: float = 0.1):
+        self.analyzer = analyzer
+        self.top_k = top_k
+        self.vector_matcher = vector_matcher
+        self.min_similarity = min_similarity
+        # (较小的path, 较大的path, 对应version, 对应version) -> 分析结果，与对内顺序无关
+        self.pair_cache: Dict[Tuple[str, str, str, str], CompatibilityResult] = {}
+
+    def _tag_candidates(self, profile_paths: List[str], query_paths: List[str]) -> Dict[str, List[str]]:
+        """按标签Jaccard相似度为query_paths中的每个用户从profile_paths里取top_k候选"""
+        if not query_paths:
+            return {}
+        tags = {path: profile_tags(self.analyzer.load_profile(path)) for path in profile_paths}
+        candidates = {}
+        for path in query_paths:
+            scored = []
+            for other in profile_paths:
+                if other == path or not tags[path] or not tags[other]:
+                    continue
+                score = len(tags[path] & tags[other]) / len(tags[path] | tags[other])
+                if score > 0:
+                    scored.append((score, other))
+            scored.sort(key=lambda item: -item[0])
+            candidates[path] = [other for _, other in scored[:self.top_k]]
+        return candidates
+
+    def shortlist(self, profile_paths: List[str], user_ids: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+        """第一阶段：返回候选对，顺序与档案列表中的先后一致
+
+        user_ids与profile_paths一一对应，已在vector_matcher中的用户用向量相似度筛选，
+        其余用户用标签重合度筛选。
+        """
+        user_ids = user_ids or profile_paths
+        path_by_user = dict(zip(user_ids, profile_paths))
+        candidates = {}
+
+        known = []
+        if self.vector_matcher is not None:
+            known = [user_id for user_id in user_ids if user_id in self.vector_matcher.user_vectors]
+            similar = self.vector_matcher.find_similar_users_many(known, top_k=self.top_k, min_similarity=self.min_similarity)
+            for user_id in known:
+                matches = similar.get(user_id, [])
+                candidates[path_by_user[user_id]] = [path_by_user[other] for other, _ in matches if other in path_by_user]
+
+        # 只为没有向量的用户计算标签相似度
+        known_paths = {path_by_user[user_id] for user_id in known}
+        candidates.update(self._tag_candidates(profile_paths, [path for path in profile_paths if path not in known_paths]))
+
+        position = {path: i for i, path in enumerate(profile_paths)}
+        pairs = set()
+        for path, others in candidates.items():
+            for other in others:
+                pairs.add(tuple(sorted((path, other), key=position.get)))
+        return sorted(pairs, key=lambda pair: (position[pair[0]], position[pair[1]]))
+
+    async def run_async(self, profile_paths: List[str], user_ids: Optional[List[str]] = None,
+                        max_concurrency: Optional[int] = None,
+                        client: Optional[httpx.AsyncClient] = None) -> Tuple[List[CompatibilityResult], PrefilterReport]:
+        """执行两阶段分析，返回候选对的分析结果和统计"""
+        n = len(profile_paths)
+        report = PrefilterReport(total_pairs=n * (n - 1) // 2)
+        pairs = self.shortlist(profile_paths, user_ids)
+        report.shortlisted_pairs = len(pairs)
+
+        versions = {path: profile_file_version(path) for pair in pairs for path in pair}
+        keys = {}
+        for pair in pairs:
+            path_a, path_b = sorted(pair)
+            keys[pair] = (path_a, path_b, versions[path_a], versions[path_b])
+
+        pending = [pair for pair in pairs if keys[pair] not in self.pair_cache]
+        report.cache_hits = len(pairs) - len(pending)
+        report.llm_calls = len(pending)
+        if pending:
+            completed = await self.analyzer.analyze_pairs_async(pending, max_concurrency=max_concurrency, client=client)
+            for pair, result in completed.items():
+                self.pair_cache[keys[pair]] = result
+
+        results = [self.pair_cache[keys[pair]] for pair in pairs if keys[pair] in self.pair_cache]
+        logger.info("两阶段分析: 全量 %d 对, 候选 %d 对, 缓存命中 %d 对, LLM分析 %d 对, 节省 %d 次调用",
+                    report.total_pairs, report.shortlisted_pairs, report.cache_hits, report.llm_calls,
+                    report.llm_calls_avoided)
+        return results, report
+
+    def run(self, profile_paths: List[str], user_ids: Optional[List[str]] = None) -> Tuple[List[CompatibilityResult], PrefilterReport]:
+        """Synchronous wrapper for run_async"""
+        return asyncio.run(self.run_async(profile_paths, user_ids))
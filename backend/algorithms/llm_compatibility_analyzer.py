@@ -4,10 +4,16 @@
 import json
 import os
 import sys
+import hashlib
+import random
+import asyncio
+import dataclasses
 import requests
 import time
 import yaml
-from typing import Dict, List, Any, Optional
+import httpx
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 
 # 添加项目根目录到Python路径
@@ -16,6 +22,45 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from configs.config import ConfigManager
 from backend.models import CompatibilityResult, UserRequest
 
+# 档案缓存的最大条目数，超出后淘汰最久未使用的档案
+PROFILE_CACHE_SIZE = int(os.getenv('PROFILE_CACHE_SIZE', '1024'))
+
+def profile_version(profile: Dict) -> str:
+    """档案内容的哈希，内容变化即版本变化"""
+    return hashlib.md5(json.dumps(profile, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+def profile_file_version(profile_path: str) -> str:
+    """直接读取档案文件计算版本，不经过分析器的档案缓存"""
+    with open(profile_path, 'r', encoding='utf-8') as f:
+        return profile_version(json.load(f))
+
+def profile_file_stamp(profile_path: str) -> Tuple[int, int]:
+    """档案文件的 (修改时间ns, 大小)，文件被改写后随之变化"""
+    stat = os.stat(profile_path)
+    return stat.st_mtime_ns, stat.st_size
+
+class TokenBucket:
+    """异步令牌桶限流器"""
+    
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        """取得一个令牌，不足时等待"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
 class KimiCompatibilityAnalyzer:
     def __init__(self, config: Optional[ConfigManager] = None, api_key: str = None, prompts_file: str = "prompts/prompts.yaml"):
         self.config_manager = config or ConfigManager()
@@ -31,6 +76,9 @@ class KimiCompatibilityAnalyzer:
         
         # Load prompts from YAML file
         self.prompts = self.load_prompts(prompts_file)
+        
+        # 档案缓存（LRU），批量分析时每个文件只读取一次；文件修改后重新读取
+        self._profile_cache: "OrderedDict[str, Tuple[Tuple[int, int], Dict[str, Any]]]" = OrderedDict()
     
     def load_prompts(self, prompts_file: str) -> Dict[str, Any]:
         """Load prompts from YAML file"""
@@ -38,9 +86,20 @@ class KimiCompatibilityAnalyzer:
             return yaml.safe_load(f)
     
     def load_profile(self, profile_path: str) -> Dict[str, Any]:
-        """Load profile from JSON file"""
+        """Load profile from JSON file (cached per path, re-read when the file changes)"""
+        stamp = profile_file_stamp(profile_path)
+        cached = self._profile_cache.get(profile_path)
+        if cached is not None and cached[0] == stamp:
+            self._profile_cache.move_to_end(profile_path)
+            return cached[1]
+        
         with open(profile_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            profile = json.load(f)
+        self._profile_cache[profile_path] = (stamp, profile)
+        self._profile_cache.move_to_end(profile_path)
+        while len(self._profile_cache) > PROFILE_CACHE_SIZE:
+            self._profile_cache.popitem(last=False)
+        return profile
     
     def extract_user_request(self, profile: Dict[str, Any]) -> UserRequest:
         """从profile中提取用户诉求"""
@@ -89,7 +148,33 @@ class KimiCompatibilityAnalyzer:
     def call_kimi_api(self, system_prompt: str, user_prompt: str) -> str:
         """Call Kimi API with system and user messages"""
         
-        payload = {
+        payload = self._build_payload(system_prompt, user_prompt)
+        
+        for attempt in range(self.api_config.max_retries):
+            try:
+                response = requests.post(
+                    self.api_config.chat_endpoint,
+                    headers=self.api_config.headers,
+                    json=payload,
+                    timeout=self.api_config.timeout
+                )
+                
+                response.raise_for_status()
+                result = response.json()
+                
+                if 'choices' in result and len(result['choices']) > 0:
+                    return result['choices'][0]['message']['content']
+                else:
+                    raise ValueError("Invalid response format")
+                    
+            except Exception as e:
+                if attempt < self.api_config.max_retries - 1:
+                    time.sleep(self._backoff_delay(attempt))
+                else:
+                    raise Exception(f"API call failed after {self.api_config.max_retries} attempts: {str(e)}")
+    
+    def _build_payload(self, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        return {
             "model": self.api_config.model,
             "messages": [
                 {"role": "system", "content": system_prompt},
@@ -98,16 +183,34 @@ class KimiCompatibilityAnalyzer:
             "temperature": self.api_config.temperature,
             "max_tokens": self.api_config.max_tokens
         }
+    
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """指数退避（full jitter），服务端给出Retry-After时以其为下限"""
+        delay = random.uniform(0, min(self.api_config.max_backoff, self.api_config.retry_delay * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+    
+    async def call_kimi_api_async(self, client: httpx.AsyncClient, system_prompt: str, user_prompt: str,
+                                  rate_limiter: Optional[TokenBucket] = None) -> str:
+        """Async Kimi API call with rate limiting and exponential backoff"""
+        payload = self._build_payload(system_prompt, user_prompt)
         
         for attempt in range(self.api_config.max_retries):
+            retry_after = None
             try:
-                response = requests.post(
+                if rate_limiter:
+                    await rate_limiter.acquire()
+                response = await client.post(
                     self.api_config.chat_endpoint,
                     headers=self.api_config.headers,
                     json=payload,
                     timeout=self.api_config.timeout
                 )
-                
+                retry_after = response.headers.get('Retry-After')
                 response.raise_for_status()
                 result = response.json()
                 
@@ -118,7 +221,7 @@ class KimiCompatibilityAnalyzer:
                     
             except Exception as e:
                 if attempt < self.api_config.max_retries - 1:
-                    time.sleep(self.api_config.retry_delay)
+                    await asyncio.sleep(self._backoff_delay(attempt, retry_after))
                 else:
                     raise Exception(f"API call failed after {self.api_config.max_retries} attempts: {str(e)}")
     
@@ -227,19 +330,89 @@ class KimiCompatibilityAnalyzer:
         
         return self.parse_analysis_result(analysis_text, person_a_name, person_b_name)
     
-    def batch_analyze(self, profile_paths: List[str]) -> List[CompatibilityResult]:
-        """Analyze compatibility between all pairs"""
+    def _display_name(self, profile: Dict[str, Any], default: str) -> str:
+        return profile.get('profile', {}).get('name', {}).get('display_name', default)
+    
+    async def _analyze_pair_async(self, client: httpx.AsyncClient, rate_limiter: TokenBucket,
+                                  path_a: str, path_b: str) -> CompatibilityResult:
+        profile_a = self.load_profile(path_a)
+        profile_b = self.load_profile(path_b)
+        system_prompt, user_prompt = self.create_prompts(profile_a, profile_b)
+        analysis_text = await self.call_kimi_api_async(client, system_prompt, user_prompt, rate_limiter)
+        return self.parse_analysis_result(
+            analysis_text, self._display_name(profile_a, 'Person A'), self._display_name(profile_b, 'Person B')
+        )
+    
+    async def batch_analyze_async(self, profile_paths: List[str], checkpoint_path: Optional[str] = None,
+                                  max_concurrency: Optional[int] = None,
+                                  client: Optional[httpx.AsyncClient] = None) -> List[CompatibilityResult]:
+        """Analyze all pairs concurrently
         
-        results = []
-        for i in range(len(profile_paths)):
-            for j in range(i + 1, len(profile_paths)):
+        并发数由max_concurrency（默认取配置）限制，请求经令牌桶限流。
+        指定checkpoint_path时每完成一对即追加写入（JSON Lines），重新运行时跳过已完成的对。
+        失败的对被跳过且不写入检查点，下次运行会重试。
+        """
+        pairs: List[Tuple[str, str]] = [
+            (profile_paths[i], profile_paths[j])
+            for i in range(len(profile_paths))
+            for j in range(i + 1, len(profile_paths))
+        ]
+        completed = await self.analyze_pairs_async(pairs, checkpoint_path, max_concurrency, client)
+        return [completed[pair] for pair in pairs if pair in completed]
+    
+    async def analyze_pairs_async(self, pairs: List[Tuple[str, str]], checkpoint_path: Optional[str] = None,
+                                  max_concurrency: Optional[int] = None,
+                                  client: Optional[httpx.AsyncClient] = None) -> Dict[Tuple[str, str], CompatibilityResult]:
+        """并发分析指定的档案对，返回成功的 {(path_a, path_b): result}
+
+        检查点中的条目记录了双方档案的版本，档案修改过的对会重新分析。
+        """
+        versions = {path: profile_file_version(path) for pair in pairs for path in pair}
+        completed = load_checkpoint(checkpoint_path, versions) if checkpoint_path else {}
+        completed = {pair: completed[pair] for pair in pairs if pair in completed}
+        pending = [pair for pair in pairs if pair not in completed]
+        
+        # 预先加载全部档案
+        for pair in pending:
+            for path in pair:
+                self.load_profile(path)
+        
+        semaphore = asyncio.Semaphore(max_concurrency or self.api_config.max_concurrency)
+        rate_limiter = TokenBucket(self.api_config.requests_per_minute / 60, self.api_config.rate_limit_burst)
+        checkpoint_file = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
+        owns_client = client is None
+        client = client or httpx.AsyncClient()
+        
+        async def run_pair(pair: Tuple[str, str]) -> None:
+            async with semaphore:
                 try:
-                    result = self.analyze_compatibility(profile_paths[i], profile_paths[j])
-                    results.append(result)
+                    result = await self._analyze_pair_async(client, rate_limiter, *pair)
                 except Exception as e:
-                    continue  # Skip failed analyses
+                    print(f"分析 {pair[0]} ↔ {pair[1]} 失败: {e}")
+                    return
+            completed[pair] = result
+            if checkpoint_file:
+                entry = {'pair': list(pair), 'versions': [versions[path] for path in pair], 'result': dataclasses.asdict(result)}
+                checkpoint_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                checkpoint_file.flush()
+        
+        try:
+            await asyncio.gather(*[run_pair(pair) for pair in pending])
+        finally:
+            if checkpoint_file:
+                checkpoint_file.close()
+            if owns_client:
+                await client.aclose()
         
-        return results
+        return completed
+    
+    def batch_analyze(self, profile_paths: List[str], checkpoint_path: Optional[str] = None) -> List[CompatibilityResult]:
+        """Analyze compatibility between all pairs (sync only; use batch_analyze_async inside an event loop)"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.batch_analyze_async(profile_paths, checkpoint_path))
+        raise RuntimeError("batch_analyze 不能在运行中的事件循环里调用，请改用 await batch_analyze_async(...)")
     
     def save_results(self, results: List[CompatibilityResult], output_path: str = "data/results/compatibility_results.json"):
         """Save analysis results to JSON file"""
@@ -264,6 +437,28 @@ class KimiCompatibilityAnalyzer:
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(results_data, f, ensure_ascii=False, indent=2)
 
+def load_checkpoint(checkpoint_path: str,
+                    versions: Optional[Dict[str, str]] = None) -> Dict[Tuple[str, str], CompatibilityResult]:
+    """读取批量分析的检查点，返回已完成的 {(path_a, path_b): result}
+
+    指定versions（{path: 档案版本}）时，跳过记录的版本与当前版本不一致（或没有记录版本）的条目。
+    """
+    completed = {}
+    if not os.path.exists(checkpoint_path):
+        return completed
+    
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                pair = tuple(entry['pair'])
+                if versions is not None and entry.get('versions') != [versions.get(path) for path in pair]:
+                    continue  # 档案已修改，结果过期
+                completed[pair] = CompatibilityResult(**entry['result'])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue  # 跳过中断时写了一半的行
+    return completed
+
 def main():
     """Simple example usage"""
     
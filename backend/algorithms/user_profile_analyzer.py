@@ -22,7 +22,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from configs.config import ConfigManager
 from backend.models.tag_pool import TagPool, TagCategory
-from backend.models.tag_matching import TagMatcher, TagMatchResult
+from backend.models.tag_matching import TagMatcher, TagMatchResult, tag_matcher_registry
 
 @dataclass
 class UserProfile:
@@ -39,9 +39,9 @@ class UserProfileAnalyzer:
     """用户画像分析器"""
     
     def __init__(self):
-        # 为不同场景创建专门的匹配器
-        self.dating_matcher = TagMatcher("找对象")
-        self.teamwork_matcher = TagMatcher("找队友")
+        # 不同场景的匹配器由全局注册表共享，避免重复拟合
+        self.dating_matcher = tag_matcher_registry.get("找对象")
+        self.teamwork_matcher = tag_matcher_registry.get("找队友")
         
         # 存储路径
         self.profiles_dir = "data/user_profiles"
@@ -51,20 +51,24 @@ class UserProfileAnalyzer:
         """确保目录存在"""
         os.makedirs(self.profiles_dir, exist_ok=True)
     
-    def analyze_user(self, user_id: str, user_text: str, request_type: str) -> UserProfile:
-        """分析单个用户并生成画像"""
-        
-        # 选择对应的匹配器
+    def _get_matcher(self, request_type: str) -> TagMatcher:
+        """选择对应的匹配器"""
         if request_type == "找对象":
-            matcher = self.dating_matcher
+            return self.dating_matcher
         elif request_type == "找队友":
-            matcher = self.teamwork_matcher
+            return self.teamwork_matcher
         else:
             raise ValueError(f"不支持的请求类型: {request_type}")
+    
+    def analyze_user(self, user_id: str, user_text: str, request_type: str) -> UserProfile:
+        """分析单个用户并生成画像"""
         
         # 进行标签匹配
-        result = matcher.match_tags(user_text, min_confidence=0.3)
-        
+        result = self._get_matcher(request_type).match_tags(user_text, min_confidence=0.3)
+        return self._build_profile(user_id, user_text, request_type, result)
+    
+    def _build_profile(self, user_id: str, user_text: str, request_type: str, result: TagMatchResult) -> UserProfile:
+        """由标签匹配结果生成画像"""
         # 计算画像完整度
         completeness = self._calculate_completeness(result, request_type)
         
@@ -103,22 +107,30 @@ class UserProfileAnalyzer:
         return len(covered_categories) / len(required_categories)
     
     def batch_analyze_users(self, users_data: List[Dict[str, Any]]) -> List[UserProfile]:
-        """批量分析用户"""
-        profiles = []
+        """批量分析用户
         
-        for user_data in users_data:
-            user_id = user_data["user_id"]
-            user_text = user_data["text"]
-            request_type = user_data["request_type"]
-            
+        按请求类型分组，每组用 match_tags_many 一次完成标签匹配，返回顺序与输入一致。
+        """
+        groups: Dict[str, List[int]] = {}
+        for i, user_data in enumerate(users_data):
+            groups.setdefault(user_data["request_type"], []).append(i)
+        
+        profiles: Dict[int, UserProfile] = {}
+        for request_type, indices in groups.items():
             try:
-                profile = self.analyze_user(user_id, user_text, request_type)
-                profiles.append(profile)
-                print(f"✅ 成功分析用户 {user_id}")
+                matcher = self._get_matcher(request_type)
+                results = matcher.match_tags_many([users_data[i]["text"] for i in indices], min_confidence=0.3)
             except Exception as e:
-                print(f"❌ 分析用户 {user_id} 时出错: {e}")
+                for i in indices:
+                    print(f"❌ 分析用户 {users_data[i]['user_id']} 时出错: {e}")
+                continue
+            
+            for i, result in zip(indices, results):
+                user_data = users_data[i]
+                profiles[i] = self._build_profile(user_data["user_id"], user_data["text"], request_type, result)
+                print(f"✅ 成功分析用户 {user_data['user_id']}")
         
-        return profiles
+        return [profiles[i] for i in sorted(profiles)]
     
     def save_profile(self, profile: UserProfile) -> None:
         """保存用户画像到文件"""
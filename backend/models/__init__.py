@@ -6,6 +6,7 @@ from .user_request import UserRequest
 from .tag_pool import TagPool, TagCategory, tag_pool
 from .topic_modeling import LDATopicModel, TopicResult, ChineseTextPreprocessor, topic_model
 from .vector_matching import TopicVectorizer, VectorUserMatcher, UserVector
+from .topic_vector_store import UserTopicStore, user_topic_store
 from .matching_result import SimpleMatchingResult, create_match_dimension, generate_score_description, calculate_complementary_score
 
 __all__ = [
@@ -21,6 +22,8 @@ __all__ = [
     'TopicVectorizer',
     'VectorUserMatcher',
     'UserVector',
+    'UserTopicStore',
+    'user_topic_store',
     'SimpleMatchingResult',
     'create_match_dimension',
     'generate_score_description',
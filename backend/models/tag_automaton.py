@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基于Aho–Corasick自动机的标签关键词提取
+由TagPool中的标签、标签拆分出的词和同义词一次性构建多模式自动机，
+对文本扫描一遍即可得到全部命中的标签及其匹配方式（exact/partial/synonym）。
+LDATopicModel、TagMatcher和TagPool的关键词匹配共用同一套自动机。
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .tag_pool import TagPool, TAG_SYNONYMS
+
+# 匹配方式的优先级：同一标签有多种命中时取优先级最高的
+MATCH_KINDS = ('exact', 'partial', 'synonym')
+_KIND_RANK = {kind: rank for rank, kind in enumerate(MATCH_KINDS)}
+
+class AhoCorasickAutomaton:
+    """多模式字符串匹配自动机，每个模式可挂多个payload"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, payload: Tuple) -> None:
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(payload)
+        self._built = False
+
+    def build(self) -> None:
+        """按BFS计算失败指针，并把失败链上的输出合并到各状态"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+                queue.append(next_state)
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple]:
+        """扫描一遍文本，产出所有命中模式的payload"""
+        if not self._built:
+            self.build()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                yield from output[state]
+
+class TagKeywordExtractor:
+    """某个请求类型下的标签关键词提取器"""
+
+    def __init__(self, request_type: str = "all"):
+        self.request_type = request_type
+        self.automaton = AhoCorasickAutomaton()
+        # payload: (标签, 匹配方式, 命中词长度)
+        for tag in dict.fromkeys(TagPool.get_tag_list(request_type)):
+            tag_lower = tag.lower()
+            self.automaton.add(tag_lower, (tag, 'exact', len(tag_lower)))
+            for word in tag_lower.split():
+                if word != tag_lower:
+                    self.automaton.add(word, (tag, 'partial', len(word)))
+            for synonym in TAG_SYNONYMS.get(tag, "").lower().split():
+                self.automaton.add(synonym, (tag, 'synonym', len(synonym)))
+        self.automaton.build()
+
+    def extract(self, text: str, kinds: Iterable[str] = MATCH_KINDS, min_partial_length: int = 1) -> Dict[str, str]:
+        """返回 {标签: 匹配方式}，同一标签取优先级最高的匹配方式
+
+        kinds限定参与匹配的方式，min_partial_length为partial匹配所需的最短词长。
+        """
+        kinds = set(kinds)
+        hits: Dict[str, str] = {}
+        for tag, kind, length in self.automaton.iter_matches(text.lower()):
+            if kind not in kinds or (kind == 'partial' and length < min_partial_length):
+                continue
+            if tag not in hits or _KIND_RANK[kind] < _KIND_RANK[hits[tag]]:
+                hits[tag] = kind
+        return hits
+
+_extractors: Dict[str, TagKeywordExtractor] = {}
+
+def get_tag_extractor(request_type: str = "all") -> TagKeywordExtractor:
+    """按请求类型获取（首次使用时构建）共享的提取器"""
+    extractor = _extractors.get(request_type)
+    if extractor is None:
+        extractor = _extractors[request_type] = TagKeywordExtractor(request_type)
+    return extractor
@@ -1,15 +1,27 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
+import re
+import glob
 import json
+import pickle
+import hashlib
+import tempfile
+import threading
 import jieba
-import re
+import sklearn
 import numpy as np
-from typing import Dict, List, Tuple, Set
+from typing import Dict, List, Optional, Tuple, Set
 from dataclasses import dataclass
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from .tag_pool import TagPool, TagCategory
+from configs.config import TagMatchingConfig
+from .tag_pool import TagPool, TagCategory, TAG_SYNONYMS
+from .tag_automaton import get_tag_extractor
+from .text_tokenizer import text_tokenizer, CLEAN_PATTERNS
+
+# TF-IDF向量器参数（分词器另行指定），参与标签匹配器缓存的指纹
+TFIDF_PARAMS = {'lowercase': False, 'max_features': 5000}
 
 @dataclass
 class TagMatchResult:
@@ -31,29 +43,45 @@ class ChineseTextProcessor:
     
     def clean_and_tokenize(self, text: str) -> List[str]:
         """清理和分词"""
-        if not text:
-            return []
-        
-        # 清理文本
-        text = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # 分词
-        tokens = []
-        for word in jieba.cut(text):
-            word = word.strip()
-            if (len(word) >= 2 and 
-                word not in self.stopwords and 
-                not word.isdigit()):
-                tokens.append(word)
-        
-        return tokens
+        return text_tokenizer.tokenize(text, self.stopwords)
+
+class TagPatternEngine:
+    """把各标签的正则合并成一个预编译的表达式，一次扫描找出全部命中的标签
+
+    每个标签的模式放在各自命名组的可选前瞻里，同一位置可同时命中多个标签；
+    开头的前瞻保证只在至少有一个模式能匹配的位置产生匹配。
+    """
+    
+    def __init__(self, patterns: Dict[str, str], tags: List[str] = None):
+        if tags is not None:
+            allowed = set(tags)
+            patterns = {tag: pattern for tag, pattern in patterns.items() if tag in allowed}
+        self.group_tags = {f"t{i}": tag for i, tag in enumerate(patterns)}
+        self.regex = None
+        if patterns:
+            any_pattern = '|'.join(f"(?:{pattern})" for pattern in patterns.values())
+            groups = ''.join(f"(?=(?P<{group}>{patterns[tag]}))?" for group, tag in self.group_tags.items())
+            self.regex = re.compile(f"(?=(?:{any_pattern})){groups}", re.IGNORECASE)
+    
+    def find_tags(self, text: str) -> Set[str]:
+        """返回文本中命中的全部标签"""
+        found = set()
+        if self.regex is None:
+            return found
+        for match in self.regex.finditer(text):
+            for group, value in match.groupdict().items():
+                if value is not None:
+                    found.add(self.group_tags[group])
+            if len(found) == len(self.group_tags):
+                break
+        return found
 
 class TagMatcher:
     """基于语义相似度的标签匹配器"""
     
-    def __init__(self, request_type: str = "all"):
+    def __init__(self, request_type: str = "all", config: TagMatchingConfig = None, fit: bool = True):
         self.request_type = request_type
+        self.config = config or TagMatchingConfig()
         self.tag_pool = TagPool()
         self.text_processor = ChineseTextProcessor()
         
@@ -61,19 +89,19 @@ class TagMatcher:
         self.tags = self.tag_pool.get_tag_list(request_type)
         self.tag_categories_map = self._build_tag_categories_map()
         
+        # 预编译模式匹配
+        self.pattern_engine = TagPatternEngine(self.config.patterns, self.tags)
+        
         # 构建标签语料库用于TF-IDF
         self.tag_corpus = [tag for tag in self.tags]
         
         # 构建TF-IDF向量器
-        self.vectorizer = TfidfVectorizer(
-            tokenizer=self.text_processor.clean_and_tokenize,
-            lowercase=False,
-            max_features=5000
-        )
+        self.vectorizer = TfidfVectorizer(tokenizer=self.text_processor.clean_and_tokenize, **TFIDF_PARAMS)
         
-        # 预计算标签向量
+        # 预计算标签向量（fit=False时由调用方载入已拟合的向量器）
         self.tag_vectors = None
-        self._build_tag_vectors()
+        if fit:
+            self._build_tag_vectors()
     
     def _build_tag_categories_map(self) -> Dict[str, TagCategory]:
         """构建标签到类别的映射"""
@@ -107,36 +135,36 @@ class TagMatcher:
     
     def _get_tag_synonyms(self, tag: str) -> str:
         """获取标签的同义词和相关词"""
-        synonyms_map = {
-            # 技术相关
-            "程序员": "开发者 工程师 码农 技术人员",
-            "设计师": "UI UX 视觉设计 产品设计",
-            "产品经理": "PM 产品 需求分析",
-            "创业者": "创始人 CEO 企业家",
-            
-            # 性格相关
-            "外向开朗": "活泼 社交 开朗 外向",
-            "内向安静": "内向 安静 文静 内敛",
-            "幽默风趣": "幽默 搞笑 有趣 风趣",
-            
-            # 兴趣相关
-            "运动健身": "健身 运动 锻炼 体育",
-            "音乐": "音乐 唱歌 乐器 歌曲",
-            "旅行": "旅游 旅行 出游 度假",
-        }
-        
-        return synonyms_map.get(tag, "")
+        return TAG_SYNONYMS.get(tag, "")
     
     def match_tags(self, user_text: str, min_confidence: float = 0.3) -> TagMatchResult:
         """匹配用户文本到标签"""
-        if not user_text.strip():
-            return TagMatchResult(
-                matched_tags={},
-                tag_categories={},
-                total_score=0.0,
-                matched_keywords=[]
-            )
+        return self.match_tags_many([user_text], min_confidence)[0]
+    
+    def match_tags_many(self, texts: List[str], min_confidence: float = 0.3) -> List[TagMatchResult]:
+        """批量匹配：TF-IDF部分对全部文本只做一次transform和一次稀疏矩阵乘法"""
+        non_empty = [i for i, text in enumerate(texts) if text.strip()]
         
+        # 方法2: TF-IDF相似度匹配（如果向量构建成功）
+        tfidf_matches = {}
+        if self.tag_vectors is not None and non_empty:
+            tfidf_matches = dict(zip(non_empty, self._tfidf_matching_many([texts[i] for i in non_empty])))
+        
+        results = []
+        for i, user_text in enumerate(texts):
+            if not user_text.strip():
+                results.append(TagMatchResult(
+                    matched_tags={},
+                    tag_categories={},
+                    total_score=0.0,
+                    matched_keywords=[]
+                ))
+                continue
+            results.append(self._combine_matches(user_text, tfidf_matches.get(i, {}), min_confidence))
+        return results
+    
+    def _combine_matches(self, user_text: str, tfidf_matches: Dict[str, float], min_confidence: float) -> TagMatchResult:
+        """合并三种匹配方式的结果"""
         matched_tags = {}
         matched_keywords = []
         
@@ -144,15 +172,12 @@ class TagMatcher:
         keyword_matches = self._keyword_matching(user_text)
         matched_tags.update(keyword_matches)
         
-        # 方法2: TF-IDF相似度匹配（如果向量构建成功）
-        if self.tag_vectors is not None:
-            tfidf_matches = self._tfidf_matching(user_text)
-            # 合并结果，取较高分数
-            for tag, score in tfidf_matches.items():
-                if tag in matched_tags:
-                    matched_tags[tag] = max(matched_tags[tag], score)
-                else:
-                    matched_tags[tag] = score
+        # 方法2: TF-IDF相似度匹配，合并结果，取较高分数
+        for tag, score in tfidf_matches.items():
+            if tag in matched_tags:
+                matched_tags[tag] = max(matched_tags[tag], score)
+            else:
+                matched_tags[tag] = score
         
         # 方法3: 模式匹配
         pattern_matches = self._pattern_matching(user_text)
@@ -183,83 +208,44 @@ class TagMatcher:
     
     def _keyword_matching(self, text: str) -> Dict[str, float]:
         """基于关键词的直接匹配"""
-        text_lower = text.lower()
-        matches = {}
-        
-        for tag in self.tags:
-            tag_lower = tag.lower()
-            score = 0.0
-            
-            # 完全匹配
-            if tag_lower in text_lower:
-                score = 0.9
-            # 部分匹配
-            elif any(word in text_lower for word in tag_lower.split()):
-                score = 0.6
-            # 同义词匹配
-            else:
-                synonyms = self._get_tag_synonyms(tag).lower().split()
-                if any(syn in text_lower for syn in synonyms if syn):
-                    score = 0.7
-            
-            if score > 0:
-                matches[tag] = score
-        
-        return matches
+        # 完全匹配 > 部分匹配 > 同义词匹配
+        scores = {'exact': 0.9, 'partial': 0.6, 'synonym': 0.7}
+        hits = get_tag_extractor(self.request_type).extract(text)
+        return {tag: scores[kind] for tag, kind in hits.items()}
     
     def _tfidf_matching(self, text: str) -> Dict[str, float]:
         """基于TF-IDF向量相似度的匹配"""
+        return self._tfidf_matching_many([text])[0]
+    
+    def _tfidf_matching_many(self, texts: List[str], threshold: float = 0.1) -> List[Dict[str, float]]:
+        """批量TF-IDF匹配
+
+        TF-IDF向量已做L2归一化，余弦相似度即 文本矩阵 × 标签矩阵转置，
+        结果保持稀疏，按阈值过滤后逐行取出命中的标签。
+        """
         try:
-            # 将用户文本转换为向量
-            user_vector = self.vectorizer.transform([text])
-            
-            # 计算与所有标签的相似度
-            similarities = cosine_similarity(user_vector, self.tag_vectors).flatten()
-            
-            matches = {}
-            for i, similarity in enumerate(similarities):
-                if similarity > 0.1:  # 设置最小阈值
-                    tag = self.tags[i]
-                    matches[tag] = float(similarity)
+            # 将全部文本转换为一个稀疏矩阵，并与所有标签一次性求相似度
+            similarities = (self.vectorizer.transform(texts) @ self.tag_vectors.T).tocsr()
+            similarities.data[similarities.data <= threshold] = 0  # 设置最小阈值
+            similarities.eliminate_zeros()
+            similarities.sort_indices()
             
+            matches = []
+            for row in range(similarities.shape[0]):
+                start, end = similarities.indptr[row], similarities.indptr[row + 1]
+                matches.append({
+                    self.tags[i]: float(score)
+                    for i, score in zip(similarities.indices[start:end], similarities.data[start:end])
+                })
             return matches
         
         except Exception as e:
             print(f"TF-IDF匹配时出错: {e}")
-            return {}
+            return [{} for _ in texts]
     
     def _pattern_matching(self, text: str) -> Dict[str, float]:
         """基于模式的匹配"""
-        matches = {}
-        text_lower = text.lower()
-        
-        # 定义一些匹配模式
-        patterns = {
-            # 年龄相关
-            "18-22岁": r'1[89]|2[012]|十八|十九|二十',
-            "23-27岁": r'2[3-7]|二十[三四五六七]',
-            "28-32岁": r'2[89]|3[012]|二十[八九]|三十',
-            
-            # 职业相关
-            "程序员": r'程序|代码|开发|编程|软件|IT',
-            "设计师": r'设计|UI|UX|美工|视觉',
-            "产品经理": r'产品|PM|需求|项目管理',
-            
-            # 性格相关
-            "外向开朗": r'外向|开朗|活泼|爱说话|社交',
-            "内向安静": r'内向|安静|文静|不爱说话',
-            
-            # 兴趣相关
-            "运动健身": r'运动|健身|锻炼|跑步|游泳|篮球|足球',
-            "音乐": r'音乐|唱歌|乐器|钢琴|吉他',
-            "旅行": r'旅行|旅游|出游|度假|旅行',
-        }
-        
-        for tag, pattern in patterns.items():
-            if tag in self.tags and re.search(pattern, text_lower):
-                matches[tag] = 0.8
-        
-        return matches
+        return {tag: self.config.pattern_score for tag in self.pattern_engine.find_tags(text)}
     
     def _organize_by_categories(self, tags: Dict[str, float]) -> Dict[TagCategory, List[Tuple[str, float]]]:
         """按类别组织标签"""
@@ -287,6 +273,98 @@ class TagMatcher:
         )
         return sorted_tags[:top_k]
 
+def tag_pool_fingerprint(request_type: str) -> str:
+    """标签池（标签、类别、同义词）和向量器/分词设置的哈希，任一变化时需要重新拟合"""
+    content = {
+        'request_type': request_type,
+        'tags': {category.value: tags for category, tags in TagPool.get_all_tags(request_type).items()},
+        'synonyms': TAG_SYNONYMS,
+        'vectorizer': TFIDF_PARAMS,
+        'tokenizer': {
+            'stopwords': sorted(ChineseTextProcessor().stopwords),
+            'clean_pattern': CLEAN_PATTERNS['default'].pattern,
+            'jieba': jieba.__version__
+        },
+        'sklearn': sklearn.__version__
+    }
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+class TagMatcherRegistry:
+    """每个请求类型一个TagMatcher，拟合好的TF-IDF向量器和标签矩阵持久化到磁盘
+
+    文件名带标签池哈希，标签池变化后自动重新拟合并清理旧文件。
+    """
+    
+    REQUEST_TYPES = ('all', '找对象', '找队友')
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._matchers: Dict[str, TagMatcher] = {}
+        self._lock = threading.Lock()
+    
+    def _cache_path(self, request_type: str, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, f"tag_matcher_{request_type}_{fingerprint[:16]}.pkl")
+    
+    def get(self, request_type: str = "all") -> TagMatcher:
+        """获取（首次使用时构建）某个请求类型的匹配器"""
+        matcher = self._matchers.get(request_type)
+        if matcher is None:
+            with self._lock:
+                matcher = self._matchers.get(request_type)
+                if matcher is None:
+                    matcher = self._matchers[request_type] = self._build(request_type)
+        return matcher
+    
+    def warm_up(self, request_types=REQUEST_TYPES) -> None:
+        """预先构建匹配器"""
+        for request_type in request_types:
+            self.get(request_type)
+    
+    def _build(self, request_type: str) -> TagMatcher:
+        if not self.cache_dir:
+            return TagMatcher(request_type)
+        
+        path = self._cache_path(request_type, tag_pool_fingerprint(request_type))
+        if os.path.exists(path):
+            try:
+                matcher = TagMatcher(request_type, fit=False)
+                with open(path, 'rb') as f:
+                    matcher.vectorizer, matcher.tag_vectors = pickle.load(f)
+                return matcher
+            except Exception as e:
+                print(f"加载标签匹配器缓存失败，重新拟合: {e}")
+        
+        matcher = TagMatcher(request_type)
+        if matcher.tag_vectors is not None:
+            tmp_path = None
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                for stale_path in glob.glob(os.path.join(self.cache_dir, f"tag_matcher_{request_type}_*.pkl")):
+                    if stale_path != path:
+                        try:
+                            os.remove(stale_path)
+                        except FileNotFoundError:  # 其他worker已经清理
+                            pass
+                # 每个进程写自己的临时文件，多个worker同时拟合时不会互相覆盖
+                with tempfile.NamedTemporaryFile('wb', dir=self.cache_dir, suffix='.tmp', delete=False) as f:
+                    tmp_path = f.name
+                    pickle.dump((matcher.vectorizer, matcher.tag_vectors), f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"保存标签匹配器缓存失败: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        return matcher
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._matchers.clear()
+
+# 全局实例
+tag_matcher_registry = TagMatcherRegistry(
+    cache_dir=os.getenv('TAG_MATCHER_CACHE_DIR', 'data/models/tag_matchers') or None
+)
+
 # 使用示例
 def example_usage():
     """使用示例"""
@@ -27,6 +27,25 @@ class TagCategory(Enum):
     GOALS = "goals"
     CHARACTER = "character"
 
+# 标签的同义词和相关词（空格分隔）
+TAG_SYNONYMS = {
+    # 技术相关
+    "程序员": "开发者 工程师 码农 技术人员",
+    "设计师": "UI UX 视觉设计 产品设计",
+    "产品经理": "PM 产品 需求分析",
+    "创业者": "创始人 CEO 企业家",
+    
+    # 性格相关
+    "外向开朗": "活泼 社交 开朗 外向",
+    "内向安静": "内向 安静 文静 内敛",
+    "幽默风趣": "幽默 搞笑 有趣 风趣",
+    
+    # 兴趣相关
+    "运动健身": "健身 运动 锻炼 体育",
+    "音乐": "音乐 唱歌 乐器 歌曲",
+    "旅行": "旅游 旅行 出游 度假",
+}
+
 @dataclass
 class TagPool:
     """标签池管理"""
@@ -208,14 +227,8 @@ class TagPool:
     @classmethod
     def find_matching_tags(cls, text: str, request_type: str = "all") -> Set[str]:
         """从文本中找到匹配的标签（简单关键词匹配）"""
-        text = text.lower()
-        matching_tags = set()
-        
-        for tag in cls.get_tag_list(request_type):
-            if tag.lower() in text:
-                matching_tags.add(tag)
-        
-        return matching_tags
+        from .tag_automaton import get_tag_extractor
+        return set(get_tag_extractor(request_type).extract(text, kinds=('exact',)))
 
 # 单例标签池
 tag_pool = TagPool() 
\ No newline at end of file
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+共享的中文分词服务
+向量匹配、主题建模和标签匹配的预处理器都通过这里做 清理 + jieba分词，
+正则预编译，分词结果按文本哈希做有界LRU缓存，同一段用户文本只切分一次。
+各预处理器在切分结果上再套用自己的停用词和长度过滤。
+"""
+
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import jieba
+
+# 清理模式：保留的字符集
+CLEAN_PATTERNS = {
+    'default': re.compile(r'[^\u4e00-\u9fa5a-zA-Z0-9\s]'),
+    'symbols': re.compile(r'[^\u4e00-\u9fa5a-zA-Z0-9\s+\-/]'),  # 额外保留 + - /（如 C++、UI/UX）
+}
+_WHITESPACE = re.compile(r'\s+')
+
+class TextTokenizer:
+    """带缓存的jieba分词服务"""
+
+    def __init__(self, cache_size: int = 4096, workers: int = 1, parallel_min_docs: int = 64):
+        self.cache_size = cache_size
+        self.workers = workers
+        self.parallel_min_docs = parallel_min_docs
+        self._cache: 'OrderedDict[bytes, Tuple[str, ...]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._parallel_enabled = False
+        self.hits = 0
+        self.misses = 0
+
+    def initialize(self) -> None:
+        """预先加载jieba词典，避免首个请求承担加载耗时"""
+        if not self._initialized:
+            jieba.initialize()
+            self._initialized = True
+
+    def clean(self, text: str, mode: str = 'default') -> str:
+        """去掉保留字符集以外的字符并合并空白"""
+        if not text:
+            return ""
+        return _WHITESPACE.sub(' ', CLEAN_PATTERNS[mode].sub(' ', text)).strip()
+
+    @staticmethod
+    def _key(text: str, mode: str) -> bytes:
+        return hashlib.blake2b(f"{mode}\0{text}".encode('utf-8'), digest_size=16).digest()
+
+    def _lookup(self, key: bytes) -> Optional[Tuple[str, ...]]:
+        with self._lock:
+            words = self._cache.get(key)
+            if words is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return words
+
+    def _store(self, key: bytes, words: Tuple[str, ...]) -> None:
+        with self._lock:
+            self._cache[key] = words
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _strip_words(words) -> Tuple[str, ...]:
+        return tuple(word for word in (w.strip() for w in words) if word)
+
+    def segment(self, text: str, mode: str = 'default') -> Tuple[str, ...]:
+        """清理并分词，返回去掉空白后的全部词（未做停用词过滤）"""
+        if not text:
+            return ()
+        key = self._key(text, mode)
+        words = self._lookup(key)
+        if words is None:
+            self.initialize()
+            # 始终使用默认分词器的串行cut，单条文本不经过并行进程池
+            words = self._strip_words(jieba.dt.cut(self.clean(text, mode)))
+            self._store(key, words)
+        return words
+
+    def segment_for_search(self, text: str, mode: str = 'default') -> Tuple[str, ...]:
+        """搜索引擎模式分词（长词再切出其中的短词），用于建立和查询倒排索引"""
+        if not text:
+            return ()
+        key = self._key(text, f"search:{mode}")
+        words = self._lookup(key)
+        if words is None:
+            self.initialize()
+            words = self._strip_words(jieba.dt.cut_for_search(self.clean(text, mode)))
+            self._store(key, words)
+        return words
+
+    def segment_many(self, texts: List[str], mode: str = 'default') -> List[Tuple[str, ...]]:
+        """批量分词，未命中缓存的文本较多且配置了多个worker时使用jieba并行模式"""
+        results: List[Optional[Tuple[str, ...]]] = [None] * len(texts)
+        pending: Dict[bytes, List[int]] = {}
+        for i, text in enumerate(texts):
+            if not text:
+                results[i] = ()
+                continue
+            key = self._key(text, mode)
+            words = self._lookup(key)
+            if words is None:
+                pending.setdefault(key, []).append(i)
+            else:
+                results[i] = words
+
+        if pending:
+            keys = list(pending)
+            cleaned = [self.clean(texts[pending[key][0]], mode) for key in keys]
+            if len(keys) >= self.parallel_min_docs and self._enable_parallel():
+                segmented = self._parallel_segment(cleaned)
+            else:
+                segmented = [self._strip_words(jieba.dt.cut(text)) for text in cleaned]
+            for key, words in zip(keys, segmented):
+                self._store(key, words)
+                for i in pending[key]:
+                    results[i] = words
+        return results
+
+    def use_batch_workers(self, workers: Optional[int] = None) -> None:
+        """离线/批处理脚本调用：允许大批量分词时开启jieba并行模式
+
+        并行模式会从当前进程fork进程池，API服务进程中有其他线程，不应开启。
+        workers默认取 TOKENIZER_BATCH_WORKERS，未设置时为CPU核数。
+        """
+        self.workers = workers or int(os.getenv('TOKENIZER_BATCH_WORKERS', str(os.cpu_count() or 1)))
+
+    def _enable_parallel(self) -> bool:
+        """按需开启jieba并行模式（仅POSIX且worker数大于1）"""
+        if self._parallel_enabled:
+            return True
+        if self.workers <= 1 or os.name == 'nt':
+            return False
+        self.initialize()
+        try:
+            jieba.enable_parallel(self.workers)
+            self._parallel_enabled = True
+        except Exception as e:
+            print(f"开启jieba并行分词失败: {e}")
+            self.workers = 1
+        return self._parallel_enabled
+
+    def _parallel_segment(self, cleaned: List[str]) -> List[Tuple[str, ...]]:
+        """每篇文档占一行交给并行cut（按行分发到进程池），再按换行切回各文档"""
+        documents, current = [], []
+        for word in jieba.cut('\n'.join(cleaned) + '\n'):
+            if word == '\n':
+                documents.append(self._strip_words(current))
+                current = []
+            else:
+                current.append(word)
+        return documents
+
+    def tokenize(self, text: str, stopwords=frozenset(), min_length: int = 2, mode: str = 'default') -> List[str]:
+        """分词并过滤停用词、过短的词和纯数字"""
+        return [
+            word for word in self.segment(text, mode)
+            if len(word) >= min_length and word not in stopwords and not word.isdigit()
+        ]
+
+    def tokenize_many(self, texts: List[str], stopwords=frozenset(), min_length: int = 2,
+                      mode: str = 'default') -> List[List[str]]:
+        """批量版tokenize"""
+        return [
+            [word for word in words if len(word) >= min_length and word not in stopwords and not word.isdigit()]
+            for words in self.segment_many(texts, mode)
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses,
+                'parallel': self._parallel_enabled}
+
+# 全局实例（服务进程默认单进程分词，批处理脚本通过 use_batch_workers 开启并行）
+text_tokenizer = TextTokenizer(
+    cache_size=int(os.getenv('TOKENIZER_CACHE_SIZE', '4096')),
+    workers=int(os.getenv('TOKENIZER_WORKERS', '1'))
+)
@@ -1,17 +1,24 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
 import json
+import time
+import uuid
+import hashlib
 import numpy as np
-import jieba
-import re
-from typing import Dict, List, Tuple, Set, Any
+from typing import Dict, List, Tuple, Set, Any, Optional
 from dataclasses import dataclass
 from sklearn.feature_extraction.text import TfidfVectorizer
 from gensim import corpora, models
 from gensim.parsing.preprocessing import STOPWORDS
 from configs.config import TopicModelingConfig
 from .tag_pool import TagPool, TagCategory
+from .tag_automaton import get_tag_extractor
+from .text_tokenizer import text_tokenizer
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 @dataclass
 class TopicResult:
@@ -21,6 +28,31 @@ class TopicResult:
     topic_keywords: Dict[int, List[Tuple[str, float]]]  # {topic_id: [(word, weight), ...]}
     text_vector: List[float]  # 文本向量表示
 
+# 预先计算标签掩码的请求类型，其他请求类型按 "all" 处理
+TAG_REQUEST_TYPES = ("找对象", "找队友", "all")
+# 主题提取标签的置信度阈值
+TAG_CONFIDENCE_THRESHOLD = 0.1
+# 每个主题缓存的关键词数
+TOPIC_KEYWORDS_TOPN = 10
+
+# 模型文件包：save_model一起写出，load_model一步读入
+# 必需文件缺失时无法加载；派生文件缺失或过期时由必需文件重新生成
+MODEL_BUNDLE_REQUIRED = ("_lda", "_dict", "_tag_mapping.json")
+MODEL_BUNDLE_DERIVED = ("_tag_matrix.npz", "_topic_keywords.json")
+# 按优先级查找的模型文件包
+DEFAULT_MODEL_PATHS = ("data/models/production_model", "data/models/lda_model")
+# 加载LDA模型时numpy数组的内存映射模式，'r'使多个worker进程共享同一份物理内存页，设为空则读入堆内存
+MODEL_MMAP_MODE = os.getenv('MODEL_MMAP_MODE', 'r') or None
+
+def model_bundle_exists(model_path: str) -> bool:
+    """模型文件包的必需文件是否齐全"""
+    return all(os.path.exists(f"{model_path}{suffix}") for suffix in MODEL_BUNDLE_REQUIRED)
+
+def _tag_pool_version() -> str:
+    """各请求类型标签列表的哈希，标签池变化后持久化的掩码失效"""
+    tag_lists = {request_type: TagPool.get_tag_list(request_type) for request_type in TAG_REQUEST_TYPES}
+    return hashlib.md5(json.dumps(tag_lists, ensure_ascii=False).encode('utf-8')).hexdigest()
+
 class ChineseTextPreprocessor:
     """中文文本预处理器"""
     
@@ -39,42 +71,34 @@ class ChineseTextPreprocessor:
     
     def clean_text(self, text: str) -> str:
         """清理文本"""
-        if not text:
-            return ""
-        
-        # 移除特殊字符，保留中文、英文、数字和空格
-        text = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9\s+\-/]', ' ', text)
-        # 移除多余空格
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        return text_tokenizer.clean(text, mode='symbols')
+    
+    def _filter(self, words) -> List[str]:
+        """保留非停用词、非纯数字的单字，以及所有多字词"""
+        return [
+            word for word in words
+            if (word not in self.stopwords and  # 不是停用词
+                not word.isdigit() and  # 不是纯数字
+                word.isalpha() or len(word) > 1)  # 是字母或长度大于1
+        ]
     
     def tokenize(self, text: str) -> List[str]:
         """分词"""
-        text = self.clean_text(text)
-        if not text:
-            return []
-        
-        print(f"分词前文本: {text[:100]}...")
-        
-        # 中文分词
-        tokens = []
-        for word in jieba.cut(text):
-            word = word.strip()
-            if (len(word) >= 1 and  # 长度大于等于1（放宽条件）
-                word not in self.stopwords and  # 不是停用词
-                not word.isdigit() and  # 不是纯数字
-                word.isalpha() or len(word) > 1):  # 是字母或长度大于1
-                tokens.append(word)
-        
-        print(f"分词结果: {tokens[:20]}...")
+        tokens = self._filter(text_tokenizer.segment(text, mode='symbols'))
+        if tokens:
+            logger.debug("分词结果: %s...", tokens[:20])
         return tokens
     
+    def tokenize_many(self, texts: List[str]) -> List[List[str]]:
+        """批量分词"""
+        return [self._filter(words) for words in text_tokenizer.segment_many(texts, mode='symbols')]
+    
     def preprocess_documents(self, texts: List[str]) -> List[List[str]]:
         """预处理文档集合"""
         processed = []
-        for i, text in enumerate(texts):
-            tokens = self.tokenize(text)
-            print(f"文档 {i+1} 分词得到 {len(tokens)} 个词汇")
+        for i, words in enumerate(text_tokenizer.segment_many(texts, mode='symbols')):
+            tokens = self._filter(words)
+            logger.debug("文档 %d 分词得到 %d 个词汇", i + 1, len(tokens))
             processed.append(tokens)
         return processed
 
@@ -94,6 +118,16 @@ class LDATopicModel:
         
         # 标签到主题的映射
         self.tag_topic_mapping = {}
+        # 由映射得到的稠密 (标签数 × 主题数) float32矩阵和各请求类型的标签掩码
+        self.tag_topic_tags: List[str] = []
+        self.tag_topic_matrix = None
+        self.tag_type_masks: Dict[str, np.ndarray] = {}
+        # 主题关键词表 {topic_id: [(word, weight), ...]}，模型不变时不再调用show_topic
+        self.topic_keywords_table: Dict[int, List[Tuple[str, float]]] = {}
+        # 最近一次加载模型文件包的路径、耗时和内存映射模式
+        self.load_stats: Dict[str, Any] = {}
+        # 模型版本：训练时随机生成，加载时由模型文件的大小和修改时间得出（各worker一致）
+        self.model_version = ""
         
     def train(self, documents: List[str]) -> None:
         """训练LDA模型"""
@@ -139,6 +173,7 @@ class LDATopicModel:
         num_topics = min(self.config.num_topics, len(self.dictionary), 3)
         
         # 训练LDA模型
+        self.model_version = uuid.uuid4().hex
         self.lda_model = models.LdaModel(
             corpus=self.corpus,
             id2word=self.dictionary,
@@ -154,6 +189,20 @@ class LDATopicModel:
         
         # 建立标签到主题的映射
         self._build_tag_topic_mapping()
+        self._build_topic_keywords()
+    
+    def _build_topic_keywords(self) -> None:
+        """计算每个主题的关键词表"""
+        self.topic_keywords_table = {
+            topic_id: [(word, float(weight)) for word, weight in self.lda_model.show_topic(topic_id, topn=TOPIC_KEYWORDS_TOPN)]
+            for topic_id in range(self.lda_model.num_topics)
+        }
+    
+    def get_topic_keywords(self, topic_id: int, topn: int = TOPIC_KEYWORDS_TOPN) -> List[Tuple[str, float]]:
+        """从关键词表读取主题的前topn个关键词"""
+        if not self.topic_keywords_table and self.lda_model:
+            self._build_topic_keywords()
+        return self.topic_keywords_table.get(int(topic_id), [])[:topn]
     
     def _build_tag_topic_mapping(self):
         """建立标签到主题的映射关系"""
@@ -166,6 +215,7 @@ class LDATopicModel:
         all_tags = self.tag_pool.get_tag_list()
         
         # 为每个标签找到最相关的主题
+        self.tag_topic_mapping = {}
         mapped_count = 0
         for tag in all_tags:
             # 将标签作为文档进行预处理
@@ -187,16 +237,30 @@ class LDATopicModel:
                 self.tag_topic_mapping[tag] = best_topics
                 mapped_count += 1
         
+        self._build_tag_topic_matrix()
         print(f"完成标签映射，映射了 {mapped_count} 个标签")
     
+    def _build_tag_topic_matrix(self) -> None:
+        """由标签映射生成 (标签数 × 主题数) 权重矩阵和各请求类型的标签掩码"""
+        self.tag_topic_tags = list(self.tag_topic_mapping)
+        matrix = np.zeros((len(self.tag_topic_tags), self.lda_model.num_topics), dtype=np.float32)
+        for row, tag in enumerate(self.tag_topic_tags):
+            for topic_id, weight in self.tag_topic_mapping[tag]:
+                matrix[row, int(topic_id)] += weight
+        self.tag_topic_matrix = matrix
+        self.tag_type_masks = {request_type: self._build_tag_mask(request_type) for request_type in TAG_REQUEST_TYPES}
+    
+    def _build_tag_mask(self, request_type: str) -> np.ndarray:
+        relevant = set(self.tag_pool.get_tag_list(request_type))
+        return np.array([tag in relevant for tag in self.tag_topic_tags], dtype=bool)
+    
     def extract_topics_and_tags(self, text: str, request_type: str = "all") -> TopicResult:
         """从文本中提取主题和标签"""
-        print(f"🔍 [TopicModel] 开始提取标签，请求类型: {request_type}")
-        print(f"📝 [TopicModel] 输入文本长度: {len(text)} 字符")
+        logger.debug("开始提取标签，请求类型: %s，输入文本长度: %d 字符", request_type, len(text))
         
         # 如果模型未训练，直接使用关键词匹配
         if not self.lda_model:
-            print("⚠️ [TopicModel] LDA模型未训练，使用关键词匹配方式")
+            logger.debug("LDA模型未训练，使用关键词匹配方式")
             extracted_tags = self._extract_tags_by_keywords(text, request_type)
             return TopicResult(
                 topics=[],
@@ -207,10 +271,10 @@ class LDATopicModel:
         
         # 预处理文本
         tokens = self.preprocessor.tokenize(text)
-        print(f"🔤 [TopicModel] 分词结果: {len(tokens)} 个词汇")
+        logger.debug("分词结果: %d 个词汇", len(tokens))
         
         if not tokens:
-            print("⚠️ [TopicModel] 分词结果为空，使用关键词匹配")
+            logger.debug("分词结果为空，使用关键词匹配")
             extracted_tags = self._extract_tags_by_keywords(text, request_type)
             return TopicResult(
                 topics=[],
@@ -221,10 +285,10 @@ class LDATopicModel:
         
         # 转换为BOW
         bow = self.dictionary.doc2bow(tokens)
-        print(f"📊 [TopicModel] BOW向量长度: {len(bow)}")
+        logger.debug("BOW向量长度: %d", len(bow))
         
         if not bow:
-            print("⚠️ [TopicModel] BOW向量为空，使用关键词匹配")
+            logger.debug("BOW向量为空，使用关键词匹配")
             extracted_tags = self._extract_tags_by_keywords(text, request_type)
             return TopicResult(
                 topics=[],
@@ -238,33 +302,30 @@ class LDATopicModel:
             bow, 
             minimum_probability=0.01  # 降低阈值
         )
-        print(f"📈 [TopicModel] 主题分布: {len(topic_distribution)} 个主题")
+        logger.debug("主题分布: %d 个主题", len(topic_distribution))
         
         # 获取主题关键词
-        topic_keywords = {}
-        for topic_id, _ in topic_distribution:
-            words = self.lda_model.show_topic(topic_id, topn=10)
-            topic_keywords[topic_id] = words
+        topic_keywords = {topic_id: self.get_topic_keywords(topic_id) for topic_id, _ in topic_distribution}
         
         # 基于主题分布提取标签
         extracted_tags = self._extract_tags_from_topics(
             topic_distribution, 
             request_type
         )
-        print(f"🏷️ [TopicModel] 从主题提取到 {len(extracted_tags)} 个标签")
+        logger.debug("从主题提取到 %d 个标签", len(extracted_tags))
         
         # 如果没有提取到标签，使用简单的关键词匹配
         if not extracted_tags:
-            print("🔄 [TopicModel] 主题提取为空，改用关键词匹配")
+            logger.debug("主题提取为空，改用关键词匹配")
             extracted_tags = self._extract_tags_by_keywords(text, request_type)
-            print(f"🏷️ [TopicModel] 关键词匹配提取到 {len(extracted_tags)} 个标签")
+            logger.debug("关键词匹配提取到 %d 个标签", len(extracted_tags))
         
         # 生成文本向量（主题概率分布）
         text_vector = [0.0] * self.lda_model.num_topics
         for topic_id, prob in topic_distribution:
             text_vector[topic_id] = prob
         
-        print(f"✅ [TopicModel] 标签提取完成，总共 {len(extracted_tags)} 个标签")
+        logger.debug("标签提取完成，总共 %d 个标签", len(extracted_tags))
         return TopicResult(
             topics=topic_distribution,
             extracted_tags=extracted_tags,
@@ -272,34 +333,95 @@ class LDATopicModel:
             text_vector=text_vector
         )
     
+    def _get_tag_topic_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """返回标签列表和对应的 (标签数 × 主题数) 权重矩阵"""
+        if self.tag_topic_matrix is None:
+            self._build_tag_topic_matrix()
+        return self.tag_topic_tags, self.tag_topic_matrix
+    
+    def _score_tags(self, doc_topics: np.ndarray, request_type: str) -> Tuple[np.ndarray, np.ndarray]:
+        """计算文档对请求类型相关标签的置信度
+        
+        doc_topics为 (文档数 × 主题数) 的主题分布，返回相关标签在矩阵中的行号和 (文档数 × 相关标签数) 的置信度。
+        """
+        self._get_tag_topic_matrix()
+        mask_type = request_type if request_type in TAG_REQUEST_TYPES else "all"
+        mask = self.tag_type_masks.get(mask_type)
+        if mask is None:
+            mask = self.tag_type_masks[mask_type] = self._build_tag_mask(mask_type)
+        rows = np.flatnonzero(mask)
+        return rows, doc_topics @ self.tag_topic_matrix[rows].T
+    
+    def extract_many(self, texts: List[str], request_type: str = "all", chunksize: int = 256) -> List[TopicResult]:
+        """批量提取主题和标签，结果与逐条调用 extract_topics_and_tags 一致
+        
+        分词批量进行，gensim按chunksize篇一批推断主题分布，
+        标签置信度由 文档-主题矩阵 × 标签-主题矩阵转置 一次算出。
+        """
+        if not self.lda_model:
+            return [self._keyword_result(text, request_type, []) for text in texts]
+        
+        num_topics = self.lda_model.num_topics
+        bows = [self.dictionary.doc2bow(tokens) for tokens in self.preprocessor.tokenize_many(texts)]
+        valid = [i for i, bow in enumerate(bows) if bow]
+        
+        # 文档-主题矩阵，与 get_document_topics(minimum_probability=0.01) 相同的归一化和过滤
+        doc_topics = np.zeros((len(texts), num_topics), dtype=np.float32)
+        for start in range(0, len(valid), chunksize):
+            rows = valid[start:start + chunksize]
+            gamma, _ = self.lda_model.inference([bows[i] for i in rows])
+            doc_topics[rows] = gamma / gamma.sum(axis=1, keepdims=True)
+        doc_topics[doc_topics < 0.01] = 0.0
+        
+        # 标签置信度
+        tag_rows, tag_scores = self._score_tags(doc_topics, request_type)
+        
+        results = []
+        for i, text in enumerate(texts):
+            if not bows[i]:
+                results.append(self._keyword_result(text, request_type, [0.0] * num_topics))
+                continue
+            
+            topic_distribution = [(int(topic_id), float(doc_topics[i, topic_id])) for topic_id in np.flatnonzero(doc_topics[i])]
+            topic_keywords = {topic_id: self.get_topic_keywords(topic_id) for topic_id, _ in topic_distribution}
+            
+            extracted_tags = self._select_tags(tag_rows, tag_scores[i])
+            if not extracted_tags:
+                extracted_tags = self._extract_tags_by_keywords(text, request_type)
+            
+            results.append(TopicResult(
+                topics=topic_distribution,
+                extracted_tags=extracted_tags,
+                topic_keywords=topic_keywords,
+                text_vector=doc_topics[i].tolist()
+            ))
+        
+        logger.debug("批量提取完成: %d 篇文本, %d 篇完成主题推断", len(texts), len(valid))
+        return results
+    
+    def _keyword_result(self, text: str, request_type: str, text_vector: List[float]) -> TopicResult:
+        """仅用关键词匹配得到的结果"""
+        return TopicResult(
+            topics=[],
+            extracted_tags=self._extract_tags_by_keywords(text, request_type),
+            topic_keywords={},
+            text_vector=text_vector
+        )
+    
     def _extract_tags_by_keywords(self, text: str, request_type: str) -> Dict[str, float]:
         """基于关键词匹配提取标签"""
-        print(f"🔍 [TopicModel] 开始关键词匹配，请求类型: {request_type}")
+        logger.debug("开始关键词匹配，请求类型: %s", request_type)
         text_lower = text.lower()
         extracted_tags = {}
         
-        # 获取相关标签池
+        # 标签池匹配：完整匹配 0.8，部分词（长度大于1）匹配 0.6
         try:
-            relevant_tags = self.tag_pool.get_tag_list(request_type)
-            print(f"📋 [TopicModel] 获取到 {len(relevant_tags)} 个候选标签")
+            hits = get_tag_extractor(request_type).extract(text, kinds=('exact', 'partial'), min_partial_length=2)
+            extracted_tags = {tag: 0.8 if kind == 'exact' else 0.6 for tag, kind in hits.items()}
         except Exception as e:
-            print(f"⚠️ [TopicModel] 获取标签池失败: {e}")
-            relevant_tags = []
-        
-        # 标签匹配
-        matched_count = 0
-        for tag in relevant_tags:
-            tag_lower = tag.lower()
-            # 完整匹配
-            if tag_lower in text_lower:
-                extracted_tags[tag] = 0.8
-                matched_count += 1
-            # 部分词匹配
-            elif any(word in text_lower for word in tag_lower.split() if len(word) > 1):
-                extracted_tags[tag] = 0.6
-                matched_count += 1
-        
-        print(f"🎯 [TopicModel] 从标签池匹配到 {matched_count} 个标签")
+            logger.warning("获取标签池失败: %s", e)
+        
+        logger.debug("从标签池匹配到 %d 个标签", len(extracted_tags))
         
         # 基于内容的标签规则（增强版）
         content_rules = {
@@ -341,11 +463,11 @@ class LDATopicModel:
                     rule_matched_count += 1
                     break
         
-        print(f"📝 [TopicModel] 从内容规则匹配到 {rule_matched_count} 个标签")
+        logger.debug("从内容规则匹配到 %d 个标签", rule_matched_count)
         
         # 如果还是没有标签，添加一些通用标签
         if not extracted_tags:
-            print("🔄 [TopicModel] 未匹配到任何标签，添加通用标签")
+            logger.debug("未匹配到任何标签，添加通用标签")
             if request_type == '找对象':
                 extracted_tags.update({
                     '寻找伴侣': 0.6,
@@ -365,38 +487,27 @@ class LDATopicModel:
                     '积极': 0.5
                 })
         
-        print(f"✅ [TopicModel] 关键词匹配完成，共提取 {len(extracted_tags)} 个标签")
+        logger.debug("关键词匹配完成，共提取 %d 个标签", len(extracted_tags))
         return extracted_tags
     
     def _extract_tags_from_topics(self, topic_distribution: List[Tuple[int, float]], 
-                                 request_type: str) -> Dict[str, float]:
-        """基于主题分布提取标签"""
-        extracted_tags = {}
-        
-        # 获取相关标签池
-        relevant_tags = self.tag_pool.get_tag_list(request_type)
-        
-        for tag in relevant_tags:
-            if tag not in self.tag_topic_mapping:
-                continue
-            
-            # 计算标签的置信度
-            confidence = 0.0
-            for tag_topic_id, tag_topic_weight in self.tag_topic_mapping[tag]:
-                # 找到文档中对应主题的权重
-                doc_topic_weight = 0.0
-                for doc_topic_id, doc_topic_prob in topic_distribution:
-                    if doc_topic_id == tag_topic_id:
-                        doc_topic_weight = doc_topic_prob
-                        break
-                
-                confidence += tag_topic_weight * doc_topic_weight
-            
-            # 降低置信度阈值
-            if confidence >= 0.1:
-                extracted_tags[tag] = confidence
+                                 request_type: str, top_k: int = None) -> Dict[str, float]:
+        """基于主题分布提取标签：标签-主题矩阵与文档主题向量相乘"""
+        doc_vector = np.zeros(self.lda_model.num_topics, dtype=np.float32)
+        for topic_id, prob in topic_distribution:
+            doc_vector[topic_id] = prob
         
-        return extracted_tags
+        tag_rows, tag_scores = self._score_tags(doc_vector, request_type)
+        return self._select_tags(tag_rows, tag_scores, top_k)
+    
+    def _select_tags(self, tag_rows: np.ndarray, scores: np.ndarray, top_k: int = None) -> Dict[str, float]:
+        """取置信度达到阈值的标签；top_k（默认取配置的max_topic_tags）大于0时按置信度从高到低只保留前top_k个"""
+        top_k = top_k or self.config.max_topic_tags or None
+        hits = np.flatnonzero(scores >= TAG_CONFIDENCE_THRESHOLD)
+        if top_k is not None and len(hits) > top_k:
+            hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+            hits = hits[np.argsort(-scores[hits], kind='stable')]
+        return {self.tag_topic_tags[tag_rows[j]]: float(scores[j]) for j in hits}
     
     def get_topic_info(self) -> Dict[int, Dict[str, Any]]:
         """获取主题信息"""
@@ -405,7 +516,7 @@ class LDATopicModel:
         
         topic_info = {}
         for topic_id in range(self.lda_model.num_topics):
-            words = self.lda_model.show_topic(topic_id, topn=10)
+            words = self.get_topic_keywords(topic_id)
             topic_info[topic_id] = {
                 'keywords': words,
                 'description': ', '.join([word for word, _ in words[:5]])
@@ -416,7 +527,8 @@ class LDATopicModel:
     def save_model(self, model_path: str) -> None:
         """保存模型"""
         if self.lda_model:
-            self.lda_model.save(f"{model_path}_lda")
+            # sep_limit=0: 所有numpy数组（含state中的sstats）单独存为.npy，加载时可内存映射
+            self.lda_model.save(f"{model_path}_lda", sep_limit=0)
             self.dictionary.save(f"{model_path}_dict")
             
             # 保存标签映射，处理float32类型
@@ -427,33 +539,101 @@ class LDATopicModel:
             with open(f"{model_path}_tag_mapping.json", 'w', encoding='utf-8') as f:
                 json.dump(serializable_mapping, f, ensure_ascii=False, indent=2)
             
+            # 标签-主题矩阵和标签掩码
+            tags, matrix = self._get_tag_topic_matrix()
+            np.savez(
+                f"{model_path}_tag_matrix.npz",
+                tags=np.array(tags, dtype=str),
+                matrix=matrix,
+                mask_types=np.array(list(self.tag_type_masks), dtype=str),
+                masks=np.array([self.tag_type_masks[t] for t in self.tag_type_masks], dtype=bool).reshape(len(self.tag_type_masks), len(tags)),
+                tag_pool_version=np.array(_tag_pool_version())
+            )
+            
+            # 主题关键词表
+            if not self.topic_keywords_table:
+                self._build_topic_keywords()
+            with open(f"{model_path}_topic_keywords.json", 'w', encoding='utf-8') as f:
+                json.dump({str(tid): words for tid, words in self.topic_keywords_table.items()}, f, ensure_ascii=False, indent=2)
+            
             print(f"模型已保存到: {model_path}")
     
     def load_model(self, model_path: str) -> None:
-        """加载模型"""
+        """加载模型文件包（LDA模型、词典、标签映射及派生的标签矩阵和主题关键词表）"""
         try:
-            self.lda_model = models.LdaModel.load(f"{model_path}_lda")
+            start_time = time.perf_counter()
+            self.lda_model = models.LdaModel.load(f"{model_path}_lda", mmap=MODEL_MMAP_MODE)
+            stat = os.stat(f"{model_path}_lda")
+            self.model_version = hashlib.md5(f"{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8')).hexdigest()
             self.dictionary = corpora.Dictionary.load(f"{model_path}_dict")
             
             # 加载标签映射
             with open(f"{model_path}_tag_mapping.json", 'r', encoding='utf-8') as f:
                 self.tag_topic_mapping = json.load(f)
+            self._load_tag_topic_matrix(f"{model_path}_tag_matrix.npz")
+            self._load_topic_keywords(f"{model_path}_topic_keywords.json")
             
-            print(f"模型已从 {model_path} 加载")
+            elapsed = time.perf_counter() - start_time
+            self.load_stats = {'path': model_path, 'seconds': round(elapsed, 4), 'mmap': MODEL_MMAP_MODE}
+            print(f"模型已从 {model_path} 加载，耗时 {elapsed:.3f}s（mmap={MODEL_MMAP_MODE}）")
         except Exception as e:
             print(f"加载模型失败: {e}")
             raise
+    
+    def load_first_available(self, model_paths=DEFAULT_MODEL_PATHS) -> Optional[str]:
+        """按顺序加载第一个文件齐全的模型文件包，返回其路径，都不存在时返回None"""
+        for model_path in model_paths:
+            if model_bundle_exists(model_path):
+                self.load_model(model_path)
+                return model_path
+        return None
+    
+    def _load_topic_keywords(self, keywords_path: str) -> None:
+        """读取持久化的主题关键词表，文件缺失或与模型不一致时重新计算"""
+        self.topic_keywords_table = {}
+        if os.path.exists(keywords_path):
+            try:
+                with open(keywords_path, 'r', encoding='utf-8') as f:
+                    table = {int(tid): [(word, float(weight)) for word, weight in words] for tid, words in json.load(f).items()}
+                if set(table) == set(range(self.lda_model.num_topics)):
+                    self.topic_keywords_table = table
+                    return
+                print("主题关键词表与模型不一致，将重新计算")
+            except Exception as e:
+                print(f"加载主题关键词表失败，将重新计算: {e}")
+        self._build_topic_keywords()
+    
+    def _load_tag_topic_matrix(self, matrix_path: str) -> None:
+        """读取持久化的标签-主题矩阵，文件缺失或与映射、标签池不一致时由映射重新生成"""
+        self.tag_topic_matrix = None
+        self.tag_type_masks = {}
+        if os.path.exists(matrix_path):
+            try:
+                with np.load(matrix_path, allow_pickle=False) as data:
+                    tags = data['tags'].tolist()
+                    if tags == list(self.tag_topic_mapping) and data['matrix'].shape == (len(tags), self.lda_model.num_topics):
+                        self.tag_topic_tags = tags
+                        self.tag_topic_matrix = data['matrix'].astype(np.float32, copy=False)
+                        if str(data['tag_pool_version']) == _tag_pool_version():
+                            self.tag_type_masks = dict(zip(data['mask_types'].tolist(), data['masks']))
+                    else:
+                        print("标签-主题矩阵与标签映射不一致，将重新生成")
+            except Exception as e:
+                print(f"加载标签-主题矩阵失败，将重新生成: {e}")
+                self.tag_topic_matrix = None
+        
+        if self.tag_topic_matrix is None:
+            self._build_tag_topic_matrix()
+        elif not self.tag_type_masks:
+            self.tag_type_masks = {request_type: self._build_tag_mask(request_type) for request_type in TAG_REQUEST_TYPES}
 
 # 全局实例
 topic_model = LDATopicModel()
 
 # 自动加载生产模型（如果存在）
 try:
-    import os
-    production_model_path = "data/models/production_model"
-    if (os.path.exists(f"{production_model_path}_lda") and 
-        os.path.exists(f"{production_model_path}_dict") and 
-        os.path.exists(f"{production_model_path}_tag_mapping.json")):
+    production_model_path = DEFAULT_MODEL_PATHS[0]
+    if model_bundle_exists(production_model_path):
         topic_model.load_model(production_model_path)
         print("已自动加载生产LDA模型")
 except Exception as e:
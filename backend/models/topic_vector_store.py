@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+用户主题向量存储
+
+为每个用户持久化保存LDA主题分布和提取的标签，只有当用户的元数据/标签
+（即描述文本的指纹）变化时才重新推断。/match/lda 只需对查询做一次推断，
+再与存储的向量做点积即可完成打分。
+"""
+
+import json
+import os
+import time
+import hashlib
+import datetime
+import tempfile
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Any
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_STORE_PATH = "data/models/user_topic_vectors.json"
+# 两次写盘的最小间隔（秒），期间的变更在下次保存或进程退出时一起写入
+SAVE_INTERVAL = float(os.getenv('USER_TOPIC_STORE_SAVE_INTERVAL', '30'))
+
+def text_fingerprint(text: str) -> str:
+    """计算用户描述文本的指纹"""
+    return hashlib.md5((text or '').encode('utf-8')).hexdigest()
+
+class UserTopicStore:
+    """按用户持久化的主题向量存储"""
+
+    def __init__(self, store_path: str = DEFAULT_STORE_PATH, save_interval: float = SAVE_INTERVAL):
+        self.store_path = store_path
+        self.save_interval = save_interval
+        # {user_id: {'fingerprint', 'model_version', 'num_topics', 'vector', 'tags': {request_type: {tag: conf}}, 'updated_at'}}
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._dirty = False
+        self._last_save: Optional[float] = None
+
+    def load(self) -> None:
+        """从磁盘加载存储"""
+        self._loaded = True
+        if not os.path.exists(self.store_path):
+            return
+
+        try:
+            with open(self.store_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("加载用户主题向量失败: %s", e)
+            return
+
+        for user_id, entry in data.get('users', {}).items():
+            entry['vector'] = np.asarray(entry.get('vector', []), dtype=np.float32)
+            self.users[user_id] = entry
+
+    def save(self, force: bool = False) -> None:
+        """保存存储到磁盘
+
+        仅在有变更时写入，且距上次写入不足save_interval秒时跳过（force=True时立即写入）。
+        先写到同目录下的唯一临时文件再原子替换，多个worker同时保存互不干扰；写入失败只打印不抛出。
+        """
+        if not self._dirty:
+            return
+        if not force and self._last_save is not None and time.monotonic() - self._last_save < self.save_interval:
+            return
+
+        serializable = {}
+        for user_id, entry in self.users.items():
+            serializable[user_id] = dict(entry, vector=[float(v) for v in entry['vector']])
+
+        directory = os.path.dirname(self.store_path) or '.'
+        tmp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory, suffix='.tmp', delete=False) as f:
+                tmp_path = f.name
+                json.dump({'user_ids': list(serializable.keys()), 'users': serializable}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.store_path)
+        except OSError as e:
+            logger.warning("保存用户主题向量失败: %s", e)
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    def get(self, user_id: str, text: str, request_type: str, num_topics: int,
+            model_version: str = '') -> Optional[Dict[str, Any]]:
+        """获取仍然有效的存储条目，文本或模型（版本、主题数）变化时返回None"""
+        self._ensure_loaded()
+        entry = self.users.get(user_id)
+        if (not entry or
+                entry.get('fingerprint') != text_fingerprint(text) or
+                entry.get('model_version', '') != model_version or
+                entry.get('num_topics') != num_topics or
+                request_type not in entry.get('tags', {})):
+            return None
+        return entry
+
+    def refresh(self, user_id: str, text: str, request_type: str, topic_model) -> Dict[str, Any]:
+        """获取用户的主题向量，必要时重新推断并写入存储"""
+        num_topics, model_version = self._model_key(topic_model)
+        entry = self.get(user_id, text, request_type, num_topics, model_version)
+        if entry is not None:
+            return entry
+
+        result = topic_model.extract_topics_and_tags(text, request_type)
+        return self._store_result(user_id, text, request_type, num_topics, model_version, result)
+
+    def refresh_many(self, user_texts: Dict[str, str], request_type: str, topic_model) -> Dict[str, Dict[str, Any]]:
+        """批量版refresh：所有过期用户的文本用一次 extract_many 推断"""
+        num_topics, model_version = self._model_key(topic_model)
+        entries = {}
+        stale = []
+        for user_id, text in user_texts.items():
+            entry = self.get(user_id, text, request_type, num_topics, model_version)
+            if entry is None:
+                stale.append(user_id)
+            else:
+                entries[user_id] = entry
+
+        if stale:
+            results = topic_model.extract_many([user_texts[user_id] for user_id in stale], request_type)
+            for user_id, result in zip(stale, results):
+                entries[user_id] = self._store_result(user_id, user_texts[user_id], request_type,
+                                                      num_topics, model_version, result)
+        return entries
+
+    @staticmethod
+    def _model_key(topic_model) -> Tuple[int, str]:
+        """模型的主题数和版本，重新训练或替换模型文件后版本随之变化"""
+        num_topics = topic_model.lda_model.num_topics if topic_model.lda_model else 0
+        return num_topics, getattr(topic_model, 'model_version', '')
+
+    def _store_result(self, user_id: str, text: str, request_type: str, num_topics: int,
+                      model_version: str, result) -> Dict[str, Any]:
+        """把推断结果写入存储"""
+        vector = np.zeros(num_topics, dtype=np.float32)
+        if len(result.text_vector) == num_topics:
+            vector[:] = result.text_vector
+
+        fingerprint = text_fingerprint(text)
+        entry = self.users.get(user_id)
+        if (not entry or entry.get('fingerprint') != fingerprint or entry.get('num_topics') != num_topics or
+                entry.get('model_version', '') != model_version):
+            entry = {'fingerprint': fingerprint, 'model_version': model_version, 'num_topics': num_topics,
+                     'vector': vector, 'tags': {}}
+            self.users[user_id] = entry
+
+        entry['tags'][request_type] = {tag: float(conf) for tag, conf in result.extracted_tags.items()}
+        entry['updated_at'] = datetime.datetime.utcnow().isoformat()
+        self._dirty = True
+        return entry
+
+    def invalidate(self, user_id: str) -> None:
+        """用户元数据或标签变化时删除其存储条目
+
+        尚未从磁盘加载时不做任何事：磁盘上的旧条目会因文本指纹不一致而失效。
+        """
+        if self._loaded and self.users.pop(user_id, None) is not None:
+            self._dirty = True
+
+    def score(self, query_vector: Optional[np.ndarray], user_ids: List[str]) -> np.ndarray:
+        """用一次矩阵运算计算查询向量与多个用户向量的余弦相似度
+
+        没有查询向量时退化为各用户的主主题概率。
+        """
+        self._ensure_loaded()
+        if not user_ids:
+            return np.zeros(0, dtype=np.float32)
+
+        matrix = np.vstack([self.users[user_id]['vector'] for user_id in user_ids])
+        if query_vector is None or not np.any(query_vector) or matrix.shape[1] != len(query_vector):
+            return matrix.max(axis=1) if matrix.shape[1] else np.zeros(len(user_ids), dtype=np.float32)
+
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0] = 1.0
+        query = np.asarray(query_vector, dtype=np.float32)
+        return (matrix @ query) / (norms * np.linalg.norm(query))
+
+    def topics_of(self, user_id: str, min_probability: float = 0.01) -> List[Tuple[int, float]]:
+        """以 (topic_id, weight) 列表形式返回用户的主题分布"""
+        vector = self.users[user_id]['vector']
+        return [(int(tid), float(prob)) for tid, prob in enumerate(vector) if prob >= min_probability]
+
+# 全局实例
+user_topic_store = UserTopicStore()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Faiss向量索引
+
+为 VectorUserMatcher 提供可插拔的近似最近邻索引，支持：
+- IndexFlatIP: 精确内积检索
+- IndexIVFFlat: 倒排聚类检索
+- IndexHNSWFlat: HNSW图检索
+
+向量需预先L2归一化，内积即为余弦相似度。faiss为可选依赖，
+不可用时 VectorUserMatcher 退回NumPy矩阵检索。
+"""
+
+import json
+import dataclasses
+import numpy as np
+from typing import Dict, List, Tuple, Optional
+
+try:
+    import faiss
+except ImportError:  # faiss为可选依赖
+    faiss = None
+
+from configs.config import VectorMatchingConfig
+
+SUPPORTED_INDEX_TYPES = ('IndexFlatIP', 'IndexIVFFlat', 'IndexHNSWFlat')
+
+def faiss_available() -> bool:
+    """faiss是否可用"""
+    return faiss is not None
+
+class FaissVectorIndex:
+    """以user_id为键的Faiss索引，支持增量添加、删除和持久化"""
+
+    def __init__(self, dimension: int, config: VectorMatchingConfig = None):
+        if faiss is None:
+            raise ImportError("faiss未安装，无法构建向量索引")
+
+        self.config = config or VectorMatchingConfig()
+        if self.config.index_type not in SUPPORTED_INDEX_TYPES:
+            raise ValueError(f"不支持的索引类型: {self.config.index_type}")
+
+        self.dimension = dimension
+        self.index_type = self.config.index_type
+        self.index = None
+
+        # faiss内部使用int64 id，这里维护与user_id的双向映射
+        self.ids_by_user: Dict[str, int] = {}
+        self.users_by_id: Dict[int, str] = {}
+        self._next_id = 0
+
+        # HNSW不支持物理删除，使用墓碑标记并在检索时过滤
+        self.tombstones = set()
+        # IVF在向量数不足ivf_nlist时无法有效聚类，先用精确检索，向量够多后再重建为IVF
+        self.flat_fallback = False
+
+    def __len__(self) -> int:
+        return len(self.ids_by_user)
+
+    def _create_index(self, train_vectors: np.ndarray):
+        """根据配置创建底层索引"""
+        if self.index_type == 'IndexFlatIP':
+            base = faiss.IndexFlatIP(self.dimension)
+        elif self.index_type == 'IndexIVFFlat' and len(train_vectors) < self.config.ivf_nlist:
+            base = faiss.IndexFlatIP(self.dimension)
+        elif self.index_type == 'IndexIVFFlat':
+            nlist = self.config.ivf_nlist
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            ivf = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+            ivf.train(train_vectors)
+            ivf.nprobe = min(self.config.ivf_nprobe, nlist)
+            # IVF自身按id存取向量，不能套IndexIDMap2（删除后IDMap2按行号重排，与倒排表中的id错位）；
+            # 哈希直接映射让 reconstruct/remove_ids 可以按任意id工作
+            ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+            return ivf
+        else:
+            base = faiss.IndexHNSWFlat(self.dimension, self.config.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            base.hnsw.efSearch = self.config.hnsw_ef_search
+
+        return faiss.IndexIDMap2(base)
+
+    def build(self, user_ids: List[str], vectors: np.ndarray) -> None:
+        """用全部向量重建索引"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        self.index = self._create_index(vectors)
+        self.flat_fallback = self.index_type == 'IndexIVFFlat' and len(vectors) < self.config.ivf_nlist
+        self.ids_by_user = {}
+        self.users_by_id = {}
+        self.tombstones = set()
+        self._next_id = 0
+        self.add(user_ids, vectors)
+
+    def add(self, user_ids: List[str], vectors: np.ndarray) -> None:
+        """增量添加向量，已存在的用户会先被删除"""
+        if not user_ids:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        if self.index is None:
+            self.build(user_ids, vectors)
+            return
+
+        self.remove([user_id for user_id in user_ids if user_id in self.ids_by_user])
+
+        ids = np.arange(self._next_id, self._next_id + len(user_ids), dtype=np.int64)
+        self._next_id += len(user_ids)
+        for user_id, faiss_id in zip(user_ids, ids):
+            self.ids_by_user[user_id] = int(faiss_id)
+            self.users_by_id[int(faiss_id)] = user_id
+
+        self.index.add_with_ids(vectors, ids)
+        if self.flat_fallback and len(self.ids_by_user) >= self.config.ivf_nlist:
+            self._rebuild_live()
+
+    def remove(self, user_ids: List[str]) -> None:
+        """删除用户向量"""
+        ids = [self.ids_by_user.pop(user_id) for user_id in user_ids if user_id in self.ids_by_user]
+        if not ids:
+            return
+        for faiss_id in ids:
+            del self.users_by_id[faiss_id]
+
+        if self.index_type == 'IndexHNSWFlat':
+            self.tombstones.update(ids)
+            # 墓碑过多时重建，避免检索时过度扩展候选
+            if len(self.tombstones) > max(len(self.ids_by_user), 1):
+                self._rebuild_live()
+        else:
+            self.index.remove_ids(np.array(ids, dtype=np.int64))
+
+    def _rebuild_live(self) -> None:
+        """仅用存活向量重建索引（清理HNSW墓碑）"""
+        live_users = list(self.ids_by_user.keys())
+        if not live_users:
+            self.index = None
+            self.tombstones = set()
+            return
+        vectors = np.vstack([self.index.reconstruct(self.ids_by_user[user_id]) for user_id in live_users])
+        self.build(live_users, vectors)
+
+    def search(self, vector: np.ndarray, top_k: int) -> List[Tuple[str, float]]:
+        """检索与向量最相似的top_k个用户"""
+        return self.search_many(np.asarray(vector).reshape(1, -1), top_k)[0]
+
+    def search_many(self, vectors: np.ndarray, top_k: int) -> List[List[Tuple[str, float]]]:
+        """批量检索，每个查询向量返回最相似的top_k个用户"""
+        queries = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        if self.index is None or not self.ids_by_user or top_k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        k = min(top_k + len(self.tombstones), self.index.ntotal)
+        scores, ids = self.index.search(queries, k)
+
+        all_results = []
+        for row_scores, row_ids in zip(scores, ids):
+            results = []
+            for score, faiss_id in zip(row_scores, row_ids):
+                user_id = self.users_by_id.get(int(faiss_id))
+                if user_id is not None:
+                    results.append((user_id, float(score)))
+                    if len(results) >= top_k:
+                        break
+            all_results.append(results)
+        return all_results
+
+    def save(self, path: str) -> None:
+        """保存索引到 {path}.faiss 和 {path}.json"""
+        if self.index is not None:
+            faiss.write_index(self.index, f"{path}.faiss")
+
+        meta = {
+            'dimension': self.dimension,
+            'index_type': self.index_type,
+            'ids_by_user': self.ids_by_user,
+            'next_id': self._next_id,
+            'tombstones': sorted(self.tombstones),
+            'has_index': self.index is not None,
+            'flat_fallback': self.flat_fallback
+        }
+        with open(f"{path}.json", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, config: VectorMatchingConfig = None) -> 'FaissVectorIndex':
+        """从磁盘加载索引"""
+        with open(f"{path}.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        config = dataclasses.replace(config or VectorMatchingConfig(), index_type=meta['index_type'])
+
+        vector_index = cls(meta['dimension'], config)
+        vector_index.ids_by_user = {user_id: int(faiss_id) for user_id, faiss_id in meta['ids_by_user'].items()}
+        vector_index.users_by_id = {faiss_id: user_id for user_id, faiss_id in vector_index.ids_by_user.items()}
+        vector_index._next_id = meta['next_id']
+        vector_index.tombstones = set(meta['tombstones'])
+        vector_index.flat_fallback = meta.get('flat_fallback', False)
+        if meta['has_index']:
+            vector_index.index = faiss.read_index(f"{path}.faiss")
+            if vector_index.index_type == 'IndexHNSWFlat':
+                faiss.downcast_index(vector_index.index.index).hnsw.efSearch = config.hnsw_ef_search
+            elif vector_index.index_type == 'IndexIVFFlat' and not vector_index.flat_fallback:
+                ivf = faiss.downcast_index(vector_index.index)
+                ivf.nprobe = min(config.ivf_nprobe, ivf.nlist)
+
+        return vector_index
@@ -13,11 +13,11 @@
 """
 
 import json
+import time
 import numpy as np
-import jieba
-import re
 import pickle
 import os
+import joblib
 from typing import Dict, List, Tuple, Any, Optional
 from dataclasses import dataclass
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -27,11 +27,17 @@ from gensim import corpora, models
 from gensim.models import Doc2Vec
 from gensim.models.doc2vec import TaggedDocument
 import logging
+from configs.config import VectorMatchingConfig
+from .vector_index import FaissVectorIndex, faiss_available
+from .text_tokenizer import text_tokenizer
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 加载模型时numpy数组的内存映射模式，'r'使多个worker进程共享同一份物理内存页，设为空则读入堆内存
+MODEL_MMAP_MODE = os.getenv('MODEL_MMAP_MODE', 'r') or None
+
 @dataclass
 class UserVector:
     """用户向量表示"""
@@ -58,35 +64,15 @@ class ChineseTextProcessor:
     
     def clean_text(self, text: str) -> str:
         """清理文本"""
-        if not text:
-            return ""
-        
-        # 移除特殊字符，保留中文、英文、数字
-        text = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9\s]', ' ', text)
-        # 移除多余空格
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        return text_tokenizer.clean(text)
     
     def tokenize(self, text: str) -> List[str]:
         """分词并过滤停用词"""
-        text = self.clean_text(text)
-        if not text:
-            return []
-        
-        tokens = []
-        for word in jieba.cut(text):
-            word = word.strip()
-            if (len(word) >= 2 and 
-                word not in self.stopwords and 
-                not word.isdigit() and
-                not word.isspace()):
-                tokens.append(word)
-        
-        return tokens
+        return text_tokenizer.tokenize(text, self.stopwords)
     
     def preprocess_documents(self, texts: List[str]) -> List[List[str]]:
         """批量预处理文档"""
-        return [self.tokenize(text) for text in texts]
+        return text_tokenizer.tokenize_many(texts, self.stopwords)
 
 class TopicVectorizer:
     """主题向量化器 - 支持多种向量化方法"""
@@ -199,19 +185,17 @@ class TopicVectorizer:
             'is_trained': self.is_trained
         }
         
+        # sklearn模型用joblib保存，numpy数组以原始格式写入文件，加载时可内存映射
         if self.method == 'tfidf':
-            with open(f"{model_path}_tfidf.pkl", 'wb') as f:
-                pickle.dump(self.model, f)
+            joblib.dump(self.model, f"{model_path}_tfidf.pkl")
                 
         elif self.method == 'lda':
-            with open(f"{model_path}_vectorizer.pkl", 'wb') as f:
-                pickle.dump(self.vectorizer, f)
-            with open(f"{model_path}_lda.pkl", 'wb') as f:
-                pickle.dump(self.lda_model, f)
+            joblib.dump(self.vectorizer, f"{model_path}_vectorizer.pkl")
+            joblib.dump(self.lda_model, f"{model_path}_lda.pkl")
             model_data['n_topics'] = self.n_topics
             
         elif self.method == 'doc2vec':
-            self.model.save(f"{model_path}_doc2vec.model")
+            self.model.save(f"{model_path}_doc2vec.model", sep_limit=0)
             model_data['vector_size'] = self.vector_size
         
         # 保存元数据
@@ -221,7 +205,8 @@ class TopicVectorizer:
         logger.info(f"模型已保存到: {model_path}")
     
     def load_model(self, model_path: str) -> None:
-        """加载模型"""
+        """加载模型（joblib也能读取旧版本用pickle保存的文件）"""
+        start_time = time.perf_counter()
         # 加载元数据
         with open(f"{model_path}_metadata.json", 'r', encoding='utf-8') as f:
             model_data = json.load(f)
@@ -230,31 +215,170 @@ class TopicVectorizer:
         self.is_trained = model_data['is_trained']
         
         if self.method == 'tfidf':
-            with open(f"{model_path}_tfidf.pkl", 'rb') as f:
-                self.model = pickle.load(f)
+            self.model = joblib.load(f"{model_path}_tfidf.pkl", mmap_mode=MODEL_MMAP_MODE)
                 
         elif self.method == 'lda':
-            with open(f"{model_path}_vectorizer.pkl", 'rb') as f:
-                self.vectorizer = pickle.load(f)
-            with open(f"{model_path}_lda.pkl", 'rb') as f:
-                self.lda_model = pickle.load(f)
+            self.vectorizer = joblib.load(f"{model_path}_vectorizer.pkl", mmap_mode=MODEL_MMAP_MODE)
+            self.lda_model = joblib.load(f"{model_path}_lda.pkl", mmap_mode=MODEL_MMAP_MODE)
             self.n_topics = model_data['n_topics']
             
         elif self.method == 'doc2vec':
-            self.model = Doc2Vec.load(f"{model_path}_doc2vec.model")
+            self.model = Doc2Vec.load(f"{model_path}_doc2vec.model", mmap=MODEL_MMAP_MODE)
             self.vector_size = model_data['vector_size']
         
-        logger.info(f"模型已从 {model_path} 加载")
+        logger.info(f"模型已从 {model_path} 加载，耗时 {time.perf_counter() - start_time:.3f}s（mmap={MODEL_MMAP_MODE}）")
+
+class UserVectorStore:
+    """容量倍增的用户向量存储
+    
+    向量L2归一化后按行存放在连续的float32数组中，容量不足时翻倍，追加为均摊O(1)。
+    删除只标记墓碑，墓碑比例超过compact_ratio时压缩。
+    """
+    
+    def __init__(self, initial_capacity: int = 64, compact_ratio: float = 0.25):
+        self.initial_capacity = initial_capacity
+        self.compact_ratio = compact_ratio
+        
+        self._vectors: Optional[np.ndarray] = None  # (capacity, dim)
+        self._alive: Optional[np.ndarray] = None  # (capacity,) 行是否存活
+        self._type_masks: Dict[str, np.ndarray] = {}  # request_type -> (capacity,) 布尔掩码
+        
+        self.row_ids: List[Optional[str]] = []  # 行号 -> user_id，墓碑行为None
+        self.index: Dict[str, int] = {}  # user_id -> 行号
+        self.size = 0  # 已使用的行数（含墓碑）
+        self.tombstones = 0
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.index
+    
+    @property
+    def capacity(self) -> int:
+        return 0 if self._vectors is None else len(self._vectors)
+    
+    @property
+    def matrix(self) -> np.ndarray:
+        """已使用行的视图（含墓碑行，墓碑行不会出现在任何掩码中）"""
+        if self._vectors is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._vectors[:self.size]
+    
+    def mask(self, request_type: str = None) -> np.ndarray:
+        """返回某请求类型（None为全部存活行）的行掩码副本"""
+        source = self._alive if request_type is None else self._type_masks.get(request_type)
+        if source is None:
+            return np.zeros(self.size, dtype=bool)
+        return source[:self.size].copy()
+    
+    def request_types(self) -> List[str]:
+        """当前存在存活用户的请求类型"""
+        return [request_type for request_type, mask in self._type_masks.items() if mask[:self.size].any()]
+    
+    def _allocate(self, capacity: int, dimension: int) -> None:
+        """分配指定容量的数组并拷贝已有数据"""
+        vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        alive = np.zeros(capacity, dtype=bool)
+        if self._vectors is not None:
+            vectors[:self.size] = self._vectors[:self.size]
+            alive[:self.size] = self._alive[:self.size]
+        
+        for request_type, mask in self._type_masks.items():
+            new_mask = np.zeros(capacity, dtype=bool)
+            new_mask[:self.size] = mask[:self.size]
+            self._type_masks[request_type] = new_mask
+        
+        self._vectors = vectors
+        self._alive = alive
+    
+    def put(self, user_id: str, vector: np.ndarray, request_type: str) -> int:
+        """写入用户向量，已存在的用户原地更新，返回行号"""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        if self._vectors is None:
+            self._allocate(self.initial_capacity, len(vector))
+        elif len(vector) != self._vectors.shape[1]:
+            raise ValueError(f"向量维度不一致: {len(vector)} != {self._vectors.shape[1]}")
+        
+        if user_id in self.index:
+            row = self.index[user_id]
+            for mask in self._type_masks.values():
+                mask[row] = False
+        else:
+            if self.size == self.capacity:
+                self._allocate(self.capacity * 2, self._vectors.shape[1])
+            row = self.size
+            self.size += 1
+            self.row_ids.append(user_id)
+            self.index[user_id] = row
+            self._alive[row] = True
+        
+        # 预先归一化，余弦相似度即为内积
+        norm = np.linalg.norm(vector)
+        self._vectors[row] = vector / norm if norm > 0 else vector
+        
+        if request_type not in self._type_masks:
+            self._type_masks[request_type] = np.zeros(self.capacity, dtype=bool)
+        self._type_masks[request_type][row] = True
+        return row
+    
+    def delete(self, user_id: str) -> None:
+        """标记删除用户，墓碑过多时自动压缩"""
+        row = self.index.pop(user_id)
+        self.row_ids[row] = None
+        self._alive[row] = False
+        for mask in self._type_masks.values():
+            mask[row] = False
+        self.tombstones += 1
+        
+        if self.tombstones > self.compact_ratio * self.size:
+            self.compact()
+    
+    def compact(self) -> None:
+        """移除墓碑行，重新分配行号"""
+        if self.tombstones == 0:
+            return
+        
+        rows = np.flatnonzero(self._alive[:self.size])
+        capacity = max(self.initial_capacity, 2 * len(rows))
+        vectors = np.zeros((capacity, self._vectors.shape[1]), dtype=np.float32)
+        vectors[:len(rows)] = self._vectors[rows]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(rows)] = True
+        
+        type_masks = {}
+        for request_type, mask in self._type_masks.items():
+            new_mask = np.zeros(capacity, dtype=bool)
+            new_mask[:len(rows)] = mask[rows]
+            type_masks[request_type] = new_mask
+        
+        self._vectors = vectors
+        self._alive = alive
+        self._type_masks = type_masks
+        self.row_ids = [self.row_ids[row] for row in rows]
+        self.index = {user_id: row for row, user_id in enumerate(self.row_ids)}
+        self.size = len(rows)
+        self.tombstones = 0
 
 class VectorUserMatcher:
     """基于向量相似度的用户匹配器"""
     
-    def __init__(self, vectorizer: TopicVectorizer):
+    def __init__(self, vectorizer: TopicVectorizer, config: VectorMatchingConfig = None):
         self.vectorizer = vectorizer
+        self.config = config or VectorMatchingConfig()
         self.user_vectors: Dict[str, UserVector] = {}
         self.users = self.user_vectors  # 为了兼容性添加的别名
-        self.vectors_matrix: Optional[np.ndarray] = None
-        self.user_ids: List[str] = []
+        
+        # 归一化向量矩阵、user_id->行号索引和按请求类型的行掩码
+        self.store = UserVectorStore()
+        
+        # 按请求类型划分的Faiss索引，调用build_indices()后启用；为空时使用NumPy矩阵检索
+        self.indices: Dict[str, FaissVectorIndex] = {}
+    
+    @property
+    def user_ids(self) -> List[str]:
+        """所有用户ID"""
+        return list(self.user_vectors.keys())
     
     def add_users(self, users_data: List[Dict[str, Any]]) -> None:
         """添加用户并计算向量"""
@@ -272,81 +396,125 @@ class VectorUserMatcher:
                 vector=vectors[i]
             )
             self.user_vectors[user['user_id']] = user_vector
+            self.store.put(user_vector.user_id, user_vector.vector, user_vector.request_type)
         
-        # 更新向量矩阵
-        self._update_vectors_matrix()
+        self._update_indices([user['user_id'] for user in users_data])
         
         logger.info(f"已添加 {len(users_data)} 个用户")
     
     def _update_vectors_matrix(self) -> None:
-        """更新向量矩阵用于批量计算相似度"""
-        if not self.user_vectors:
-            return
+        """根据user_vectors全量重建向量存储（加载向量文件后使用）
         
-        self.user_ids = list(self.user_vectors.keys())
-        self.vectors_matrix = np.vstack([
-            self.user_vectors[user_id].vector 
-            for user_id in self.user_ids
-        ])
+        已构建的索引对应的是之前的向量集合，一并丢弃并按新向量重建。
+        """
+        had_indices = bool(self.indices)
+        self.indices = {}
+        self.store = UserVectorStore()
+        for user_id, user_vector in self.user_vectors.items():
+            self.store.put(user_id, user_vector.vector, user_vector.request_type)
+        if had_indices:
+            self.build_indices()
     
     def find_similar_users(self, target_user_id: str, 
                           request_type: str = None,
                           top_k: int = 10,
                           min_similarity: float = 0.1) -> List[Tuple[str, float]]:
-        """为目标用户找到相似的用户"""
+        """为目标用户找到相似的用户
         
+        默认只匹配与目标用户请求类型相同的用户，指定request_type时按该类型过滤。
+        """
         if target_user_id not in self.user_vectors:
             raise ValueError(f"用户 {target_user_id} 不存在")
         
-        target_vector = self.user_vectors[target_user_id]
-        target_request_type = target_vector.request_type
-        
-        # 过滤相同请求类型的用户
-        candidate_indices = []
-        candidate_ids = []
+        row = self.store.index[target_user_id]
+        matrix = self.store.matrix
+        request_type = request_type or self.user_vectors[target_user_id].request_type
         
-        for i, user_id in enumerate(self.user_ids):
-            if (user_id != target_user_id and 
-                self.user_vectors[user_id].request_type == target_request_type):
-                candidate_indices.append(i)
-                candidate_ids.append(user_id)
+        if request_type in self.indices:
+            hits = self.indices[request_type].search(matrix[row], top_k + 1)
+            return self._filter_index_hits(target_user_id, hits, top_k, min_similarity)
         
-        if not candidate_indices:
-            return []
+        mask = self.store.mask(request_type)
+        mask[row] = False
         
-        # 计算相似度
-        target_vec = target_vector.vector.reshape(1, -1)
-        candidate_vectors = self.vectors_matrix[candidate_indices]
+        similarities = matrix @ matrix[row]
+        return self._select_top_k(similarities, mask, top_k, min_similarity)
+    
+    def find_similar_users_many(self, target_user_ids: List[str],
+                                top_k: int = 10,
+                                min_similarity: float = 0.1,
+                                batch_size: int = 1024) -> Dict[str, List[Tuple[str, float]]]:
+        """批量为多个目标用户找到相似用户
         
-        similarities = cosine_similarity(target_vec, candidate_vectors).flatten()
+        每batch_size个目标用户做一次矩阵乘法，避免一次性生成过大的相似度矩阵。
+        """
+        missing = [user_id for user_id in target_user_ids if user_id not in self.user_vectors]
+        if missing:
+            raise ValueError(f"用户 {missing[0]} 不存在")
+        
+        matrix = self.store.matrix
+        results = {}
+        if self.indices:
+            # 按请求类型分组后批量查询对应的索引
+            groups: Dict[str, List[str]] = {}
+            for user_id in target_user_ids:
+                groups.setdefault(self.user_vectors[user_id].request_type, []).append(user_id)
+            
+            for request_type, group_ids in groups.items():
+                if request_type not in self.indices:
+                    results.update({user_id: [] for user_id in group_ids})
+                    continue
+                rows = [self.store.index[user_id] for user_id in group_ids]
+                hits = self.indices[request_type].search_many(matrix[rows], top_k + 1)
+                for user_id, user_hits in zip(group_ids, hits):
+                    results[user_id] = self._filter_index_hits(user_id, user_hits, top_k, min_similarity)
+            return results
+        
+        for start in range(0, len(target_user_ids), batch_size):
+            batch_ids = target_user_ids[start:start + batch_size]
+            rows = np.array([self.store.index[user_id] for user_id in batch_ids])
+            similarities = matrix[rows] @ matrix.T
+            
+            for i, user_id in enumerate(batch_ids):
+                mask = self.store.mask(self.user_vectors[user_id].request_type)
+                mask[rows[i]] = False
+                results[user_id] = self._select_top_k(similarities[i], mask, top_k, min_similarity)
         
-        # 筛选和排序
-        results = []
-        for i, sim in enumerate(similarities):
-            if sim >= min_similarity:
-                results.append((candidate_ids[i], float(sim)))
+        return results
+    
+    def _select_top_k(self, similarities: np.ndarray, mask: np.ndarray,
+                      top_k: int, min_similarity: float) -> List[Tuple[str, float]]:
+        """在掩码范围内用argpartition选出相似度最高的top_k个用户"""
+        mask &= similarities >= min_similarity
+        candidate_rows = np.flatnonzero(mask)
+        if candidate_rows.size == 0 or top_k <= 0:
+            return []
         
-        # 按相似度排序
-        results.sort(key=lambda x: x[1], reverse=True)
+        candidate_sims = similarities[candidate_rows]
+        if candidate_rows.size > top_k:
+            part = np.argpartition(-candidate_sims, top_k - 1)[:top_k]
+            candidate_rows, candidate_sims = candidate_rows[part], candidate_sims[part]
         
-        return results[:top_k]
+        order = np.argsort(-candidate_sims, kind='stable')
+        return [(self.store.row_ids[candidate_rows[i]], float(candidate_sims[i])) for i in order]
+    
+    def _filter_index_hits(self, target_user_id: str, hits: List[Tuple[str, float]],
+                           top_k: int, min_similarity: float) -> List[Tuple[str, float]]:
+        """过滤索引检索结果中的目标用户本身和低于阈值的结果"""
+        return [
+            (user_id, score) for user_id, score in hits
+            if user_id != target_user_id and score >= min_similarity
+        ][:top_k]
     
     def get_similarity_matrix(self, request_type: str = None) -> Tuple[np.ndarray, List[str]]:
         """获取用户间的相似度矩阵"""
-        # 筛选指定类型的用户
-        if request_type:
-            filtered_ids = [
-                user_id for user_id in self.user_ids 
-                if self.user_vectors[user_id].request_type == request_type
-            ]
-            filtered_indices = [self.user_ids.index(uid) for uid in filtered_ids]
-            filtered_vectors = self.vectors_matrix[filtered_indices]
-        else:
-            filtered_ids = self.user_ids
-            filtered_vectors = self.vectors_matrix
+        # 筛选指定类型的用户，行号直接来自存储的掩码
+        rows = np.flatnonzero(self.store.mask(request_type))
+        filtered_ids = [self.store.row_ids[row] for row in rows]
+        filtered_vectors = self.store.matrix[rows]
         
-        # 计算相似度矩阵
-        similarity_matrix = cosine_similarity(filtered_vectors)
+        # 计算相似度矩阵（向量已归一化，内积即余弦相似度）
+        similarity_matrix = filtered_vectors @ filtered_vectors.T
         
         return similarity_matrix, filtered_ids
     
@@ -366,13 +534,87 @@ class VectorUserMatcher:
         )
         
         self.user_vectors[user_id] = user_vector
-        
-        # 更新向量矩阵
-        self._update_vectors_matrix()
+        self.store.put(user_id, vector, request_type)
+        self._update_indices([user_id])
+    
+    def remove_user(self, user_id: str) -> None:
+        """删除用户"""
+        if user_id not in self.user_vectors:
+            raise ValueError(f"用户 {user_id} 不存在")
+        
+        del self.user_vectors[user_id]
+        self.store.delete(user_id)
+        for vector_index in self.indices.values():
+            vector_index.remove([user_id])
     
     def build_indices(self) -> None:
-        """构建索引，更新向量矩阵"""
-        self._update_vectors_matrix()
+        """构建索引，压缩向量存储
+        
+        faiss可用时按请求类型构建配置中指定类型的索引（IndexFlatIP/IndexIVFFlat/IndexHNSWFlat），
+        否则退回NumPy矩阵检索。
+        """
+        self.store.compact()
+        self.indices = {}
+        
+        if not faiss_available():
+            logger.warning("faiss不可用，使用NumPy矩阵检索")
+            return
+        if not len(self.store):
+            return
+        
+        matrix = self.store.matrix
+        for request_type in self.store.request_types():
+            rows = np.flatnonzero(self.store.mask(request_type))
+            vector_index = FaissVectorIndex(matrix.shape[1], self.config)
+            vector_index.build([self.store.row_ids[row] for row in rows], matrix[rows])
+            self.indices[request_type] = vector_index
+        
+        logger.info(f"已构建 {len(self.indices)} 个{self.config.index_type}索引")
+    
+    def _update_indices(self, user_ids: List[str]) -> None:
+        """将新增或更新的用户同步到已构建的索引"""
+        if not self.indices:
+            return
+        
+        matrix = self.store.matrix
+        for user_id in user_ids:
+            request_type = self.user_vectors[user_id].request_type
+            # 请求类型可能发生变化，先从其他类型的索引中删除
+            for other_type, vector_index in self.indices.items():
+                if other_type != request_type:
+                    vector_index.remove([user_id])
+            
+            if request_type not in self.indices:
+                self.indices[request_type] = FaissVectorIndex(matrix.shape[1], self.config)
+            row = self.store.index[user_id]
+            self.indices[request_type].add([user_id], matrix[row:row + 1])
+    
+    def save_indices(self, dirpath: str) -> None:
+        """保存所有索引到目录"""
+        os.makedirs(dirpath, exist_ok=True)
+        manifest = {}
+        for i, (request_type, vector_index) in enumerate(self.indices.items()):
+            name = f"index_{i}"
+            vector_index.save(os.path.join(dirpath, name))
+            manifest[request_type] = name
+        
+        with open(os.path.join(dirpath, "indices.json"), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+    
+    def load_indices(self, dirpath: str) -> None:
+        """从目录加载索引，需先加载对应的用户向量"""
+        if not faiss_available():
+            logger.warning("faiss不可用，跳过索引加载，使用NumPy矩阵检索")
+            self.indices = {}
+            return
+        
+        with open(os.path.join(dirpath, "indices.json"), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        
+        self.indices = {
+            request_type: FaissVectorIndex.load(os.path.join(dirpath, name), self.config)
+            for request_type, name in manifest.items()
+        }
     
     def save_vectors(self, filepath: str) -> None:
         """保存用户向量到文件"""
@@ -392,7 +634,6 @@ class VectorUserMatcher:
         
         self.user_vectors = data['user_vectors']
         self.users = self.user_vectors  # 更新别名
-        self.user_ids = data['user_ids']
         self._update_vectors_matrix()
     
     def _calculate_detailed_similarity(self, user_a_vector: UserVector, user_b_vector: UserVector):
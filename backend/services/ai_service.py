@@ -1,10 +1,11 @@
 # backend/services/ai_service.py
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict
-from openai import OpenAI
+from typing import List, Optional, Dict, AsyncIterator
 import os
+import json
 from dotenv import load_dotenv
 import logging
 import uuid
@@ -12,6 +13,8 @@ import uuid
 from backend.prompts.prompts import get_system_prompt, get_analysis_prompt, get_initial_prompts
 from backend.services.database_service import conversation_db
 from backend.services.auth_service import get_current_user
+from backend.services.llm_gateway import llm_gateway
+from backend.services.llm_cache import llm_response_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,26 +25,15 @@ load_dotenv()
 
 router = APIRouter()
 
-# Configure OpenAI client - 让API Key变为可选
+# API Key变为可选，异步客户端由 llm_gateway 统一管理
 openai_api_key = os.getenv("OPENAI_API_KEY")
-openai_base_url = os.getenv("OPENAI_BASE_URL")
 moonshot_api_key = os.getenv("MOONSHOT_API_KEY")
-moonshot_base_url = os.getenv("MOONSHOT_BASE_URL")
 
 # 检查API Key状态但不阻止应用启动
-OPENAI_AVAILABLE = bool(openai_api_key or moonshot_api_key)
+OPENAI_AVAILABLE = llm_gateway.available
 if not OPENAI_AVAILABLE:
     print("⚠️ OPENAI_API_KEY 或 MOONSHOT_API_KEY 未设置，AI聊天功能将不可用")
     print("💡 如需使用AI功能，请设置环境变量: OPENAI_API_KEY=your_key 或 MOONSHOT_API_KEY=your_key")
-    client = None
-else:
-    # 优先使用 Moonshot，如果没有则使用 OpenAI
-    if moonshot_api_key:
-        client = OpenAI(api_key=moonshot_api_key, base_url=moonshot_base_url)
-        logger.info("Moonshot client initialized successfully")
-    else:
-        client = OpenAI(api_key=openai_api_key, base_url=openai_base_url)
-        logger.info("OpenAI client initialized successfully")
 
 class ChatRequest(BaseModel):
     message: Optional[str]
@@ -64,13 +56,9 @@ class ConversationResponse(BaseModel):
     message: str
     data: Optional[Dict] = None
 
-@router.post("/chat")
-async def handle_chat(request: ChatRequest):
-    """
-    Handles AI chat requests by proxying them to OpenAI.
-    """
-    # 检查API Key是否可用
-    if not OPENAI_AVAILABLE:
+def ensure_llm_available() -> None:
+    """AI服务不可用时返回503"""
+    if not llm_gateway.available:
         raise HTTPException(
             status_code=503, 
             detail={
@@ -79,45 +67,75 @@ async def handle_chat(request: ChatRequest):
                 "solution": "请设置 OPENAI_API_KEY 或 MOONSHOT_API_KEY 环境变量后重启应用"
             }
         )
+
+def build_chat_messages(request: ChatRequest) -> List[Dict[str, str]]:
+    """根据请求构建发送给模型的消息列表"""
+    logger.info(f"Received chat request: themeMode={request.themeMode}, language={request.language}, isAnalysis={request.isAnalysis}")
+    logger.info(f"History length: {len(request.history)}")
+    
+    # 初始对话引导
+    initial_prompts = []
+    if len(request.history) == 0 and not request.isAnalysis:
+        logger.info("This is a new conversation. Adding initial prompts.")
+        initial_prompts = get_initial_prompts(request.themeMode, request.language)
+
+    if request.isAnalysis:
+        logger.info("Processing analysis request")
+        system_prompt = get_analysis_prompt(request.themeMode, request.language)
+        # For analysis, the user message is often empty, history is the main context
+        user_messages = request.history
+        messages = [{"role": "system", "content": system_prompt}] + user_messages
+    else:
+        logger.info("Processing regular chat request")
+        system_prompt = get_system_prompt(request.themeMode, request.language, len(request.history))
+        user_messages = request.history
+        messages = [{"role": "system", "content": system_prompt}] + initial_prompts + user_messages
+        if request.message:
+            messages.append({"role": "user", "content": request.message})
+    
+    logger.info(f"Prepared {len(messages)} messages for OpenAI")
+    logger.debug(f"System prompt: {system_prompt[:100]}...")
+    return messages
+
+def chat_options(request: ChatRequest) -> Dict:
+    """模型调用参数"""
+    return {
+        "max_tokens": 1500 if request.isAnalysis else 1000,
+        "temperature": 0.6,
+        "response_format": {"type": "json_object"} if request.isAnalysis else None,
+    }
+
+def analysis_cache_key(request: ChatRequest, messages: List[Dict[str, str]], options: Dict) -> Optional[str]:
+    """分析请求的缓存键，并记录系统提示词的发送量；普通对话不缓存，返回None"""
+    prompt_name = f"{'analysis' if request.isAnalysis else 'system'}:{request.themeMode}:{request.language}"
+    if not request.isAnalysis:
+        llm_response_cache.track_prompt(prompt_name, messages[0]['content'], cached=False)
+        return None
+    
+    cache_key = llm_response_cache.make_key(llm_gateway.model, messages, options)
+    llm_response_cache.track_prompt(prompt_name, messages[0]['content'], cached=cache_key in llm_response_cache)
+    return cache_key
+
+@router.post("/chat")
+async def handle_chat(request: ChatRequest):
+    """
+    Handles AI chat requests by proxying them to OpenAI.
+    相同对话的性格分析请求直接返回缓存结果。
+    """
+    # 检查API Key是否可用
+    ensure_llm_available()
     
     try:
-        logger.info(f"Received chat request: themeMode={request.themeMode}, language={request.language}, isAnalysis={request.isAnalysis}")
-        logger.info(f"History length: {len(request.history)}")
+        messages = build_chat_messages(request)
+        options = chat_options(request)
+        cache_key = analysis_cache_key(request, messages, options)
         
-        # 初始对话引导
-        initial_prompts = []
-        if len(request.history) == 0 and not request.isAnalysis:
-            logger.info("This is a new conversation. Adding initial prompts.")
-            initial_prompts = get_initial_prompts(request.themeMode, request.language)
-
-        if request.isAnalysis:
-            logger.info("Processing analysis request")
-            system_prompt = get_analysis_prompt(request.themeMode, request.language)
-            # For analysis, the user message is often empty, history is the main context
-            user_messages = request.history
-            messages = [{"role": "system", "content": system_prompt}] + user_messages
+        if cache_key:
+            response_content = await llm_response_cache.get_or_compute(
+                cache_key, lambda: llm_gateway.complete(messages, **options)
+            )
         else:
-            logger.info("Processing regular chat request")
-            system_prompt = get_system_prompt(request.themeMode, request.language, len(request.history))
-            user_messages = request.history
-            messages = [{"role": "system", "content": system_prompt}] + initial_prompts + user_messages
-            if request.message:
-                messages.append({"role": "user", "content": request.message})
-        
-        logger.info(f"Prepared {len(messages)} messages for OpenAI")
-        logger.debug(f"System prompt: {system_prompt[:100]}...")
-        
-        completion = client.chat.completions.create(
-            # model="gpt-4.1-mini",
-            model = "kimi-k2-0711-preview",
-            messages=messages,
-            max_tokens=1500 if request.isAnalysis else 1000,
-            # temperature=0.7,
-            temperature=0.6,
-            response_format={"type": "json_object"} if request.isAnalysis else None,
-        )
-
-        response_content = completion.choices[0].message.content
+            response_content = await llm_gateway.complete(messages, **options)
         logger.info("Successfully received response from OpenAI")
         return {"response": response_content}
 
@@ -125,6 +143,45 @@ async def handle_chat(request: ChatRequest):
         logger.error(f"Error in handle_chat: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+def sse_event(data: Dict, event: Optional[str] = None) -> str:
+    """格式化一条server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/chat/stream")
+async def handle_chat_stream(request: ChatRequest):
+    """
+    /chat 的流式版本：以server-sent events逐段转发模型输出。
+    每个增量为 data: {"delta": "..."}，结束时发送 event: done，出错时发送 event: error。
+    """
+    ensure_llm_available()
+    messages = build_chat_messages(request)
+    options = chat_options(request)
+    cache_key = analysis_cache_key(request, messages, options)
+    
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            cached = llm_response_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                yield sse_event({"delta": cached})
+            else:
+                parts = []
+                async for delta in llm_gateway.stream(messages, **options):
+                    parts.append(delta)
+                    yield sse_event({"delta": delta})
+                if cache_key:
+                    llm_response_cache.put(cache_key, ''.join(parts))
+            yield sse_event({}, event="done")
+        except Exception as e:
+            logger.error(f"Error in handle_chat_stream: {str(e)}", exc_info=True)
+            yield sse_event({"error": str(e)}, event="error")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/conversation/save", response_model=ConversationResponse)
 async def save_conversation(
     request: SaveConversationRequest,
@@ -247,13 +304,14 @@ async def ai_service_status():
         "available_models": {
             "openai": bool(openai_api_key),
             "moonshot": bool(moonshot_api_key)
-        }
+        },
+        "response_cache": llm_response_cache.stats()
     }
 
 """
 使用示例：
 
-1. 正常对话流程：
+1. 正常对话流程（POST /api/ai/chat/stream 为流式版本，返回server-sent events）：
    POST /api/ai/chat
    {
      "message": "你好",
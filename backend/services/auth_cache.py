@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+认证用户缓存
+缓存 get_current_user 解析出的用户信息，键为 (user_id, token签发时间iat)。
+用户档案、积分或激活状态变化时需调用 invalidate(user_id)。
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+class AuthUserCache:
+    """带TTL的LRU缓存"""
+
+    def __init__(self, ttl: float = 60.0, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: 'OrderedDict[Tuple[str, Any], Tuple[float, Dict]]' = OrderedDict()
+        self._keys_by_user: Dict[str, Set[Tuple[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, issued_at: Any) -> Optional[Dict]:
+        """命中且未过期时返回缓存的用户信息"""
+        key = (user_id, issued_at)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id: str, issued_at: Any, user: Dict) -> None:
+        """写入用户信息，超出容量时淘汰最久未使用的条目"""
+        key = (user_id, issued_at)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, user_id: str) -> None:
+        """删除某个用户的全部缓存条目"""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _discard(self, key: Tuple[str, Any]) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+# 全局实例
+auth_user_cache = AuthUserCache(
+    ttl=float(os.getenv('AUTH_CACHE_TTL', '60')),
+    max_size=int(os.getenv('AUTH_CACHE_SIZE', '10000'))
+)
@@ -19,7 +19,9 @@ import uuid
 # 添加项目根目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
-from backend.services.database_service import get_supabase
+from backend.services.database_service import get_supabase, run_query
+from backend.services.auth_cache import auth_user_cache
+from backend.services.search_index import user_search_index
 
 router = APIRouter()
 
@@ -73,9 +75,6 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
         raise HTTPException(status_code=401, detail="未提供认证token")
     
     try:
-        # 获取数据库服务实例
-        supabase = get_supabase()
-        
         # 移除 'Bearer ' 前缀
         if authorization.startswith('Bearer '):
             token = authorization[7:]
@@ -90,8 +89,15 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
         if not user_id:
             raise HTTPException(status_code=401, detail="无效的认证token")
         
+        # 命中缓存时无需查询数据库
+        issued_at = decoded_token.get('iat')
+        cached_user = auth_user_cache.get(user_id, issued_at)
+        if cached_user is not None:
+            return cached_user
+        
         # 获取用户档案信息（只读取，不更新last_login_at）
-        user_profile = supabase.table('user_profile').select('*').eq('id', user_id).execute()
+        supabase = get_supabase()
+        user_profile = await run_query(supabase.table('user_profile').select('*').eq('id', user_id))
         
         if not user_profile.data or len(user_profile.data) == 0:
             raise HTTPException(status_code=401, detail="用户不存在")
@@ -105,11 +111,13 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
         # 移除了更新last_login_at的操作，提高验证速度
         # 只在实际登录时更新last_login_at，而不是每次token验证时都更新
         
-        return {
+        current_user = {
             'user_id': user_data['id'],
             'email': user_data['email'],
             'profile': user_data
         }
+        auth_user_cache.put(user_id, issued_at, current_user)
+        return current_user
         
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token已过期")
@@ -154,6 +162,7 @@ async def register(request: RegisterRequest):
             raise HTTPException(status_code=500, detail="用户创建失败")
         
         created_user = user_profile.data[0]
+        user_search_index.update_profile(created_user)
         
         # 生成JWT token
         access_token = create_access_token(created_user)
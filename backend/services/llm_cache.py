@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LLM响应缓存
+按 (模型, 系统提示词哈希, 消息哈希, 温度及其他参数) 做内容寻址，内存LRU + 可选磁盘层。
+相同请求并发到达时只调用一次模型。同时统计静态提示词的字节数以及重复发送/节省的字节数。
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import tempfile
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class LLMResponseCache:
+    """内容寻址的LLM响应缓存"""
+
+    def __init__(self, max_entries: int = 512, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        # 提示词名 -> {'bytes': 最近一次的字节数, 'sent'/'saved': 实际发送/命中缓存的次数, 'bytes_sent'/'bytes_saved'}
+        self.prompt_stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], options: Dict[str, Any] = None) -> str:
+        """计算缓存键：系统提示词和对话消息分别哈希后与模型、参数组合"""
+        options = dict(options or {})
+        system_text = '\n'.join(m['content'] for m in messages if m.get('role') == 'system')
+        dialog = [m for m in messages if m.get('role') != 'system']
+        parts = [
+            model,
+            _sha256(system_text),
+            _sha256(json.dumps(dialog, ensure_ascii=False, sort_keys=True)),
+            repr(options.pop('temperature', None)),
+            json.dumps(options, ensure_ascii=False, sort_keys=True, default=str)
+        ]
+        return _sha256('|'.join(parts))
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries or bool(self.cache_dir and os.path.exists(self._disk_path(key)))
+
+    def get(self, key: str) -> Optional[str]:
+        """依次查找内存和磁盘"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        if self.cache_dir:
+            try:
+                with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                    response = json.load(f)['response']
+                self._remember(key, response)
+                self.hits += 1
+                return response
+            except (OSError, ValueError, KeyError):
+                pass
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, response: str) -> None:
+        self._remember(key, response)
+        if self.cache_dir:
+            path = self._disk_path(key)
+            tmp_path = None
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # 每次写入使用独立的临时文件，多个worker同时写同一键时不会互相覆盖
+                with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(path),
+                                                 suffix='.tmp', delete=False) as f:
+                    tmp_path = f.name
+                    json.dump({'response': response}, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"写入LLM磁盘缓存失败: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def _remember(self, key: str, response: str) -> None:
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """命中缓存直接返回；否则调用compute，同一键的并发请求共享一次调用"""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        if key in self._in_flight:
+            return await asyncio.shield(self._in_flight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            response = await compute()
+            self.put(key, response)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def track_prompt(self, name: str, prompt: str, cached: bool) -> None:
+        """记录一次静态提示词的使用，cached为True表示命中缓存未实际发送"""
+        size = len(prompt.encode('utf-8'))
+        stats = self.prompt_stats.setdefault(name, {'bytes': size, 'sent': 0, 'saved': 0, 'bytes_sent': 0, 'bytes_saved': 0})
+        stats['bytes'] = size
+        if cached:
+            stats['saved'] += 1
+            stats['bytes_saved'] += size
+        else:
+            stats['sent'] += 1
+            stats['bytes_sent'] += size
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_tier': bool(self.cache_dir),
+            'prompt_bytes_sent': sum(s['bytes_sent'] for s in self.prompt_stats.values()),
+            'prompt_bytes_saved': sum(s['bytes_saved'] for s in self.prompt_stats.values()),
+            'prompts': self.prompt_stats
+        }
+
+# 全局实例
+llm_response_cache = LLMResponseCache(
+    max_entries=int(os.getenv('LLM_CACHE_SIZE', '512')),
+    cache_dir=os.getenv('LLM_CACHE_DIR') or None
+)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+异步LLM网关
+基于 AsyncOpenAI 的OpenAI兼容接口（Moonshot/OpenAI），支持一次性补全和逐token流式输出。
+LLM_BASE_URL 可指向本地桩服务，便于离线测试和压测。
+"""
+
+import os
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "kimi-k2-0711-preview"
+
+class LLMGateway:
+    """OpenAI兼容的异步聊天补全客户端"""
+
+    def __init__(self, client: Optional[AsyncOpenAI] = None, model: str = None):
+        self.model = model or os.getenv("LLM_MODEL", DEFAULT_MODEL)
+        self.client = client if client is not None else self._create_client()
+
+    @staticmethod
+    def _create_client() -> Optional[AsyncOpenAI]:
+        """根据环境变量创建客户端，优先使用 Moonshot"""
+        moonshot_api_key = os.getenv("MOONSHOT_API_KEY")
+        openai_api_key = os.getenv("OPENAI_API_KEY")
+        api_key = moonshot_api_key or openai_api_key
+        if not api_key:
+            return None
+
+        base_url = os.getenv("LLM_BASE_URL") or (
+            os.getenv("MOONSHOT_BASE_URL") if moonshot_api_key else os.getenv("OPENAI_BASE_URL")
+        )
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "2"))
+        )
+        logger.info(f"{'Moonshot' if moonshot_api_key else 'OpenAI'} async client initialized successfully")
+        return client
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+
+    async def complete(self, messages: List[Dict[str, str]], **options) -> str:
+        """请求完整回复"""
+        completion = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            **options
+        )
+        return completion.choices[0].message.content
+
+    async def stream(self, messages: List[Dict[str, str]], **options) -> AsyncIterator[str]:
+        """流式请求回复，逐段产出增量文本"""
+        chunks = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            **options
+        )
+        async for chunk in chunks:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+
+# 全局实例
+llm_gateway = LLMGateway()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地内存数据库
+模拟 Supabase 客户端中本项目用到的查询接口（select/insert/update/delete、
+eq/neq/gt/in_/order/limit/single），用于离线开发和压测。
+
+设置环境变量 DATABASE_BACKEND=memory 后 get_supabase() 返回本客户端。
+"""
+
+import copy
+import uuid
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+@dataclass
+class LocalResponse:
+    """与 Supabase APIResponse 一致的响应结构"""
+    data: Any
+    count: Optional[int] = None
+
+class LocalQueryError(Exception):
+    """查询结果不符合预期（例如single()没有命中唯一一行）"""
+
+class LocalQuery:
+    """链式查询构建器，execute()时在表数据上执行"""
+
+    def __init__(self, client: 'LocalSupabaseClient', table: str):
+        self.client = client
+        self.table = table
+        self.action = 'select'
+        self.columns: Optional[List[str]] = None
+        self.payload: Any = None
+        self.filters: List[Callable[[Dict], bool]] = []
+        self.order_by: List[tuple] = []
+        self.limit_count: Optional[int] = None
+        self.want_single = False
+        self.want_count = False
+
+    def select(self, columns: str = '*', count: str = None) -> 'LocalQuery':
+        self.action = 'select'
+        if columns.strip() != '*':
+            self.columns = [column.strip() for column in columns.split(',')]
+        self.want_count = count is not None
+        return self
+
+    def insert(self, data: Any) -> 'LocalQuery':
+        self.action = 'insert'
+        self.payload = data
+        return self
+
+    def update(self, data: Dict) -> 'LocalQuery':
+        self.action = 'update'
+        self.payload = data
+        return self
+
+    def delete(self) -> 'LocalQuery':
+        self.action = 'delete'
+        return self
+
+    def eq(self, column: str, value: Any) -> 'LocalQuery':
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column: str, value: Any) -> 'LocalQuery':
+        self.filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def gt(self, column: str, value: Any) -> 'LocalQuery':
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+
+    def in_(self, column: str, values: List[Any]) -> 'LocalQuery':
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column: str, desc: bool = False) -> 'LocalQuery':
+        self.order_by.append((column, desc))
+        return self
+
+    def limit(self, count: int) -> 'LocalQuery':
+        self.limit_count = count
+        return self
+
+    def single(self) -> 'LocalQuery':
+        self.want_single = True
+        return self
+
+    def _matches(self, row: Dict) -> bool:
+        return all(condition(row) for condition in self.filters)
+
+    def _project(self, row: Dict) -> Dict:
+        if self.columns is None:
+            return copy.deepcopy(row)
+        return {column: copy.deepcopy(row.get(column)) for column in self.columns}
+
+    def execute(self) -> LocalResponse:
+        with self.client.lock:
+            rows = self.client.tables.setdefault(self.table, [])
+
+            if self.action == 'insert':
+                entries = self.payload if isinstance(self.payload, list) else [self.payload]
+                inserted = []
+                for entry in entries:
+                    row = copy.deepcopy(entry)
+                    row.setdefault('id', str(uuid.uuid4()))
+                    rows.append(row)
+                    inserted.append(copy.deepcopy(row))
+                return LocalResponse(data=inserted)
+
+            if self.action == 'update':
+                updated = []
+                for row in rows:
+                    if self._matches(row):
+                        row.update(copy.deepcopy(self.payload))
+                        updated.append(copy.deepcopy(row))
+                return LocalResponse(data=updated)
+
+            if self.action == 'delete':
+                deleted = [row for row in rows if self._matches(row)]
+                rows[:] = [row for row in rows if not self._matches(row)]
+                return LocalResponse(data=deleted)
+
+            matched = [row for row in rows if self._matches(row)]
+            # 多列排序：从最后一个排序键开始做稳定排序
+            for column, desc in reversed(self.order_by):
+                matched.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            count = len(matched) if self.want_count else None
+            if self.limit_count is not None:
+                matched = matched[:self.limit_count]
+
+            data = [self._project(row) for row in matched]
+            if self.want_single:
+                if len(data) != 1:
+                    raise LocalQueryError(f"single()期望1行，实际 {len(data)} 行")
+                return LocalResponse(data=data[0], count=count)
+            return LocalResponse(data=data, count=count)
+
+class LocalSupabaseClient:
+    """线程安全的内存表集合，接口与 supabase.Client.table() 一致"""
+
+    def __init__(self, tables: Dict[str, List[Dict]] = None):
+        self.tables: Dict[str, List[Dict]] = tables or {}
+        self.lock = threading.Lock()
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self, name)
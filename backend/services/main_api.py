@@ -11,6 +11,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 import os
+import time
 import sys
 from contextlib import asynccontextmanager
 import datetime
@@ -27,11 +28,17 @@ from backend.services.metadata_service import router as metadata_router
 from backend.services.ai_service import router as ai_router
 from backend.services.unlock_api import router as unlock_router
 from backend.services.database_service import init_database, close_database
+from backend.services.supabase_pool import supabase_registry
+from backend.models.text_tokenizer import text_tokenizer
+from backend.models.topic_vector_store import user_topic_store
+from backend.models.tag_matching import tag_matcher_registry
+from backend.services.search_index import user_search_index
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理 - 简化版本"""
     # 启动时验证
+    start_time = time.perf_counter()
     print("🚀 启动社交匹配系统API服务器")
     print("=" * 50)
     
@@ -44,9 +51,26 @@ async def lifespan(app: FastAPI):
         print(f"⚠️ 数据库连接验证失败: {e}")
         # 不中断启动，让服务继续运行
     
+    # 预先加载jieba词典，并构建（或从磁盘载入）各请求类型的标签匹配器
+    text_tokenizer.initialize()
+    try:
+        tag_matcher_registry.warm_up()
+        print("✅ 标签匹配器已就绪")
+    except Exception as e:
+        print(f"⚠️ 标签匹配器预热失败: {e}")
+    
+    # 构建用户搜索索引，失败时在首次搜索时重试
+    try:
+        await user_search_index.build()
+    except Exception as e:
+        print(f"⚠️ 用户搜索索引构建失败: {e}")
+    print(f"⏱️ 启动完成，耗时 {time.perf_counter() - start_time:.3f}s")
+    
     yield
     
-    # 关闭时清理（实际上Supabase客户端不需要显式清理）
+    # 关闭时写出尚未保存的用户主题向量，并释放数据库查询线程池
+    user_topic_store.save(force=True)
+    await close_database()
     print("👋 API服务器已关闭")
 
 # 创建FastAPI应用
@@ -64,6 +88,7 @@ async def health_check():
     return {
         "status": "healthy",
         "database": "skipped",  # 暂时跳过数据库检查
+        "database_pool": supabase_registry.stats(),
         "timestamp": datetime.datetime.utcnow().isoformat()
     }
 
@@ -8,17 +8,25 @@
 
 from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Callable
+import asyncio
 import json
+from concurrent.futures import ThreadPoolExecutor
 import tempfile
 import os
 import sys
+import numpy as np
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
-from backend.services.database_service import user_profile_db, user_metadata_db, user_tags_db
+from backend.services.database_service import user_profile_db, user_metadata_db, user_tags_db, run_blocking
+from backend.services.pair_score_cache import pair_score_cache, user_data_version
 from backend.services.auth_service import get_current_user
+from backend.models.topic_vector_store import user_topic_store
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
@@ -45,6 +53,12 @@ class MatchResponse(BaseModel):
     message: str
     data: Optional[Dict] = None
 
+# 批量匹配的并发上限和单个目标的超时时间（秒）
+BATCH_MATCH_CONCURRENCY = int(os.getenv('BATCH_MATCH_CONCURRENCY', '8'))
+BATCH_MATCH_ITEM_TIMEOUT = float(os.getenv('BATCH_MATCH_ITEM_TIMEOUT', '5'))
+# 批量分析专用线程池，所有批量请求共享，同时运行的分析不超过并发上限
+_batch_match_executor = ThreadPoolExecutor(max_workers=BATCH_MATCH_CONCURRENCY, thread_name_prefix='batch-match')
+
 # 全局分析器实例（延迟加载）
 _compatibility_analyzer = None
 _topic_model = None
@@ -76,25 +90,14 @@ def get_topic_model():
                 print("✅ 使用预训练的LDA模型")
                 return _topic_model
             
-            # 如果全局模型不可用，尝试手动加载
-            import os
-            production_model_path = "data/models/production_model"
-            if (os.path.exists(f"{production_model_path}_lda") and 
-                os.path.exists(f"{production_model_path}_dict")):
-                global_topic_model.load_model(production_model_path)
+            # 如果全局模型不可用，按 生产模型 -> 备用模型 的顺序加载文件包
+            loaded_path = global_topic_model.load_first_available()
+            if loaded_path:
                 _topic_model = global_topic_model
-                print("✅ 手动加载生产LDA模型成功")
+                print(f"✅ 加载LDA模型成功: {loaded_path}")
             else:
-                # 尝试加载备用模型
-                backup_model_path = "data/models/lda_model"
-                if (os.path.exists(f"{backup_model_path}_lda") and 
-                    os.path.exists(f"{backup_model_path}_dict")):
-                    global_topic_model.load_model(backup_model_path)
-                    _topic_model = global_topic_model
-                    print("✅ 加载备用LDA模型成功")
-                else:
-                    print("⚠️ 未找到预训练模型，LDA功能不可用")
-                    _topic_model = None
+                print("⚠️ 未找到预训练模型，LDA功能不可用")
+                _topic_model = None
         except Exception as e:
             print(f"❌ 主题模型加载失败: {e}")
             _topic_model = None
@@ -237,59 +240,70 @@ async def match_users_lda(request: SearchMatchRequest, current_user: Dict = Depe
         metadata_batch = await user_metadata_db.get_by_user_ids(candidate_ids)
         tags_batch = await user_tags_db.get_by_user_ids(candidate_ids)
         
-        for candidate in candidates[:max_process_count]:  # 限制处理数量，提高响应速度
+        # 查询文本只推断一次
+        query_vector = None
+        if request.description.strip():
+            query_result = topic_model.extract_topics_and_tags(request.description, request.match_type)
+            if query_result.text_vector:
+                query_vector = np.asarray(query_result.text_vector, dtype=np.float32)
+        
+        # 候选用户的主题向量从存储中读取，只有元数据/标签变化时才重新推断（批量推断）
+        user_texts = {}
+        failed_count = 0
+        for candidate in candidates[:max_process_count]:
+            user_id = candidate['id']
+            processed_count += 1
             try:
-                user_id = candidate['id']
-                processed_count += 1
-                
-                # 从批量查询结果中获取数据
-                metadata_list = metadata_batch.get(user_id, [])
-                user_tags = tags_batch.get(user_id, [])
-                
-                # 构建候选用户的描述文本
-                user_text = build_user_description_text_from_metadata(metadata_list, user_tags)
-                
-                # 如果有查询文本，将其与用户描述结合
-                if request.description.strip():
-                    combined_text = f"{request.description} {user_text}"
-                else:
-                    combined_text = user_text
-                
-                # 使用LDA模型进行分析
-                lda_result = topic_model.extract_topics_and_tags(combined_text, request.match_type)
-                
-                # 计算匹配度分数
-                match_score = calculate_lda_match_score(
-                    request.description, request.tags, request.match_type,
-                    metadata_list, user_tags, lda_result
+                user_texts[user_id] = build_user_description_text_from_metadata(
+                    metadata_batch.get(user_id, []), tags_batch.get(user_id, [])
                 )
-                
-                if match_score > 0.15:  # 合理的匹配阈值
-                    user_info = {
-                        'user_id': user_id,
-                        'display_name': candidate['display_name'],
-                        'email': candidate['email'],
-                        'avatar_url': candidate.get('avatar_url'),
-                        'match_score': float(match_score),
-                        'user_tags': [tag['tag_name'] for tag in user_tags],
-                        'topics': [(int(tid), float(weight)) for tid, weight in lda_result.topics],
-                        'extracted_tags': {
-                            tag: float(conf) for tag, conf in sorted(
-                                lda_result.extracted_tags.items(), 
-                                key=lambda x: x[1], 
-                                reverse=True
-                            )[:5]
-                        }
-                    }
-                    matched_users.append(user_info)
-                    
-                    # 早期返回：如果已找到足够多的匹配用户，提前结束
-                    if len(matched_users) >= request.limit * 2:
-                        break
-                        
             except Exception as e:
-                print(f"处理用户 {candidate.get('id', 'unknown')} 时出错: {e}")
-                continue
+                failed_count += 1
+                logger.debug("处理用户 %s 时出错: %s", user_id, e)
+        if failed_count:
+            logger.warning("LDA匹配: %d 个候选用户处理失败", failed_count)
+        user_topic_store.refresh_many(user_texts, request.match_type, topic_model)
+        scored_ids = list(user_texts)
+        user_topic_store.save()  # 按间隔合并写盘
+        
+        topic_scores = user_topic_store.score(query_vector, scored_ids)
+        candidates_by_id = {candidate['id']: candidate for candidate in candidates}
+        
+        for user_id, topic_score in zip(scored_ids, topic_scores):
+            candidate = candidates_by_id[user_id]
+            metadata_list = metadata_batch.get(user_id, [])
+            user_tags = tags_batch.get(user_id, [])
+            extracted_tags = user_topic_store.users[user_id]['tags'][request.match_type]
+            
+            # 计算匹配度分数
+            match_score = calculate_lda_match_score(
+                request.description, request.tags, request.match_type,
+                metadata_list, user_tags, float(topic_score), extracted_tags
+            )
+            
+            if match_score > 0.15:  # 合理的匹配阈值
+                topics = user_topic_store.topics_of(user_id)
+                user_info = {
+                    'user_id': user_id,
+                    'display_name': candidate['display_name'],
+                    'email': candidate['email'],
+                    'avatar_url': candidate.get('avatar_url'),
+                    'match_score': float(match_score),
+                    'user_tags': [tag['tag_name'] for tag in user_tags],
+                    'topics': topics,
+                    'topic_keywords': {
+                        tid: [word for word, _ in topic_model.get_topic_keywords(tid, topn=5)]
+                        for tid, _ in topics
+                    },
+                    'extracted_tags': {
+                        tag: float(conf) for tag, conf in sorted(
+                            extracted_tags.items(), 
+                            key=lambda x: x[1], 
+                            reverse=True
+                        )[:5]
+                    }
+                }
+                matched_users.append(user_info)
         
         # 按匹配度排序
         matched_users.sort(key=lambda x: x['match_score'], reverse=True)
@@ -383,7 +397,7 @@ async def search_users(request: SearchMatchRequest, current_user: Dict = Depends
                         break
                         
             except Exception as e:
-                print(f"处理用户 {user.get('id', 'unknown')} 时出错: {e}")
+                logger.debug("处理用户 %s 时出错: %s", user.get('id', 'unknown'), e)
                 continue
         
         # 按匹配度排序
@@ -421,14 +435,18 @@ async def analyze_compatibility(request: CompatibilityRequest, current_user: Dic
     """分析两个用户的兼容性"""
     try:
         # 获取两个用户的完整信息
-        current_user_data = await get_user_complete_data(current_user['user_id'])
-        target_user_data = await get_user_complete_data(request.target_user_id)
+        users_data = await get_users_complete_data([current_user['user_id'], request.target_user_id])
+        current_user_data = users_data.get(current_user['user_id'])
+        target_user_data = users_data.get(request.target_user_id)
         
         if not current_user_data or not target_user_data:
             raise HTTPException(status_code=400, detail="用户数据不完整")
         
         # 进行兼容性分析
-        compatibility_result = perform_compatibility_analysis(current_user_data, target_user_data)
+        compatibility_result = await cached_pair_result_async(
+            'simple', current_user_data, target_user_data,
+            lambda: perform_compatibility_analysis(current_user_data, target_user_data)
+        )
         
         return MatchResponse(
             success=True,
@@ -450,60 +468,25 @@ async def detailed_compatibility_analysis(request: CompatibilityRequest, current
         if not analyzer:
             raise HTTPException(status_code=500, detail="兼容性分析器不可用")
         
-        # 创建临时用户档案文件用于分析
-        current_profile_data = await create_profile_from_metadata(current_user['user_id'])
-        target_profile_data = await create_profile_from_metadata(request.target_user_id)
+        # 获取两个用户的完整信息
+        users_data = await get_users_complete_data([current_user['user_id'], request.target_user_id])
+        current_user_data = users_data.get(current_user['user_id'])
+        target_user_data = users_data.get(request.target_user_id)
         
-        if not current_profile_data or not target_profile_data:
+        if not current_user_data or not target_user_data:
             raise HTTPException(status_code=400, detail="无法构建用户档案数据")
         
-        # 创建临时文件
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f1:
-            json.dump(current_profile_data, f1, ensure_ascii=False, indent=2)
-            temp_file_a = f1.name
+        data = await cached_pair_result_async(
+            'detailed', current_user_data, target_user_data,
+            lambda: run_detailed_analysis(analyzer, build_profile_data(current_user_data), build_profile_data(target_user_data))
+        )
         
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f2:
-            json.dump(target_profile_data, f2, ensure_ascii=False, indent=2)
-            temp_file_b = f2.name
+        return MatchResponse(
+            success=True,
+            message="详细兼容性分析完成",
+            data=data
+        )
         
-        try:
-            # 使用增强兼容性分析器
-            if not analyzer.is_model_trained:
-                # 如果模型未训练，尝试加载已有模型
-                try:
-                    analyzer.load_models('data/models')
-                except:
-                    # 如果无法加载，进行快速训练
-                    analyzer.train_models([temp_file_a, temp_file_b])
-            
-            # 进行详细兼容性分析
-            detailed_result = analyzer.enhanced_compatibility_analysis(temp_file_a, temp_file_b)
-            
-            # 生成简洁结果
-            simple_result = analyzer.generate_simple_result(detailed_result)
-            
-            return MatchResponse(
-                success=True,
-                message="详细兼容性分析完成",
-                data={
-                    "simple_result": json.loads(simple_result.to_json()),
-                    "detailed_result": {
-                        "overall_score": detailed_result.vector_similarity_score * 10,
-                        "profile_similarity": detailed_result.profile_similarity * 10,
-                        "request_similarity": detailed_result.request_similarity * 10,
-                        "mutual_tags": detailed_result.mutual_tags,
-                        "complementary_tags": detailed_result.complementary_tags,
-                        "explanation": detailed_result.vector_explanation,
-                        "recommendation": detailed_result.overall_recommendation
-                    }
-                }
-            )
-            
-        finally:
-            # 清理临时文件
-            os.unlink(temp_file_a)
-            os.unlink(temp_file_b)
-            
     except HTTPException:
         raise
     except Exception as e:
@@ -512,48 +495,70 @@ async def detailed_compatibility_analysis(request: CompatibilityRequest, current
 
 @router.post("/batch", response_model=MatchResponse)
 async def batch_match_analysis(request: BatchMatchRequest, current_user: Dict = Depends(get_current_user)):
-    """批量匹配分析"""
+    """批量匹配分析
+    
+    一次性批量获取当前用户和所有目标用户的数据，再以有限并发计算各目标的分数。
+    单个目标超时或出错时记录错误，其余结果照常返回。
+    """
     try:
-        results = []
+        user_id = current_user['user_id']
+        users_data = await get_users_complete_data([user_id] + request.target_user_ids)
+        current_user_data = users_data.get(user_id)
+        
+        if request.analysis_type == 'detailed':
+            current_profile_data = build_profile_data(current_user_data) if current_user_data else None
         
-        for target_user_id in request.target_user_ids:
+        def score_target(target_user_id: str) -> float:
+            target_user_data = users_data.get(target_user_id)
+            if not current_user_data or not target_user_data:
+                return 0.0
+            
+            if request.analysis_type == 'detailed':
+                # 详细分析
+                return cached_pair_result(
+                    'enhanced', current_user_data, target_user_data,
+                    lambda: calculate_enhanced_compatibility(current_profile_data, build_profile_data(target_user_data))
+                )
+            
+            # 简单分析
+            compatibility_result = cached_pair_result(
+                'simple', current_user_data, target_user_data,
+                lambda: perform_compatibility_analysis(current_user_data, target_user_data)
+            )
+            return compatibility_result['overall_score'] / 10
+        
+        loop = asyncio.get_running_loop()
+        
+        async def analyze_target(target_user_id: str) -> Dict:
+            result = {
+                'target_user_id': target_user_id,
+                'compatibility_score': 0.0,
+                'analysis_type': request.analysis_type
+            }
+            started = asyncio.Event()
+            
+            def run() -> float:
+                loop.call_soon_threadsafe(started.set)
+                return score_target(target_user_id)
+            
+            # 线程池由所有请求共享；超时从分析真正开始时计算，排队等待的时间不计入
+            future = loop.run_in_executor(_batch_match_executor, run)
             try:
-                if request.analysis_type == 'detailed':
-                    # 详细分析
-                    current_profile_data = await create_profile_from_metadata(current_user['user_id'])
-                    target_profile_data = await create_profile_from_metadata(target_user_id)
-                    
-                    if current_profile_data and target_profile_data:
-                        compatibility_score = calculate_enhanced_compatibility(
-                            current_profile_data, target_profile_data
-                        )
-                    else:
-                        compatibility_score = 0.0
-                else:
-                    # 简单分析
-                    current_user_data = await get_user_complete_data(current_user['user_id'])
-                    target_user_data = await get_user_complete_data(target_user_id)
-                    
-                    if current_user_data and target_user_data:
-                        compatibility_result = perform_compatibility_analysis(current_user_data, target_user_data)
-                        compatibility_score = compatibility_result['overall_score'] / 10
-                    else:
-                        compatibility_score = 0.0
-                
-                results.append({
-                    'target_user_id': target_user_id,
-                    'compatibility_score': compatibility_score,
-                    'analysis_type': request.analysis_type
-                })
-                
+                await started.wait()
+                result['compatibility_score'] = await asyncio.wait_for(future, timeout=BATCH_MATCH_ITEM_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("批量匹配: 分析用户 %s 超时", target_user_id)
+                result['error'] = 'timeout'
             except Exception as e:
-                print(f"分析用户 {target_user_id} 失败: {e}")
-                results.append({
-                    'target_user_id': target_user_id,
-                    'compatibility_score': 0.0,
-                    'error': str(e),
-                    'analysis_type': request.analysis_type
-                })
+                logger.warning("批量匹配: 分析用户 %s 失败: %s", target_user_id, e)
+                result['error'] = str(e)
+            finally:
+                # 请求被取消时撤下尚未开始的任务
+                future.cancel()
+            return result
+        
+        results = await asyncio.gather(*[analyze_target(target_user_id) for target_user_id in request.target_user_ids])
+        failed = sum(1 for result in results if 'error' in result)
         
         # 按兼容性分数排序
         results.sort(key=lambda x: x['compatibility_score'], reverse=True)
@@ -564,6 +569,8 @@ async def batch_match_analysis(request: BatchMatchRequest, current_user: Dict =
             data={
                 "results": results,
                 "total_analyzed": len(results),
+                "failed": failed,
+                "partial": failed > 0,
                 "analysis_type": request.analysis_type
             }
         )
@@ -643,19 +650,22 @@ def build_user_description_text_from_metadata(metadata_list: List[Dict], user_ta
     return ' '.join(text_parts)
 
 def calculate_lda_match_score(description: str, user_tags: List[str], match_type: str,
-                             target_metadata: List[Dict], target_tags: List[Dict], lda_result) -> float:
-    """基于LDA结果计算匹配度分数"""
+                             target_metadata: List[Dict], target_tags: List[Dict],
+                             topic_score: float, extracted_tags: Dict[str, float]) -> float:
+    """基于LDA结果计算匹配度分数
+    
+    topic_score 为查询与候选用户主题向量的余弦相似度（无查询时为候选用户的主主题概率），
+    extracted_tags 为候选用户存储的标签置信度。
+    """
     score = 0.0
     
     # 基于主题相关性计算分数（权重40%）
-    if lda_result.topics:
-        main_topic_score = lda_result.topics[0][1] if lda_result.topics else 0.0
-        score += main_topic_score * 0.4
+    score += topic_score * 0.4
     
     # 基于标签匹配计算分数（权重40%）
-    if lda_result.extracted_tags:
+    if extracted_tags:
         # 取前5个最相关标签的平均置信度
-        top_tags = sorted(lda_result.extracted_tags.items(), 
+        top_tags = sorted(extracted_tags.items(), 
                          key=lambda x: x[1], reverse=True)[:5]
         if top_tags:
             tag_score = sum(conf for _, conf in top_tags) / len(top_tags)
@@ -725,29 +735,107 @@ def calculate_basic_compatibility_score(user_tags: List[str], match_type: str,
     
     return min(max(score, 0.0), 1.0)
 
+async def get_users_complete_data(user_ids: List[str]) -> Dict[str, Dict]:
+    """批量获取多个用户的完整数据（档案、元数据、标签各一次查询），返回 {user_id: data}"""
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+    
+    try:
+        profiles, metadata_by_user, tags_by_user = await asyncio.gather(
+            user_profile_db.get_by_ids(user_ids),
+            user_metadata_db.get_by_user_ids(user_ids),
+            user_tags_db.get_by_user_ids(user_ids)
+        )
+        
+        return {
+            user_id: {
+                'profile': profiles[user_id],
+                'metadata': metadata_by_user.get(user_id, []),
+                'tags': tags_by_user.get(user_id, [])
+            }
+            for user_id in user_ids if user_id in profiles
+        }
+        
+    except Exception as e:
+        print(f"批量获取用户完整数据错误: {e}")
+        return {}
+
 async def get_user_complete_data(user_id: str) -> Optional[Dict]:
     """获取用户的完整数据"""
+    return (await get_users_complete_data([user_id])).get(user_id)
+
+def pair_cache_key(kind: str, user_a_data: Dict, user_b_data: Dict) -> tuple:
+    """(用户a, 用户b, 分析类型, 档案版本a, 档案版本b)"""
+    return (
+        user_a_data['profile']['id'], user_b_data['profile']['id'], kind,
+        user_data_version(user_a_data), user_data_version(user_b_data)
+    )
+
+def cached_pair_result(kind: str, user_a_data: Dict, user_b_data: Dict, compute: Callable[[], Any]) -> Any:
+    """按 (用户对, 分析类型, 双方档案版本) 缓存分析结果，未命中时调用compute（在工作线程中使用）"""
+    key = pair_cache_key(kind, user_a_data, user_b_data)
+    cache = pair_score_cache  # 读写使用同一个缓存实例
+    result = cache.get(*key)
+    if result is None:
+        result = compute()
+        cache.put(*key, result)
+    return result
+
+async def cached_pair_result_async(kind: str, user_a_data: Dict, user_b_data: Dict, compute: Callable[[], Any]) -> Any:
+    """cached_pair_result 的异步版本，缓存的SQLite读写放到数据库线程池执行"""
+    key = pair_cache_key(kind, user_a_data, user_b_data)
+    cache = pair_score_cache
+    result = await run_blocking(cache.get, *key)
+    if result is None:
+        result = compute()
+        await run_blocking(cache.put, *key, result)
+    return result
+
+def run_detailed_analysis(analyzer, current_profile_data: Dict, target_profile_data: Dict) -> Dict:
+    """用增强兼容性分析器分析两份档案，返回接口的data字段"""
+    # 创建临时文件
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f1:
+        json.dump(current_profile_data, f1, ensure_ascii=False, indent=2)
+        temp_file_a = f1.name
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f2:
+        json.dump(target_profile_data, f2, ensure_ascii=False, indent=2)
+        temp_file_b = f2.name
+    
     try:
-        # 基本信息
-        profile = await user_profile_db.get_by_id(user_id)
-        if not profile:
-            return None
+        # 使用增强兼容性分析器
+        if not analyzer.is_model_trained:
+            # 如果模型未训练，尝试加载已有模型
+            try:
+                analyzer.load_models('data/models')
+            except:
+                # 如果无法加载，进行快速训练
+                analyzer.train_models([temp_file_a, temp_file_b])
         
-        # 元数据
-        metadata_list = await user_metadata_db.get_by_user_id(user_id)
+        # 进行详细兼容性分析
+        detailed_result = analyzer.enhanced_compatibility_analysis(temp_file_a, temp_file_b)
         
-        # 标签
-        tags = await user_tags_db.get_by_user_id(user_id)
+        # 生成简洁结果
+        simple_result = analyzer.generate_simple_result(detailed_result)
         
         return {
-            'profile': profile,
-            'metadata': metadata_list,
-            'tags': tags
+            "simple_result": json.loads(simple_result.to_json()),
+            "detailed_result": {
+                "overall_score": detailed_result.vector_similarity_score * 10,
+                "profile_similarity": detailed_result.profile_similarity * 10,
+                "request_similarity": detailed_result.request_similarity * 10,
+                "mutual_tags": detailed_result.mutual_tags,
+                "complementary_tags": detailed_result.complementary_tags,
+                "explanation": detailed_result.vector_explanation,
+                "recommendation": detailed_result.overall_recommendation
+            }
         }
         
-    except Exception as e:
-        print(f"获取用户完整数据错误: {e}")
-        return None
+    finally:
+        # 清理临时文件
+        os.unlink(temp_file_a)
+        os.unlink(temp_file_b)
 
 def perform_compatibility_analysis(user_a_data: Dict, user_b_data: Dict) -> Dict:
     """执行兼容性分析"""
@@ -793,74 +881,72 @@ def generate_recommendation(score: float) -> str:
 async def create_profile_from_metadata(user_id: str) -> Optional[Dict]:
     """从用户元数据创建档案数据，用于兼容现有算法"""
     try:
-        # 获取用户基本信息
-        user_profile = await user_profile_db.get_by_id(user_id)
-        if not user_profile:
-            return None
-        
-        # 获取用户元数据
-        metadata_list = await user_metadata_db.get_by_user_id(user_id)
-        
-        # 构建档案数据结构
-        profile_data = {
-            'profile': {
-                'name': {
-                    'display_name': user_profile['display_name'],
-                    'nickname': user_profile['display_name'],
-                    'greeting': 'Hi there!'
-                },
-                'professional': {},
-                'personal': {},
-                'personality': {},
-                'lifestyle': {}
+        user_data = await get_user_complete_data(user_id)
+        return build_profile_data(user_data) if user_data else None
+        
+    except Exception as e:
+        print(f"创建档案数据失败: {e}")
+        return None
+
+def build_profile_data(user_data: Dict) -> Dict:
+    """由用户完整数据（档案、元数据、标签）构建档案数据结构"""
+    user_profile = user_data['profile']
+    metadata_list = user_data['metadata']
+    tags = user_data['tags']
+    
+    # 构建档案数据结构
+    profile_data = {
+        'profile': {
+            'name': {
+                'display_name': user_profile['display_name'],
+                'nickname': user_profile['display_name'],
+                'greeting': 'Hi there!'
             },
-            'user_request': {},
-            'metadata': {
-                'profile_type': 'generated',
-                'created_date': '2024',
-                'tags': {}
-            }
+            'professional': {},
+            'personal': {},
+            'personality': {},
+            'lifestyle': {}
+        },
+        'user_request': {},
+        'metadata': {
+            'profile_type': 'generated',
+            'created_date': '2024',
+            'tags': {}
         }
+    }
+    
+    # 处理元数据
+    for item in metadata_list:
+        section_type = item['section_type']
+        section_key = item['section_key']
+        content = item['content']
         
-        # 处理元数据
-        for item in metadata_list:
-            section_type = item['section_type']
-            section_key = item['section_key']
-            content = item['content']
-            
-            # 解析content
-            if isinstance(content, str):
-                try:
-                    content = json.loads(content)
-                except json.JSONDecodeError:
-                    content = {'description': content}
-            
-            if section_type == 'profile':
-                if section_key in profile_data['profile']:
-                    profile_data['profile'][section_key].update(content)
-                else:
-                    profile_data['profile'][section_key] = content
-            elif section_type == 'user_request':
-                profile_data['user_request'].update(content)
-        
-        # 获取用户标签
-        tags = await user_tags_db.get_by_user_id(user_id)
-        
-        # 按类别组织标签
-        for tag in tags:
-            tag_name = tag['tag_name']
-            tag_category = tag.get('tag_category', 'general')
-            
-            if tag_category not in profile_data['metadata']['tags']:
-                profile_data['metadata']['tags'][tag_category] = []
-            
-            profile_data['metadata']['tags'][tag_category].append(tag_name)
+        # 解析content
+        if isinstance(content, str):
+            try:
+                content = json.loads(content)
+            except json.JSONDecodeError:
+                content = {'description': content}
         
-        return profile_data
+        if section_type == 'profile':
+            if section_key in profile_data['profile']:
+                profile_data['profile'][section_key].update(content)
+            else:
+                profile_data['profile'][section_key] = content
+        elif section_type == 'user_request':
+            profile_data['user_request'].update(content)
+    
+    # 按类别组织标签
+    for tag in tags:
+        tag_name = tag['tag_name']
+        tag_category = tag.get('tag_category', 'general')
         
-    except Exception as e:
-        print(f"创建档案数据失败: {e}")
-        return None
+        if tag_category not in profile_data['metadata']['tags']:
+            profile_data['metadata']['tags'][tag_category] = []
+        
+        profile_data['metadata']['tags'][tag_category].append(tag_name)
+    
+    return profile_data
 
 def calculate_enhanced_compatibility(profile_a: Dict, profile_b: Dict) -> float:
     """使用增强算法计算兼容性分数"""
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+用户对兼容性分数缓存
+键为 (user_a, user_b, 分析类型, 档案版本a, 档案版本b)，档案版本由元数据/标签的更新时间得出，
+用户资料变化后旧条目自然失效；写入元数据或标签时同时调用 invalidate(user_id) 清理旧条目。
+内存LRU + SQLite持久层（PAIR_CACHE_PATH，默认项目根目录下 data/cache/pair_scores.sqlite3，设为空字符串关闭），
+进程重启后仍可命中。持久层为多个worker共享（WAL模式），读写出错时按未命中处理，不影响接口。
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, 'data', 'cache', 'pair_scores.sqlite3')
+# 等待其他worker释放SQLite写锁的秒数，超时即按未命中/未写入处理
+DB_TIMEOUT = float(os.getenv('PAIR_CACHE_DB_TIMEOUT', '1'))
+
+PairKey = Tuple[str, str, str, str, str]
+
+def _json_default(value: Any) -> Any:
+    """numpy标量/数组等带 item()/tolist() 的值转为Python原生类型"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+def user_data_version(user_data: Dict) -> str:
+    """由用户完整数据（档案、元数据、标签）计算档案版本
+
+    取档案、元数据和标签中最新的更新时间，再加上元数据和标签的条数（删除标签不会产生新的时间戳）。
+    """
+    rows = [user_data.get('profile') or {}] + list(user_data.get('metadata') or []) + list(user_data.get('tags') or [])
+    latest = max((str(row.get('updated_at') or row.get('created_at') or '') for row in rows), default='')
+    return f"{latest}|{len(user_data.get('metadata') or [])}|{len(user_data.get('tags') or [])}"
+
+class PairScoreCache:
+    """两级用户对分数缓存"""
+
+    def __init__(self, max_entries: int = 10000, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries: 'OrderedDict[PairKey, Any]' = OrderedDict()
+        self._keys_by_user: Dict[str, Set[PairKey]] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+                self._db = sqlite3.connect(db_path, timeout=DB_TIMEOUT, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS pair_scores ("
+                    "user_a TEXT, user_b TEXT, kind TEXT, version_a TEXT, version_b TEXT, value TEXT, "
+                    "PRIMARY KEY (user_a, user_b, kind, version_a, version_b))"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS pair_scores_user_b ON pair_scores (user_b)")
+                self._db.commit()
+            except (sqlite3.Error, OSError) as e:
+                logger.warning("打开用户对分数缓存数据库失败: %s", e)
+                if self._db is not None:
+                    self._db.close()
+                self._db = None
+
+    def get(self, user_a: str, user_b: str, kind: str, version_a: str, version_b: str) -> Optional[Any]:
+        """依次查找内存和持久层，未命中返回None"""
+        key = (user_a, user_b, kind, version_a, version_b)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value FROM pair_scores WHERE user_a=? AND user_b=? AND kind=? AND version_a=? AND version_b=?", key
+                    ).fetchone()
+                    value = json.loads(row[0]) if row is not None else None
+                except (sqlite3.Error, ValueError) as e:
+                    logger.warning("读取用户对分数缓存失败: %s", e)
+                    row = None
+                if row is not None:
+                    self._remember(key, value)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, user_a: str, user_b: str, kind: str, version_a: str, version_b: str, value: Any) -> None:
+        """写入分数（需可JSON序列化，numpy数值会转为Python数值），持久层写入失败只记录日志"""
+        key = (user_a, user_b, kind, version_a, version_b)
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                try:
+                    data = json.dumps(value, ensure_ascii=False, default=_json_default)
+                    # 同一用户对同一类型只保留最新版本
+                    self._db.execute("DELETE FROM pair_scores WHERE user_a=? AND user_b=? AND kind=?", key[:3])
+                    self._db.execute("INSERT INTO pair_scores VALUES (?, ?, ?, ?, ?, ?)", key + (data,))
+                    self._db.commit()
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    logger.warning("写入用户对分数缓存失败: %s", e)
+                    self._rollback()
+
+    def invalidate(self, user_id: str) -> None:
+        """删除涉及某个用户的全部条目"""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._discard(key)
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM pair_scores WHERE user_a=? OR user_b=?", (user_id, user_id))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning("清理用户对分数缓存失败: %s", e)
+                    self._rollback()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM pair_scores")
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning("清空用户对分数缓存失败: %s", e)
+                    self._rollback()
+
+    def _rollback(self) -> None:
+        """撤销失败写入留下的未提交事务，避免一直持有写锁"""
+        try:
+            self._db.rollback()
+        except sqlite3.Error:
+            pass
+
+    def _remember(self, key: PairKey, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        for user_id in key[:2]:
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, key: PairKey) -> None:
+        self._entries.pop(key, None)
+        for user_id in key[:2]:
+            keys = self._keys_by_user.get(user_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[user_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'durable_tier': self._db is not None}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+# 全局实例
+pair_score_cache = PairScoreCache(
+    max_entries=int(os.getenv('PAIR_CACHE_SIZE', '10000')),
+    db_path=os.getenv('PAIR_CACHE_PATH', DEFAULT_DB_PATH) or None
+)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+用户搜索索引
+在内存中维护 显示名/邮箱/元数据文本/标签名 的倒排索引，写入元数据和标签时增量更新。
+查询支持多词（全部命中）、前缀匹配和按字段权重与idf打分排序。
+增量更新只覆盖本进程处理的写入，索引超过SEARCH_INDEX_TTL秒后在后台从数据库全量重建，
+其他worker的写入最迟在一个TTL后可见。重建期间本进程的写入会被记录，在新索引替换前重放。
+服务启动时在lifespan中构建一次索引。
+"""
+
+import os
+import re
+import math
+import time
+import bisect
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.models.text_tokenizer import text_tokenizer
+from backend.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 各字段的权重，字段名形如 name / email / tag:运动 / metadata:profile.personal
+FIELD_WEIGHTS = {'name': 3.0, 'email': 2.0, 'tag': 2.0, 'metadata': 1.0}
+# 前缀匹配相对完整词匹配的得分折扣
+PREFIX_DISCOUNT = 0.5
+# 单个查询词最多展开的前缀词数
+MAX_PREFIX_EXPANSION = 200
+# 索引的最长使用时间（秒），超过后从数据库重建
+SEARCH_INDEX_TTL = float(os.getenv('SEARCH_INDEX_TTL', '300'))
+
+_WORD_PATTERN = re.compile(r'\w', re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    """小写后用共享分词服务的搜索引擎模式分词，去掉空白和标点"""
+    if not text:
+        return []
+    return [token for token in text_tokenizer.segment_for_search(text.lower()) if _WORD_PATTERN.search(token)]
+
+def flatten_text(content: Any) -> str:
+    """把元数据内容（dict/list/str）中的文本拼接起来"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, dict):
+        return ' '.join(flatten_text(value) for value in content.values())
+    if isinstance(content, list):
+        return ' '.join(flatten_text(value) for value in content)
+    return ''
+
+class UserSearchIndex:
+    """用户倒排索引"""
+
+    def __init__(self, ttl: float = SEARCH_INDEX_TTL):
+        self.ttl = ttl
+        self._build_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.ready = False
+        self.built_at = 0.0
+        # 重建期间记录的写入 [(方法名, 参数)]，不在重建时为None
+        self._pending_writes: Optional[List[Tuple[str, tuple]]] = None
+        self.clear()
+
+    def clear(self) -> None:
+        self.postings: Dict[str, Dict[str, float]] = {}  # term -> {user_id: weight}
+        self.fields: Dict[str, Dict[str, Dict[str, float]]] = {}  # user_id -> {field: {term: weight}}
+        self.sorted_terms: List[str] = []  # 有序词表，用于前缀查找
+        self.profiles: Dict[str, Dict] = {}  # user_id -> 搜索结果展示字段
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def _set_field(self, user_id: str, field: str, text: str) -> None:
+        """替换某用户某字段的词项"""
+        weight = FIELD_WEIGHTS[field.split(':', 1)[0]]
+        user_fields = self.fields.setdefault(user_id, {})
+
+        for term, old_weight in user_fields.pop(field, {}).items():
+            posting = self.postings[term]
+            posting[user_id] -= old_weight
+            if posting[user_id] <= 1e-9:
+                del posting[user_id]
+            if not posting:
+                del self.postings[term]
+                del self.sorted_terms[bisect.bisect_left(self.sorted_terms, term)]
+
+        terms = {term: weight for term in tokenize(text)}
+        if not terms:
+            return
+        user_fields[field] = terms
+        for term in terms:
+            if term not in self.postings:
+                self.postings[term] = {}
+                bisect.insort(self.sorted_terms, term)
+            self.postings[term][user_id] = self.postings[term].get(user_id, 0.0) + weight
+
+    def _record(self, method: str, *args) -> None:
+        """重建进行中时记录写入，新索引替换前重放"""
+        if self._pending_writes is not None:
+            self._pending_writes.append((method, args))
+
+    def update_profile(self, profile: Dict) -> None:
+        """写入或更新用户档案（显示名和邮箱）"""
+        if not profile or 'id' not in profile:
+            return
+        self._record('update_profile', profile)
+        user_id = profile['id']
+        self.profiles[user_id] = {
+            'id': user_id,
+            'display_name': profile.get('display_name'),
+            'email': profile.get('email'),
+            'avatar_url': profile.get('avatar_url'),
+            'is_active': profile.get('is_active', True)
+        }
+        self._set_field(user_id, 'name', profile.get('display_name') or '')
+        self._set_field(user_id, 'email', profile.get('email') or '')
+
+    def update_metadata(self, user_id: str, section_type: str, section_key: str, content: Any) -> None:
+        """写入或更新一条元数据"""
+        self._record('update_metadata', user_id, section_type, section_key, content)
+        self._set_field(user_id, f'metadata:{section_type}.{section_key}', flatten_text(content))
+
+    def add_tag(self, user_id: str, tag_name: str) -> None:
+        self._record('add_tag', user_id, tag_name)
+        self._set_field(user_id, f'tag:{tag_name}', tag_name)
+
+    def remove_tag(self, user_id: str, tag_name: str) -> None:
+        self._record('remove_tag', user_id, tag_name)
+        self._set_field(user_id, f'tag:{tag_name}', '')
+
+    def remove_user(self, user_id: str) -> None:
+        self._record('remove_user', user_id)
+        for field in list(self.fields.get(user_id, {})):
+            self._set_field(user_id, field, '')
+        self.fields.pop(user_id, None)
+        self.profiles.pop(user_id, None)
+
+    def tags_of(self, user_id: str) -> List[str]:
+        return [field[4:] for field in self.fields.get(user_id, {}) if field.startswith('tag:')]
+
+    def _expand(self, query_term: str) -> List[str]:
+        """返回以查询词为前缀的索引词"""
+        start = bisect.bisect_left(self.sorted_terms, query_term)
+        expanded = []
+        for term in self.sorted_terms[start:start + MAX_PREFIX_EXPANSION]:
+            if not term.startswith(query_term):
+                break
+            expanded.append(term)
+        return expanded
+
+    def search(self, query: str, exclude_user_id: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """多词查询，每个查询词须完整或前缀命中，按得分降序返回"""
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms:
+            return []
+
+        total_users = max(len(self.profiles), 1)
+        scores: Optional[Dict[str, float]] = None
+        for query_term in query_terms:
+            term_scores: Dict[str, float] = {}
+            for term in self._expand(query_term):
+                posting = self.postings[term]
+                idf = math.log(1 + total_users / len(posting))
+                factor = idf if term == query_term else idf * PREFIX_DISCOUNT
+                for user_id, weight in posting.items():
+                    term_scores[user_id] = max(term_scores.get(user_id, 0.0), weight * factor)
+
+            # 多个查询词取交集
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {user_id: score + term_scores[user_id] for user_id, score in scores.items() if user_id in term_scores}
+            if not scores:
+                return []
+
+        scores.pop(exclude_user_id, None)
+        ranked = sorted(
+            (user_id for user_id in scores if user_id in self.profiles),
+            key=lambda user_id: (-scores[user_id], self.profiles[user_id].get('display_name') or '')
+        )[:limit]
+        return [
+            dict(self.profiles[user_id], tags=self.tags_of(user_id), score=round(scores[user_id], 4))
+            for user_id in ranked
+        ]
+
+    @property
+    def stale(self) -> bool:
+        return self.ready and time.monotonic() - self.built_at > self.ttl
+
+    async def ensure_built(self) -> None:
+        """索引未构建时（启动时构建失败）从数据库全量构建；索引过期时继续使用旧索引，同时在后台重建"""
+        if self.ready:
+            if self.stale and (self._refresh_task is None or self._refresh_task.done()):
+                self._refresh_task = asyncio.create_task(self._refresh())
+            return
+        async with self._build_lock:
+            if not self.ready:
+                await self.build()
+
+    async def _refresh(self) -> None:
+        async with self._build_lock:
+            if not self.stale:
+                return
+            try:
+                await self.build()
+            except Exception as e:
+                # 重建失败时保留旧索引，下次查询再试
+                logger.warning("重建用户搜索索引失败: %s", e)
+
+    async def build(self, page_size: int = 100) -> None:
+        """分页读取全部用户档案、元数据和标签构建新索引，完成后整体替换当前索引
+
+        读取期间本进程的写入先记录下来，替换前在新索引上重放，避免被旧的读取结果覆盖。
+        """
+        fresh = UserSearchIndex(self.ttl)
+        self._pending_writes = []
+        try:
+            await fresh._load(page_size)
+            # 重放与替换之间没有await，期间不会有新的写入
+            for method, args in self._pending_writes:
+                getattr(fresh, method)(*args)
+        finally:
+            self._pending_writes = None
+        self.postings, self.fields = fresh.postings, fresh.fields
+        self.sorted_terms, self.profiles = fresh.sorted_terms, fresh.profiles
+        self.ready = True
+        self.built_at = time.monotonic()
+        logger.info("用户搜索索引构建完成: %d 个用户, %d 个词项", len(self.profiles), len(self.postings))
+
+    async def _load(self, page_size: int) -> None:
+        from backend.services.database_service import run_query, user_profile_db, user_metadata_db, user_tags_db
+
+        cursor = None
+        while True:
+            # 直接查询而不用get_page，数据库出错时抛出异常而不是得到空索引
+            query = user_profile_db.client.table(user_profile_db.table).select('*')
+            if cursor:
+                query = query.gt('id', cursor)
+            response = await run_query(query.order('id').limit(page_size))
+            profiles = response.data or []
+            if not profiles:
+                break
+
+            user_ids = [profile['id'] for profile in profiles]
+            metadata_by_user, tags_by_user = await asyncio.gather(
+                user_metadata_db.get_by_user_ids(user_ids, raise_errors=True),
+                user_tags_db.get_by_user_ids(user_ids, raise_errors=True)
+            )
+            for profile in profiles:
+                self.update_profile(profile)
+                for item in metadata_by_user.get(profile['id'], []):
+                    self.update_metadata(profile['id'], item['section_type'], item['section_key'], item['content'])
+                for tag in tags_by_user.get(profile['id'], []):
+                    self.add_tag(profile['id'], tag['tag_name'])
+
+            if len(profiles) < page_size:
+                break
+            cursor = profiles[-1]['id']
+
+# 全局实例
+user_search_index = UserSearchIndex()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Supabase客户端注册表
+进程内按 (url, key) 复用同一个Supabase客户端，底层共享一个开启keep-alive的
+httpx连接池，并统计连接池的使用情况。
+"""
+
+import os
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Tuple, Any
+
+import httpx
+from supabase import create_client, Client, ClientOptions
+
+@dataclass
+class PoolConfig:
+    """连接池配置，默认值可通过环境变量覆盖"""
+    max_connections: int = int(os.getenv('DB_POOL_SIZE', '20'))
+    max_keepalive_connections: int = int(os.getenv('DB_POOL_KEEPALIVE', '10'))
+    keepalive_expiry: float = float(os.getenv('DB_POOL_KEEPALIVE_EXPIRY', '30'))
+    connect_timeout: float = float(os.getenv('DB_CONNECT_TIMEOUT', '5'))
+    pool_timeout: float = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+    request_timeout: float = float(os.getenv('DB_REQUEST_TIMEOUT', '30'))
+
+@dataclass
+class PoolMetrics:
+    """连接池请求统计"""
+    requests: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    total_latency: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def begin(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def end(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.total_latency += latency
+            if not ok:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'avg_latency_ms': round(self.total_latency / self.requests * 1000, 2) if self.requests else 0.0
+            }
+
+class MeteredTransport(httpx.HTTPTransport):
+    """记录请求数、并发数和耗时的HTTP传输层"""
+
+    def __init__(self, metrics: PoolMetrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.metrics.begin()
+        start = time.perf_counter()
+        ok = False
+        try:
+            response = super().handle_request(request)
+            ok = response.status_code < 500
+            return response
+        finally:
+            self.metrics.end(time.perf_counter() - start, ok)
+
+    def connection_stats(self) -> Dict[str, int]:
+        """当前连接池中的连接数（空闲/使用中）"""
+        connections = list(self._pool.connections)
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {'open_connections': len(connections), 'idle_connections': idle}
+
+class SupabaseClientRegistry:
+    """按 (url, key) 缓存Supabase客户端，所有客户端共享一个httpx连接池"""
+
+    def __init__(self, config: PoolConfig = None):
+        self.config = config or PoolConfig()
+        self.metrics = PoolMetrics()
+        self._clients: Dict[Tuple[str, str], Client] = {}
+        self._http_client: httpx.Client = None
+        self._transport: MeteredTransport = None
+        self._lock = threading.Lock()
+
+    def _get_http_client(self) -> httpx.Client:
+        if self._http_client is None:
+            self._transport = MeteredTransport(
+                self.metrics,
+                limits=httpx.Limits(
+                    max_connections=self.config.max_connections,
+                    max_keepalive_connections=self.config.max_keepalive_connections,
+                    keepalive_expiry=self.config.keepalive_expiry
+                )
+            )
+            self._http_client = httpx.Client(
+                transport=self._transport,
+                timeout=httpx.Timeout(
+                    self.config.request_timeout,
+                    connect=self.config.connect_timeout,
+                    pool=self.config.pool_timeout
+                )
+            )
+        return self._http_client
+
+    def get(self, url: str, key: str) -> Client:
+        """获取（必要时创建）共享客户端"""
+        client = self._clients.get((url, key))
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get((url, key))
+            if client is None:
+                options = ClientOptions(
+                    httpx_client=self._get_http_client(),
+                    postgrest_client_timeout=self.config.request_timeout,
+                    auto_refresh_token=False,
+                    persist_session=False
+                )
+                client = create_client(url, key, options=options)
+                self._clients[(url, key)] = client
+            return client
+
+    def stats(self) -> Dict[str, Any]:
+        """连接池健康状况和使用统计"""
+        stats = {
+            'clients': len(self._clients),
+            'max_connections': self.config.max_connections,
+            'max_keepalive_connections': self.config.max_keepalive_connections,
+            'open_connections': 0,
+            'idle_connections': 0
+        }
+        if self._transport is not None:
+            stats.update(self._transport.connection_stats())
+        stats.update(self.metrics.snapshot())
+        return stats
+
+    def close(self) -> None:
+        """关闭连接池并清空客户端缓存"""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
+            self._transport = None
+            self._clients = {}
+
+# 全局实例
+supabase_registry = SupabaseClientRegistry()
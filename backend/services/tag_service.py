@@ -47,9 +47,8 @@ def get_topic_model():
     global _topic_model
     if _topic_model is None:
         try:
-            from backend.models.topic_modeling import LDATopicModel
+            from backend.models.topic_modeling import LDATopicModel, model_bundle_exists
             from configs.config import ConfigManager
-            import os
             
             print("🤖 [TagService] 初始化主题建模实例...")
             config_manager = ConfigManager()
@@ -57,9 +56,7 @@ def get_topic_model():
             
             # 检查并加载生产模型
             production_model_path = "data/models/production_model"
-            if (os.path.exists(f"{production_model_path}_lda") and 
-                os.path.exists(f"{production_model_path}_dict") and 
-                os.path.exists(f"{production_model_path}_tag_mapping.json")):
+            if model_bundle_exists(production_model_path):
                 try:
                     _topic_model.load_model(production_model_path)
                     print("✅ 标签服务已加载生产LDA模型")
@@ -225,6 +222,9 @@ async def generate_user_tags_with_conversation(
             data={
                 "generated_tags": saved_tags,
                 "topics": [(int(tid), float(weight)) for tid, weight in topic_result.topics],
+                "topic_keywords": {
+                    int(tid): [word for word, _ in words[:5]] for tid, words in topic_result.topic_keywords.items()
+                },
                 "user_text_length": len(user_text),
                 "conversation_text_length": len(conversation_text) if conversation_text else 0,
                 "request_type": request.request_type,
@@ -3,6 +3,7 @@ import json
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 from backend.services.database_service import get_supabase
+from backend.services.auth_cache import auth_user_cache
 from backend.models.unlock_result import UnlockRecord, GameResult, UnlockStatus, GameConfig
 
 class UnlockService:
@@ -192,6 +193,7 @@ class UnlockService:
             update_response = self.client.table('user_profile').update({
                 'credits': new_credits
             }).eq('id', user_id).execute()
+            auth_user_cache.invalidate(user_id)
             
             return len(update_response.data) > 0
             
@@ -6,10 +6,13 @@
 包含用户信息查询、管理等功能
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, AsyncIterator
+import asyncio
 import json
+import re
 import os
 import sys
 
@@ -18,6 +21,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from backend.services.database_service import user_profile_db, user_metadata_db, user_tags_db, db_service
 from backend.services.auth_service import get_current_user
+from backend.services.search_index import user_search_index
 
 router = APIRouter()
 
@@ -31,91 +35,155 @@ class UserListResponse(BaseModel):
     success: bool
     data: List[Dict]
     total: int
+    next_cursor: Optional[str] = None
+
+# 列表接口每页从数据库读取的用户数
+USER_PAGE_SIZE = 100
+
+def build_user_summary(profile: Dict, metadata_list: List[Dict], user_tags: List[Dict]) -> Dict:
+    """根据档案、元数据和标签构建用户列表中的用户数据"""
+    user_id = profile['id']
+    
+    # 组织元数据
+    organized_metadata = {}
+    for item in metadata_list:
+        section_type = item['section_type']
+        section_key = item['section_key']
+        
+        if section_type not in organized_metadata:
+            organized_metadata[section_type] = {}
+        
+        # 解析content
+        content = item['content']
+        if isinstance(content, str):
+            try:
+                content = json.loads(content)
+            except json.JSONDecodeError:
+                pass
+        
+        organized_metadata[section_type][section_key] = content
+    
+    # 从元数据中提取信息
+    personal_info = organized_metadata.get('profile', {}).get('personal', {})
+    professional_info = organized_metadata.get('profile', {}).get('professional', {})
+    user_request = organized_metadata.get('user_request', {})
+    
+    # 解析年龄
+    age_range = personal_info.get('age_range', '')
+    age = None
+    if age_range:
+        age_match = re.search(r'(\d+)', age_range)
+        if age_match:
+            age = int(age_match.group(1))
+    
+    # 简单的性别推测
+    gender = 'unknown'
+    display_name = profile.get('display_name', '')
+    female_names = ['sophia', 'luna', 'iris', 'jenny', 'alice', 'emma', 'lucy', 'amy', 'maya', 'mia', 'grace', 'stella', 'helena', 'crystal', 'vivian', 'coco', 'xiaoya', 'kiki']
+    if any(name in display_name.lower() for name in female_names):
+        gender = 'female'
+    else:
+        gender = 'male'
+    
+    # 构建用户数据
+    return {
+        'id': user_id,
+        'username': display_name or user_id,
+        'display_name': display_name,
+        'email': profile.get('email'),
+        'age': age,
+        'gender': gender,
+        'location_city': personal_info.get('location', ''),
+        'bio': user_request.get('description', '') or f"{professional_info.get('current_role', '用户')}",
+        'occupation': professional_info.get('current_role', ''),
+        'avatar_url': profile.get('avatar_url'),
+        'created_at': profile.get('created_at'),
+        'is_active': profile.get('is_active', True),
+        'credits': profile.get('credits', 0),
+        'subscription_type': profile.get('subscription_type', 'free'),
+        'tags': [{'name': tag['tag_name'], 'category': tag['tag_category'], 'confidence': tag['confidence_score']} for tag in user_tags],
+        'metadata': organized_metadata
+    }
+
+async def build_user_page(profiles: List[Dict]) -> List[Dict]:
+    """批量获取一页用户的元数据和标签（每页两次查询）"""
+    if not profiles:
+        return []
+    
+    user_ids = [profile['id'] for profile in profiles]
+    # 数据库错误直接抛出，不把缺失的数据当作空列表返回
+    metadata_by_user, tags_by_user = await asyncio.gather(
+        user_metadata_db.get_by_user_ids(user_ids, raise_errors=True),
+        user_tags_db.get_by_user_ids(user_ids, raise_errors=True)
+    )
+    return [
+        build_user_summary(profile, metadata_by_user.get(profile['id'], []), tags_by_user.get(profile['id'], []))
+        for profile in profiles
+    ]
+
+async def iter_profile_pages(exclude_user_id: Optional[str] = None, cursor: Optional[str] = None,
+                             page_size: int = USER_PAGE_SIZE) -> AsyncIterator[List[Dict]]:
+    """按键集分页依次产出用户档案"""
+    while True:
+        profiles = await user_profile_db.get_page(after_id=cursor, limit=page_size, exclude_user_id=exclude_user_id)
+        if profiles:
+            yield profiles
+        if len(profiles) < page_size:
+            return
+        cursor = profiles[-1]['id']
+
+async def stream_json_list(pages: AsyncIterator[List[Dict]], **fields) -> AsyncIterator[str]:
+    """将逐页产生的列表流式输出为 {..., "data": [...], "total": n, "success": true}
+
+    success放在末尾：中途出错时响应头已发送，只能提前结束列表，
+    并以 "success": false 和 "error" 标明数据不完整。
+    """
+    head = ''.join(f'{json.dumps(key, ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False, default=str)}, '
+                   for key, value in fields.items())
+    yield '{' + head + '"data": ['
+    
+    total = 0
+    error = None
+    try:
+        async for items in pages:
+            for item in items:
+                yield (',' if total else '') + json.dumps(item, ensure_ascii=False, default=str)
+                total += 1
+    except Exception as e:
+        print(f"流式输出用户列表中断: {e}")
+        error = str(e)
+    
+    trailer = {'total': total, 'success': error is None}
+    if error is not None:
+        trailer['error'] = f"获取用户列表失败: {error}"
+    yield '], ' + json.dumps(trailer, ensure_ascii=False)[1:]
 
 @router.get("/", response_model=UserListResponse)
-async def get_all_users(current_user: Dict = Depends(get_current_user)):
-    """获取所有用户信息"""
+async def get_all_users(cursor: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=1000),
+                        current_user: Dict = Depends(get_current_user)):
+    """获取所有用户信息
+    
+    指定limit时返回从cursor开始的一页和下一页的next_cursor；
+    否则分页读取并流式返回全部用户。
+    """
     try:
-        # 获取所有用户基本信息（排除当前用户）
-        profiles = await user_profile_db.get_all(exclude_user_id=current_user['user_id'])
+        exclude_user_id = current_user['user_id']
         
-        users = []
-        for profile in profiles:
-            user_id = profile['id']
+        if limit is None:
+            async def user_pages():
+                async for profiles in iter_profile_pages(exclude_user_id, cursor):
+                    yield await build_user_page(profiles)
             
-            # 获取用户元数据
-            metadata_list = await user_metadata_db.get_by_user_id(user_id)
-            
-            # 获取用户标签
-            user_tags = await user_tags_db.get_by_user_id(user_id)
-            
-            # 组织元数据
-            organized_metadata = {}
-            for item in metadata_list:
-                section_type = item['section_type']
-                section_key = item['section_key']
-                
-                if section_type not in organized_metadata:
-                    organized_metadata[section_type] = {}
-                
-                # 解析content
-                content = item['content']
-                if isinstance(content, str):
-                    try:
-                        content = json.loads(content)
-                    except json.JSONDecodeError:
-                        pass
-                
-                organized_metadata[section_type][section_key] = content
-            
-            # 从元数据中提取信息
-            personal_info = organized_metadata.get('profile', {}).get('personal', {})
-            professional_info = organized_metadata.get('profile', {}).get('professional', {})
-            user_request = organized_metadata.get('user_request', {})
-            
-            # 解析年龄
-            age_range = personal_info.get('age_range', '')
-            age = None
-            if age_range:
-                import re
-                age_match = re.search(r'(\d+)', age_range)
-                if age_match:
-                    age = int(age_match.group(1))
-            
-            # 简单的性别推测
-            gender = 'unknown'
-            display_name = profile.get('display_name', '')
-            female_names = ['sophia', 'luna', 'iris', 'jenny', 'alice', 'emma', 'lucy', 'amy', 'maya', 'mia', 'grace', 'stella', 'helena', 'crystal', 'vivian', 'coco', 'xiaoya', 'kiki']
-            if any(name in display_name.lower() for name in female_names):
-                gender = 'female'
-            else:
-                gender = 'male'
-            
-            # 构建用户数据
-            user_data = {
-                'id': user_id,
-                'username': display_name or user_id,
-                'display_name': display_name,
-                'email': profile.get('email'),
-                'age': age,
-                'gender': gender,
-                'location_city': personal_info.get('location', ''),
-                'bio': user_request.get('description', '') or f"{professional_info.get('current_role', '用户')}",
-                'occupation': professional_info.get('current_role', ''),
-                'avatar_url': profile.get('avatar_url'),
-                'created_at': profile.get('created_at'),
-                'is_active': profile.get('is_active', True),
-                'credits': profile.get('credits', 0),
-                'subscription_type': profile.get('subscription_type', 'free'),
-                'tags': [{'name': tag['tag_name'], 'category': tag['tag_category'], 'confidence': tag['confidence_score']} for tag in user_tags],
-                'metadata': organized_metadata
-            }
-            users.append(user_data)
+            return StreamingResponse(stream_json_list(user_pages()), media_type='application/json')
+        
+        profiles = await user_profile_db.get_page(after_id=cursor, limit=limit, exclude_user_id=exclude_user_id)
+        users = await build_user_page(profiles)
         
         return UserListResponse(
             success=True,
             data=users,
-            total=len(users)
+            total=len(users),
+            next_cursor=profiles[-1]['id'] if len(profiles) == limit else None
         )
         
     except Exception as e:
@@ -270,31 +338,12 @@ async def test_database_connection():
 
 # 用户搜索功能
 @router.get("/search/{query}")
-async def search_users(query: str, current_user: Dict = Depends(get_current_user)):
-    """根据关键词搜索用户"""
+async def search_users(query: str, limit: int = Query(50, ge=1, le=500),
+                       current_user: Dict = Depends(get_current_user)):
+    """根据关键词搜索用户（倒排索引，支持多词和前缀匹配）"""
     try:
-        # 获取所有用户（排除当前用户）
-        profiles = await user_profile_db.get_all(exclude_user_id=current_user['user_id'])
-        
-        # 简单的关键词匹配
-        matched_users = []
-        for profile in profiles:
-            display_name = profile.get('display_name', '').lower()
-            email = profile.get('email', '').lower()
-            
-            if query.lower() in display_name or query.lower() in email:
-                # 获取用户标签
-                user_tags = await user_tags_db.get_by_user_id(profile['id'])
-                
-                user_data = {
-                    'id': profile['id'],
-                    'display_name': profile['display_name'],
-                    'email': profile['email'],
-                    'avatar_url': profile.get('avatar_url'),
-                    'is_active': profile.get('is_active', True),
-                    'tags': [tag['tag_name'] for tag in user_tags]
-                }
-                matched_users.append(user_data)
+        await user_search_index.ensure_built()
+        matched_users = user_search_index.search(query, exclude_user_id=current_user['user_id'], limit=limit)
         
         return {
             "success": True,
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后端日志配置（models / services / algorithms 共用）
+backend 下的模块用 get_logger(__name__) 获取各自的logger，消息使用 %s 占位符延迟格式化，
+级别未开启时不产生任何格式化和输出开销。所有 backend.* logger 的记录先放入内存队列，
+由后台线程（QueueListener）写到stdout，请求线程不会因为日志输出阻塞。
+
+环境变量：
+    LOG_LEVEL   日志级别，默认 INFO（热路径的诊断信息为 DEBUG）
+    LOG_FORMAT  text 或 json，默认 text
+    LOG_QUEUE   设为 0 时直接同步输出（调试用）
+"""
+
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+ROOT_LOGGER_NAME = "backend"
+TEXT_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+# LogRecord自带的属性，其余属性视为通过 extra= 传入的结构化字段
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+class JsonFormatter(logging.Formatter):
+    """每条记录输出为一行JSON，extra= 传入的字段一并输出"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_configured = False
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None, use_queue: Optional[bool] = None) -> None:
+    """配置 backend 根logger，重复调用时按新参数重新配置"""
+    global _listener, _configured
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.getenv('LOG_FORMAT', 'text')).lower()
+    if use_queue is None:
+        use_queue = os.getenv('LOG_QUEUE', '1') != '0'
+
+    with _lock:
+        _stop_listener()
+        logger = logging.getLogger(ROOT_LOGGER_NAME)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+        if use_queue:
+            log_queue = queue.SimpleQueue()
+            logger.addHandler(logging.handlers.QueueHandler(log_queue))
+            _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+            _listener.start()
+        else:
+            logger.addHandler(stream_handler)
+
+        logger.setLevel(level)
+        logger.propagate = False
+        _configured = True
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def shutdown_logging() -> None:
+    """停止后台线程并写出队列中剩余的记录"""
+    with _lock:
+        _stop_listener()
+
+atexit.register(shutdown_logging)
+
+def get_logger(name: str) -> logging.Logger:
+    """获取模块logger，首次调用时按环境变量完成配置"""
+    if not _configured:
+        setup_logging()
+    return logging.getLogger(name)
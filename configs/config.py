@@ -2,8 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import os
-from typing import Optional
-from dataclasses import dataclass
+import json
+from typing import Dict, Optional
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
 @dataclass
@@ -18,6 +19,12 @@ class KimiAPIConfig:
     timeout: int = 30
     max_retries: int = 3
     retry_delay: float = 1.0
+    max_backoff: float = 30.0  # 指数退避的最大等待秒数
+    
+    # 批量分析
+    max_concurrency: int = 4  # 同时进行的请求数
+    requests_per_minute: float = 60  # 令牌桶速率，按服务商配额设置
+    rate_limit_burst: int = 5  # 令牌桶容量
     
     def __post_init__(self):
         if self.api_key is None:
@@ -74,13 +81,61 @@ class TopicModelingConfig:
     # 标签匹配
     topic_threshold: float = 0.1
     tag_confidence_threshold: float = 0.3
+    max_topic_tags: int = 0  # 主题提取标签时最多保留的标签数，0表示不限
+
+# 英文缩写区分大小写，且两侧不能紧邻字母，避免 city、it、3pm 之类的文本误命中
+def _abbr(*words: str) -> str:
+    return '|'.join(f"(?-i:(?<![A-Za-z]){word}(?![A-Za-z]))" for word in words)
+
+# 标签的匹配模式（正则），不区分大小写
+DEFAULT_TAG_PATTERNS = {
+    # 年龄相关
+    "18-22岁": r'1[89]|2[012]|十八|十九|二十',
+    "23-27岁": r'2[3-7]|二十[三四五六七]',
+    "28-32岁": r'2[89]|3[012]|二十[八九]|三十',
+    
+    # 职业相关
+    "程序员": r'程序|代码|开发|编程|软件|' + _abbr('IT'),
+    "设计师": r'设计|美工|视觉|' + _abbr('UI', 'UX'),
+    "产品经理": r'产品|需求|项目管理|' + _abbr('PM'),
+    
+    # 性格相关
+    "外向开朗": r'外向|开朗|活泼|爱说话|社交',
+    "内向安静": r'内向|安静|文静|不爱说话',
+    
+    # 兴趣相关
+    "运动健身": r'运动|健身|锻炼|跑步|游泳|篮球|足球',
+    "音乐": r'音乐|唱歌|乐器|钢琴|吉他',
+    "旅行": r'旅行|旅游|出游|度假|旅行',
+}
+
+@dataclass
+class TagMatchingConfig:
+    """标签匹配配置"""
+    
+    # 模式匹配 {标签: 正则}，命中时得pattern_score分
+    patterns: Dict[str, str] = field(default_factory=lambda: dict(DEFAULT_TAG_PATTERNS))
+    pattern_score: float = 0.8
+    # 额外模式文件（JSON {标签: 正则}），覆盖同名标签的模式，默认读取环境变量 TAG_PATTERNS_FILE
+    patterns_file: Optional[str] = None
+    
+    def __post_init__(self):
+        if self.patterns_file is None:
+            self.patterns_file = os.getenv('TAG_PATTERNS_FILE')
+        if self.patterns_file:
+            with open(self.patterns_file, 'r', encoding='utf-8') as f:
+                self.patterns.update(json.load(f))
 
 @dataclass
 class VectorMatchingConfig:
     """向量匹配配置"""
     
-    # Faiss索引类型
+    # Faiss索引类型: IndexFlatIP / IndexIVFFlat / IndexHNSWFlat
     index_type: str = "IndexFlatIP"  # Inner Product for cosine similarity
+    ivf_nlist: int = 100  # IVF聚类中心数
+    ivf_nprobe: int = 10  # IVF检索时访问的聚类数
+    hnsw_m: int = 32  # HNSW每个节点的邻居数
+    hnsw_ef_search: int = 64  # HNSW检索时的候选队列长度
     
     # 相似度计算
     similarity_threshold: float = 0.6
@@ -101,6 +156,7 @@ class ConfigManager:
         self.analysis_config = AnalysisConfig()
         self.topic_config = TopicModelingConfig()
         self.vector_config = VectorMatchingConfig()
+        self.tag_matching_config = TagMatchingConfig()
     
     def validate(self):
         return bool(self.api_config.api_key)
@@ -18,6 +18,7 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 from backend.models.topic_modeling import LDATopicModel
+from backend.models.text_tokenizer import text_tokenizer
 from backend.models.vector_matching import TopicVectorizer
 from backend.algorithms.tag_compatibility_analyzer import EnhancedCompatibilityAnalyzer
 
@@ -85,6 +86,9 @@ def main():
     print(f"📁 向量输出目录: {vectors_dir}")
     print()
     
+    # 离线训练，大批量分词时使用多进程
+    text_tokenizer.use_batch_workers()
+    
     # 检查输入目录
     if not profiles_dir.exists():
         print(f"❌ 错误: 用户档案目录不存在 {profiles_dir}")
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+认证用户缓存测试
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from backend.services.auth_cache import AuthUserCache
+
+def test_ttl_lru_and_invalidation():
+    cache = AuthUserCache(ttl=60, max_size=2)
+    cache.put('u1', 1, {'user_id': 'u1'})
+    cache.put('u1', 2, {'user_id': 'u1'})
+    assert cache.get('u1', 1) == {'user_id': 'u1'}
+
+    # 超出容量时淘汰最久未使用的 (u1, 2)
+    cache.put('u2', 1, {'user_id': 'u2'})
+    assert cache.get('u1', 2) is None
+    assert cache.get('u2', 1) is not None
+
+    cache.invalidate('u1')
+    assert cache.get('u1', 1) is None
+
+    cache.ttl = 0.01
+    cache.put('u3', 1, {'user_id': 'u3'})
+    time.sleep(0.02)
+    assert cache.get('u3', 1) is None
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+两阶段兼容性分析测试（使用模拟的Kimi接口）
+"""
+
+import sys
+import json
+import asyncio
+from pathlib import Path
+
+import httpx
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from configs.config import ConfigManager
+from backend.algorithms.llm_compatibility_analyzer import KimiCompatibilityAnalyzer
+from backend.algorithms.candidate_prefilter import CandidatePrefilterPipeline
+
+def make_analyzer():
+    config = ConfigManager()
+    config.api_config.api_key = 'test'
+    config.api_config.requests_per_minute = 6000
+    return KimiCompatibilityAnalyzer(config, prompts_file=str(project_root / 'configs/prompts/prompts.yaml'))
+
+def test_only_shortlisted_pairs_reach_llm(tmp_path):
+    profiles = {
+        'a': ['篮球', '摄影'], 'b': ['篮球', '摄影', '旅行'],
+        'c': ['烹饪'], 'd': ['烹饪', '阅读'], 'e': []
+    }
+    paths = []
+    for name, tags in profiles.items():
+        path = tmp_path / f'{name}.json'
+        path.write_text(json.dumps({'profile': {'name': {'display_name': name}}, 'metadata': {'tags': {'兴趣': tags}}}), encoding='utf-8')
+        paths.append(str(path))
+
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={'choices': [{'message': {'content': json.dumps({'mutual_interest_score': 6})}}]})
+
+    pipeline = CandidatePrefilterPipeline(make_analyzer(), top_k=1)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    results, report = asyncio.run(pipeline.run_async(paths, client=client))
+
+    assert [(r.person_a, r.person_b) for r in results] == [('a', 'b'), ('c', 'd')]
+    assert (report.total_pairs, report.llm_calls, report.llm_calls_avoided) == (10, 2, 8)
+    assert len(calls) == 2
+
+    # 档案未变化时全部命中缓存
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    results, report = asyncio.run(pipeline.run_async(paths, client=client))
+    assert (report.cache_hits, report.llm_calls) == (2, 0)
+    assert len(calls) == 2
+
+def write_pair(tmp_path):
+    paths = []
+    for name in ('a', 'b'):
+        path = tmp_path / f'{name}.json'
+        path.write_text(json.dumps({'profile': {'name': {'display_name': name}}, 'metadata': {'tags': ['篮球']}}), encoding='utf-8')
+        paths.append(str(path))
+    return paths
+
+def counting_client(calls):
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={'choices': [{'message': {'content': json.dumps({'mutual_interest_score': 6})}}]})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+def test_edited_profile_is_reanalyzed(tmp_path):
+    paths = write_pair(tmp_path)
+    pipeline = CandidatePrefilterPipeline(make_analyzer(), top_k=1)
+    calls = []
+    asyncio.run(pipeline.run_async(paths, client=counting_client(calls)))
+
+    Path(paths[1]).write_text(json.dumps({'profile': {'name': {'display_name': 'b'}}, 'metadata': {'tags': ['篮球', '摄影']}}), encoding='utf-8')
+    _, report = asyncio.run(pipeline.run_async(paths, client=counting_client(calls)))
+    assert (report.cache_hits, report.llm_calls) == (0, 1)
+    assert len(calls) == 2
+
+def test_reversed_pair_hits_cache(tmp_path):
+    paths = write_pair(tmp_path)
+    pipeline = CandidatePrefilterPipeline(make_analyzer(), top_k=1)
+    calls = []
+    asyncio.run(pipeline.run_async(paths, client=counting_client(calls)))
+
+    results, report = asyncio.run(pipeline.run_async(paths[::-1], client=counting_client(calls)))
+    assert (report.cache_hits, report.llm_calls) == (1, 0)
+    assert len(results) == 1 and len(calls) == 1
+
+class FakeVectorMatcher:
+    user_vectors = {'a': None, 'b': None}
+
+    def find_similar_users_many(self, user_ids, top_k, min_similarity):
+        return {'a': [('b', 0.9)], 'b': [('a', 0.9)]}
+
+def test_tag_similarity_only_for_users_without_vectors(tmp_path):
+    paths = []
+    for name, tags in (('a', ['篮球']), ('b', ['烹饪']), ('c', ['篮球']), ('d', ['烹饪'])):
+        path = tmp_path / f'{name}.json'
+        path.write_text(json.dumps({'profile': {'name': {'display_name': name}}, 'metadata': {'tags': tags}}), encoding='utf-8')
+        paths.append(str(path))
+
+    pipeline = CandidatePrefilterPipeline(make_analyzer(), top_k=1, vector_matcher=FakeVectorMatcher())
+    queried = []
+    original = pipeline._tag_candidates
+    pipeline._tag_candidates = lambda profile_paths, query_paths: queried.extend(query_paths) or original(profile_paths, query_paths)
+
+    pairs = pipeline.shortlist(paths, user_ids=['a', 'b', 'c', 'd'])
+    assert queried == paths[2:]
+    assert pairs == [(paths[0], paths[1]), (paths[0], paths[2]), (paths[1], paths[3])]
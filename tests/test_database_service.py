@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+数据访问层测试（使用本地内存数据库）
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from backend.services.local_database import LocalSupabaseClient
+from backend.services.database_service import UserProfileDB, UserMetadataDB, UserTagsDB
+
+def make_dbs():
+    client = LocalSupabaseClient()
+    dbs = UserProfileDB(), UserMetadataDB(), UserTagsDB()
+    for db in dbs:
+        db.client = client
+    return dbs
+
+def test_local_database_round_trip():
+    profile_db, metadata_db, tags_db = make_dbs()
+
+    async def scenario():
+        profile = await profile_db.create({'email': 'a@example.com', 'display_name': 'A'})
+        user_id = profile['id']
+        await metadata_db.upsert_metadata(user_id, 'profile', 'city', '上海')
+        await metadata_db.upsert_metadata(user_id, 'profile', 'city', '北京')
+        await tags_db.batch_add_tags(user_id, [{'name': '运动', 'confidence': 0.5}, {'name': '阅读', 'confidence': 0.9}])
+
+        # 并发查询在线程池中执行
+        results = await asyncio.gather(*[profile_db.get_by_id(user_id) for _ in range(20)])
+        assert all(result['email'] == 'a@example.com' for result in results)
+        return user_id
+
+    user_id = asyncio.run(scenario())
+    metadata = asyncio.run(metadata_db.get_by_user_ids([user_id, 'missing']))
+    assert [item['content'] for item in metadata[user_id]] == [{'value': '北京'}]
+    assert metadata['missing'] == []
+
+    tags = asyncio.run(tags_db.get_by_user_id(user_id))
+    assert [tag['tag_name'] for tag in tags] == ['阅读', '运动']
+    assert asyncio.run(profile_db.get_by_email('nobody@example.com')) is None
+
+def test_supabase_registry_reuses_clients():
+    from backend.services.database_service import SUPABASE_URL, SUPABASE_KEY
+    from backend.services.supabase_pool import SupabaseClientRegistry
+
+    registry = SupabaseClientRegistry()
+    client = registry.get(SUPABASE_URL, SUPABASE_KEY)
+    assert registry.get(SUPABASE_URL, SUPABASE_KEY) is client
+    assert registry.stats()['clients'] == 1
+
+    registry.close()
+    assert registry.stats()['clients'] == 0
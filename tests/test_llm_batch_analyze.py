@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+KimiCompatibilityAnalyzer 异步批量分析测试（使用模拟的Kimi接口）
+"""
+
+import sys
+import json
+import asyncio
+import os
+from pathlib import Path
+
+import httpx
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from configs.config import ConfigManager
+from backend.algorithms.llm_compatibility_analyzer import KimiCompatibilityAnalyzer
+
+def make_analyzer():
+    config = ConfigManager()
+    config.api_config.api_key = 'test'
+    config.api_config.retry_delay = 0.01
+    config.api_config.requests_per_minute = 6000
+    return KimiCompatibilityAnalyzer(config, prompts_file=str(project_root / 'configs/prompts/prompts.yaml'))
+
+def write_profiles(tmp_path, names):
+    paths = []
+    for name in names:
+        path = tmp_path / f'{name}.json'
+        path.write_text(json.dumps({'profile': {'name': {'display_name': name}}}), encoding='utf-8')
+        paths.append(str(path))
+    return paths
+
+def fake_kimi(failures):
+    """每对的第一次请求返回429，之后返回固定分数"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) <= failures:
+            return httpx.Response(429, headers={'Retry-After': '0'})
+        content = json.dumps({'mutual_interest_score': 7})
+        return httpx.Response(200, json={'choices': [{'message': {'content': content}}]})
+
+    return handler, calls
+
+def test_batch_analyze_async_with_retries_and_checkpoint(tmp_path):
+    analyzer = make_analyzer()
+    paths = write_profiles(tmp_path, ['a', 'b', 'c'])
+    checkpoint = str(tmp_path / 'checkpoint.jsonl')
+
+    handler, calls = fake_kimi(failures=2)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    results = asyncio.run(analyzer.batch_analyze_async(paths, checkpoint_path=checkpoint, client=client))
+
+    assert [(r.person_a, r.person_b) for r in results] == [('a', 'b'), ('a', 'c'), ('b', 'c')]
+    assert all(r.mutual_interest_score == 7 for r in results)
+    assert len(calls) == 5
+
+    # 再次运行时已完成的对直接从检查点读取
+    handler, calls = fake_kimi(failures=0)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    results = asyncio.run(analyzer.batch_analyze_async(paths + write_profiles(tmp_path, ['d']), checkpoint_path=checkpoint, client=client))
+    assert len(results) == 6
+    assert len(calls) == 3
+
+def test_load_profile_rereads_changed_file_and_stays_bounded(tmp_path, monkeypatch):
+    from backend.algorithms import llm_compatibility_analyzer
+    analyzer = make_analyzer()
+    path_a, path_b, path_c = write_profiles(tmp_path, ['a', 'b', 'c'])
+    assert analyzer.load_profile(path_a) is analyzer.load_profile(path_a)
+
+    with open(path_a, 'w', encoding='utf-8') as f:
+        json.dump({'profile': {'name': {'display_name': 'a2'}}}, f)
+    stat = os.stat(path_a)
+    os.utime(path_a, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert analyzer._display_name(analyzer.load_profile(path_a), '') == 'a2'
+
+    monkeypatch.setattr(llm_compatibility_analyzer, 'PROFILE_CACHE_SIZE', 2)
+    for path in (path_a, path_b, path_c):
+        analyzer.load_profile(path)
+    assert list(analyzer._profile_cache) == [path_b, path_c]
+
+def test_checkpoint_skips_pairs_with_edited_profiles(tmp_path):
+    analyzer = make_analyzer()
+    paths = write_profiles(tmp_path, ['a', 'b', 'c'])
+    checkpoint = str(tmp_path / 'checkpoint.jsonl')
+    handler, calls = fake_kimi(failures=0)
+    asyncio.run(analyzer.batch_analyze_async(paths, checkpoint_path=checkpoint,
+                                             client=httpx.AsyncClient(transport=httpx.MockTransport(handler))))
+    assert len(calls) == 3
+
+    with open(paths[0], 'w', encoding='utf-8') as f:
+        json.dump({'profile': {'name': {'display_name': 'a2'}}}, f)
+    results = asyncio.run(analyzer.batch_analyze_async(paths, checkpoint_path=checkpoint,
+                                                       client=httpx.AsyncClient(transport=httpx.MockTransport(handler))))
+    assert len(calls) == 5  # 只有包含a的两对重新分析
+    assert [r.person_a for r in results][:2] == ['a2', 'a2']
+
+def test_batch_analyze_refuses_running_event_loop(tmp_path):
+    analyzer = make_analyzer()
+    paths = write_profiles(tmp_path, ['a', 'b'])
+
+    async def call_sync_api():
+        analyzer.batch_analyze(paths)
+
+    with pytest.raises(RuntimeError, match='batch_analyze_async'):
+        asyncio.run(call_sync_api())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+异步LLM网关和 /ai/chat 流式接口测试（使用本地桩传输层）
+"""
+
+import sys
+import json
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from openai import AsyncOpenAI
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from backend.services import ai_service
+from backend.services.llm_gateway import LLMGateway
+
+def stub_handler(request: httpx.Request) -> httpx.Response:
+    """模拟OpenAI兼容的 /chat/completions 接口"""
+    body = json.loads(request.content)
+    if body.get('stream'):
+        chunks = [
+            {'id': 'c', 'object': 'chat.completion.chunk', 'created': 0, 'model': body['model'],
+             'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]}
+            for token in ('你', '好')
+        ]
+        payload = ''.join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+        return httpx.Response(200, content=payload.encode(), headers={'content-type': 'text/event-stream'})
+
+    return httpx.Response(200, json={
+        'id': 'c', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': '你好'}, 'finish_reason': 'stop'}]
+    })
+
+def make_client(monkeypatch):
+    stub = AsyncOpenAI(api_key='test', base_url='http://llm.local/v1',
+                       http_client=httpx.AsyncClient(transport=httpx.MockTransport(stub_handler)))
+    monkeypatch.setattr(ai_service, 'llm_gateway', LLMGateway(client=stub))
+
+    app = FastAPI()
+    app.include_router(ai_service.router, prefix='/api/ai')
+    return TestClient(app)
+
+def test_chat_and_chat_stream(monkeypatch):
+    client = make_client(monkeypatch)
+    request = {'message': 'hi', 'history': [], 'language': 'zh'}
+
+    assert client.post('/api/ai/chat', json=request).json() == {'response': '你好'}
+
+    response = client.post('/api/ai/chat/stream', json=request)
+    assert response.headers['content-type'].startswith('text/event-stream')
+    events = [line for line in response.text.split('\n\n') if line]
+    assert events == ['data: {"delta": "你"}', 'data: {"delta": "好"}', 'event: done\ndata: {}']
+
+def test_analysis_responses_are_cached(monkeypatch, tmp_path):
+    from backend.services.llm_cache import LLMResponseCache
+
+    calls = []
+
+    def counting_handler(request):
+        calls.append(request)
+        return stub_handler(request)
+
+    stub = AsyncOpenAI(api_key='test', base_url='http://llm.local/v1',
+                       http_client=httpx.AsyncClient(transport=httpx.MockTransport(counting_handler)))
+    monkeypatch.setattr(ai_service, 'llm_gateway', LLMGateway(client=stub))
+    monkeypatch.setattr(ai_service, 'llm_response_cache', LLMResponseCache(cache_dir=str(tmp_path)))
+
+    app = FastAPI()
+    app.include_router(ai_service.router, prefix='/api/ai')
+    client = TestClient(app)
+
+    request = {'message': None, 'history': [{'role': 'user', 'content': '我喜欢旅行'}], 'isAnalysis': True}
+    for _ in range(3):
+        assert client.post('/api/ai/chat', json=request).json() == {'response': '你好'}
+    assert len(calls) == 1
+
+    # 磁盘层在内存缓存清空后仍然命中
+    monkeypatch.setattr(ai_service, 'llm_response_cache', LLMResponseCache(cache_dir=str(tmp_path)))
+    assert client.post('/api/ai/chat', json=request).json() == {'response': '你好'}
+    assert len(calls) == 1
+    assert not list(tmp_path.rglob('*.tmp'))
+
+    stats = client.get('/api/ai/status').json()['response_cache']
+    assert stats['hits'] == 1 and stats['prompt_bytes_saved'] > 0
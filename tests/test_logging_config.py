@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+后端日志配置测试
+"""
+
+import sys
+import json
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from backend.utils.logging_config import get_logger, setup_logging, shutdown_logging
+
+class Expensive:
+    """记录被格式化的次数"""
+    formatted = 0
+
+    def __str__(self):
+        Expensive.formatted += 1
+        return "expensive"
+
+def test_json_records_go_through_queue_and_debug_is_lazy(capsys):
+    try:
+        setup_logging(level='INFO', fmt='json', use_queue=True)
+        logger = get_logger('backend.tests.logging')
+
+        logger.debug("不会输出 %s", Expensive())
+        logger.info("匹配完成 %d 个用户", 3, extra={'request_type': '找队友'})
+        shutdown_logging()
+
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert Expensive.formatted == 0
+        assert len(lines) == 1
+        assert lines[0]['level'] == 'INFO'
+        assert lines[0]['logger'] == 'backend.tests.logging'
+        assert lines[0]['message'] == "匹配完成 3 个用户"
+        assert lines[0]['request_type'] == '找队友'
+    finally:
+        with capsys.disabled():
+            setup_logging()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量匹配接口测试（使用本地内存数据库）
+"""
+
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from backend.services import matching_service
+from backend.services.auth_service import get_current_user
+from backend.services.local_database import LocalSupabaseClient
+from backend.services.pair_score_cache import PairScoreCache
+
+def make_client(monkeypatch):
+    local = LocalSupabaseClient({
+        'user_profile': [{'id': user_id, 'display_name': user_id} for user_id in ('me', 'a', 'b')],
+        'user_metadata': [],
+        'user_tags': [
+            {'user_id': user_id, 'tag_name': tag, 'tag_category': 'hobby', 'confidence_score': 1.0}
+            for user_id, tag in (('me', '运动'), ('me', '阅读'), ('a', '运动'), ('a', '阅读'), ('b', '旅行'))
+        ]
+    })
+    for db in (matching_service.user_profile_db, matching_service.user_metadata_db, matching_service.user_tags_db):
+        monkeypatch.setattr(db, 'client', local)
+    monkeypatch.setattr(matching_service, 'pair_score_cache', PairScoreCache())
+
+    app = FastAPI()
+    app.include_router(matching_service.router, prefix='/api/match')
+    app.dependency_overrides[get_current_user] = lambda: {'user_id': 'me'}
+    return TestClient(app)
+
+def test_batch_match_scores_all_targets(monkeypatch):
+    client = make_client(monkeypatch)
+    for analysis_type in ('simple', 'detailed'):
+        data = client.post('/api/match/batch', json={
+            'target_user_ids': ['b', 'a', 'missing'], 'analysis_type': analysis_type
+        }).json()['data']
+        assert [result['target_user_id'] for result in data['results']][0] == 'a'
+        assert data['total_analyzed'] == 3 and data['failed'] == 0
+
+def test_batch_match_returns_partial_results_on_timeout(monkeypatch):
+    client = make_client(monkeypatch)
+    original = matching_service.perform_compatibility_analysis
+
+    def slow_for_b(user_a_data, user_b_data):
+        if user_b_data['profile']['id'] == 'b':
+            time.sleep(0.5)
+        return original(user_a_data, user_b_data)
+
+    monkeypatch.setattr(matching_service, 'perform_compatibility_analysis', slow_for_b)
+    monkeypatch.setattr(matching_service, 'BATCH_MATCH_ITEM_TIMEOUT', 0.1)
+
+    data = client.post('/api/match/batch', json={'target_user_ids': ['a', 'b']}).json()['data']
+    assert data['partial'] and data['failed'] == 1
+    results = {result['target_user_id']: result for result in data['results']}
+    assert results['b']['error'] == 'timeout'
+    assert results['a']['compatibility_score'] > 0
+
+def test_batch_match_threads_stay_bounded_after_timeouts(monkeypatch):
+    client = make_client(monkeypatch)
+    lock = threading.Lock()
+    running = {'now': 0, 'peak': 0}
+
+    def slow(user_a_data, user_b_data):
+        with lock:
+            running['now'] += 1
+            running['peak'] = max(running['peak'], running['now'])
+        time.sleep(0.2)
+        with lock:
+            running['now'] -= 1
+        raise RuntimeError('不写入缓存，第二次请求同样需要分析')
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(matching_service, 'perform_compatibility_analysis', slow)
+    monkeypatch.setattr(matching_service, '_batch_match_executor', executor)
+    monkeypatch.setattr(matching_service, 'BATCH_MATCH_ITEM_TIMEOUT', 0.05)
+
+    for _ in range(2):
+        data = client.post('/api/match/batch', json={'target_user_ids': ['a', 'b']}).json()['data']
+        assert data['failed'] == 2
+    executor.shutdown(wait=True)
+    assert running['peak'] == 1
+
+def test_batch_match_timeout_excludes_queue_time(monkeypatch):
+    client = make_client(monkeypatch)
+    original = matching_service.perform_compatibility_analysis
+
+    def slow(user_a_data, user_b_data):
+        time.sleep(0.15)
+        return original(user_a_data, user_b_data)
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(matching_service, 'perform_compatibility_analysis', slow)
+    monkeypatch.setattr(matching_service, '_batch_match_executor', executor)
+    monkeypatch.setattr(matching_service, 'BATCH_MATCH_ITEM_TIMEOUT', 0.3)
+
+    # 三个目标串行执行共约0.45秒，超过单项超时，但每项自身的耗时都在超时以内
+    data = client.post('/api/match/batch', json={'target_user_ids': ['a', 'b', 'me']}).json()['data']
+    executor.shutdown(wait=True)
+    assert data['failed'] == 0 and not data['partial']
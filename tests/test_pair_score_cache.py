@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+用户对分数缓存测试
+"""
+
+import sys
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from backend.services import pair_score_cache as pair_score_cache_module
+from backend.services.pair_score_cache import PairScoreCache, user_data_version
+
+def test_durable_tier_survives_restart_and_invalidate(tmp_path):
+    db_path = str(tmp_path / 'pair_scores.db')
+    cache = PairScoreCache(db_path=db_path)
+    cache.put('a', 'b', 'simple', 'v1', 'v1', {'overall_score': 7.5})
+    cache.put('a', 'c', 'simple', 'v1', 'v1', {'overall_score': 3.0})
+    cache.close()
+
+    cache = PairScoreCache(db_path=db_path)
+    assert cache.get('a', 'b', 'simple', 'v1', 'v1') == {'overall_score': 7.5}
+    assert cache.get('a', 'b', 'simple', 'v2', 'v1') is None
+
+    cache.invalidate('b')
+    assert cache.get('a', 'b', 'simple', 'v1', 'v1') is None
+    assert cache.get('a', 'c', 'simple', 'v1', 'v1') is not None
+    assert PairScoreCache(db_path=db_path).get('a', 'b', 'simple', 'v1', 'v1') is None
+
+def test_version_changes_with_tags():
+    user_data = {'profile': {'id': 'a'}, 'metadata': [], 'tags': [{'tag_name': '运动', 'created_at': '2024-01-01'}]}
+    version = user_data_version(user_data)
+    user_data['tags'].append({'tag_name': '阅读', 'created_at': '2024-01-02'})
+    assert user_data_version(user_data) != version
+    user_data['tags'].pop()
+    assert user_data_version(user_data) == version
+    user_data['tags'].pop()
+    assert user_data_version(user_data) != version
+
+class LockedConnection:
+    """模拟其他worker持有写锁的SQLite连接"""
+
+    def execute(self, *args):
+        raise sqlite3.OperationalError('database is locked')
+
+    def commit(self):
+        raise sqlite3.OperationalError('database is locked')
+
+    def rollback(self):
+        pass
+
+def test_durable_tier_errors_are_cache_misses(tmp_path):
+    cache = PairScoreCache(db_path=str(tmp_path / 'pair_scores.db'))
+    cache.put('a', 'b', 'simple', 'v1', 'v1', {'overall_score': np.float32(7.5), 'scores': np.array([1, 2])})
+    cache.close()
+
+    cache = PairScoreCache(db_path=str(tmp_path / 'pair_scores.db'))
+    assert cache.get('a', 'b', 'simple', 'v1', 'v1') == {'overall_score': 7.5, 'scores': [1, 2]}
+
+    cache._db = LockedConnection()
+    assert cache.get('a', 'c', 'simple', 'v1', 'v1') is None
+    cache.put('a', 'c', 'simple', 'v1', 'v1', {'overall_score': object()})
+    cache.invalidate('a')
+    cache.clear()
+
+def test_default_db_path_is_under_project_root():
+    assert Path(pair_score_cache_module.DEFAULT_DB_PATH) == project_root.resolve() / 'data' / 'cache' / 'pair_scores.sqlite3'
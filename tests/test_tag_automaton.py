@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+标签关键词自动机测试：与逐标签子串匹配的结果保持一致
+"""
+
+import sys
+import random
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from backend.models.tag_pool import TagPool, TAG_SYNONYMS
+from backend.models.tag_automaton import AhoCorasickAutomaton, get_tag_extractor
+
+def brute_force(text, request_type):
+    text = text.lower()
+    hits = {}
+    for tag in TagPool.get_tag_list(request_type):
+        tag_lower = tag.lower()
+        if tag_lower in text:
+            hits[tag] = 'exact'
+        elif any(word in text for word in tag_lower.split()):
+            hits[tag] = 'partial'
+        elif any(syn in text for syn in TAG_SYNONYMS.get(tag, '').lower().split()):
+            hits[tag] = 'synonym'
+    return hits
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = AhoCorasickAutomaton()
+    for pattern in ('he', 'she', 'his', 'hers'):
+        automaton.add(pattern, (pattern,))
+    assert sorted(p for (p,) in automaton.iter_matches('ushers')) == ['he', 'hers', 'she']
+
+def test_extractor_matches_brute_force():
+    random.seed(0)
+    tags = TagPool.get_tag_list('all')
+    words = tags + [syn for value in TAG_SYNONYMS.values() for syn in value.split()] + ['我', '喜欢', 'PTSD', '，']
+    for request_type in ('all', '找对象', '找队友'):
+        for _ in range(50):
+            text = ''.join(random.choice(words) for _ in range(random.randint(0, 12)))
+            assert get_tag_extractor(request_type).extract(text) == brute_force(text, request_type)
+    assert TagPool.find_matching_tags('我是程序员，喜欢旅行', '找对象') == {'程序员', '旅行'}
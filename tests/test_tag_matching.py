@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+TagMatcher 测试
+"""
+
+import re
+import sys
+import json
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from configs.config import TagMatchingConfig, DEFAULT_TAG_PATTERNS
+from backend.models.tag_pool import TAG_SYNONYMS
+from backend.models.tag_matching import TagMatcher, TagPatternEngine, TagMatcherRegistry
+from backend.algorithms import user_profile_analyzer
+
+def test_pattern_engine_reports_every_matching_tag():
+    engine = TagPatternEngine(DEFAULT_TAG_PATTERNS)
+    for text in ('我二十三岁，做UI设计，爱好旅游和吉他', '内向安静，写代码', '', '没有命中'):
+        expected = {tag for tag, pattern in DEFAULT_TAG_PATTERNS.items() if re.search(pattern, text, re.IGNORECASE)}
+        assert engine.find_tags(text) == expected
+    assert TagPatternEngine(DEFAULT_TAG_PATTERNS, tags=['音乐']).find_tags('唱歌和跑步') == {'音乐'}
+
+def test_english_abbreviations_match_only_uppercase_words():
+    engine = TagPatternEngine(DEFAULT_TAG_PATTERNS)
+    assert engine.find_tags('I live in a big city and work on web development, quite busy') == set()
+    assert engine.find_tags('做IT，兼职UI/UX，之前是PM') == {'程序员', '设计师', '产品经理'}
+    for text in ('it pm', 'I really like it a lot', 'meet at 3pm', 'ui ux'):
+        assert engine.find_tags(text) == set()
+
+def test_patterns_extend_from_file(tmp_path):
+    patterns_file = tmp_path / 'patterns.json'
+    patterns_file.write_text(json.dumps({'摄影': '摄影|拍照'}), encoding='utf-8')
+    config = TagMatchingConfig(patterns_file=str(patterns_file))
+    assert TagPatternEngine(config.patterns).find_tags('喜欢拍照和音乐') == {'摄影', '音乐'}
+
+def test_registry_persists_fitted_matcher(tmp_path, monkeypatch):
+    text = '我是程序员，喜欢音乐和旅行'
+    matcher = TagMatcherRegistry(str(tmp_path)).get('找对象')
+    assert TagMatcherRegistry(str(tmp_path)).get('找对象') is not matcher
+    assert len(list(tmp_path.glob('*.pkl'))) == 1 and not list(tmp_path.glob('*.tmp'))
+
+    # 重启后从磁盘载入，不再拟合
+    def fail_fit(self):
+        raise AssertionError('不应重新拟合')
+    monkeypatch.setattr(TagMatcher, '_build_tag_vectors', fail_fit)
+    loaded = TagMatcherRegistry(str(tmp_path)).get('找对象')
+    assert loaded.match_tags(text).matched_tags == matcher.match_tags(text).matched_tags
+    monkeypatch.undo()
+
+    # 标签池变化后重新拟合并替换旧文件
+    old_files = set(tmp_path.glob('*.pkl'))
+    monkeypatch.setitem(TAG_SYNONYMS, '摄影', '拍照 相机')
+    TagMatcherRegistry(str(tmp_path)).get('找对象')
+    new_files = set(tmp_path.glob('*.pkl'))
+    assert len(new_files) == 1 and new_files != old_files
+
+def test_fingerprint_covers_vectorizer_settings(monkeypatch):
+    from backend.models import tag_matching
+    before = tag_matching.tag_pool_fingerprint('找对象')
+    monkeypatch.setitem(tag_matching.TFIDF_PARAMS, 'max_features', 100)
+    assert tag_matching.tag_pool_fingerprint('找对象') != before
+
+def test_match_tags_many_matches_single_calls(tmp_path, monkeypatch):
+    matcher = TagMatcher('找对象')
+    texts = ['我是25岁的程序员，性格内向，喜欢看书和音乐', '', '旅行 摄影 美食', '周末去健身房锻炼']
+    for single, batched in zip([matcher.match_tags(text) for text in texts], matcher.match_tags_many(texts)):
+        assert batched.matched_tags.keys() == single.matched_tags.keys()
+        assert all(abs(batched.matched_tags[tag] - score) < 1e-9 for tag, score in single.matched_tags.items())
+
+    monkeypatch.setattr(user_profile_analyzer, 'tag_matcher_registry', TagMatcherRegistry(str(tmp_path)))
+    profiles = user_profile_analyzer.UserProfileAnalyzer().batch_analyze_users([
+        {'user_id': 'a', 'text': texts[0], 'request_type': '找对象'},
+        {'user_id': 'b', 'text': '全栈开发，想找AI创业伙伴', 'request_type': '找队友'},
+        {'user_id': 'c', 'text': texts[2], 'request_type': 'all'},
+        {'user_id': 'd', 'text': texts[3], 'request_type': '找对象'}
+    ])
+    assert [profile.user_id for profile in profiles] == ['a', 'b', 'd']
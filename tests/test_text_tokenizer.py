@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+共享分词服务测试
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import jieba
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from backend.models.text_tokenizer import TextTokenizer
+
+def test_tokenize_uses_cache_and_filters():
+    tokenizer = TextTokenizer(cache_size=2)
+    assert tokenizer.tokenize('我喜欢打篮球，也喜欢编程！123', stopwords={'喜欢'}) == ['打篮球', '编程']
+    tokenizer.tokenize('我喜欢打篮球，也喜欢编程！123')
+    assert (tokenizer.hits, tokenizer.misses) == (1, 1)
+    assert tokenizer.segment('会 C++ 和 UI/UX', mode='symbols')[1] == 'C++'
+
+def test_tokenize_many_parallel_matches_serial():
+    texts = [f'第{i}位用户喜欢摄影和旅行，周末经常去爬山' for i in range(8)] + ['', '学习机器学习']
+    serial = TextTokenizer(workers=1).tokenize_many(texts)
+    parallel = TextTokenizer(workers=2, parallel_min_docs=4)
+    try:
+        assert parallel.tokenize_many(texts) == serial
+        assert parallel.stats()['parallel']
+    finally:
+        jieba.disable_parallel()
+
+def test_server_tokenizer_stays_serial_until_batch_mode(monkeypatch):
+    from backend.models.text_tokenizer import text_tokenizer
+    if 'TOKENIZER_WORKERS' not in os.environ:
+        assert text_tokenizer.workers == 1
+
+    tokenizer = TextTokenizer(parallel_min_docs=1)
+    assert not tokenizer._enable_parallel()
+    monkeypatch.setenv('TOKENIZER_BATCH_WORKERS', '3')
+    tokenizer.use_batch_workers()
+    assert tokenizer.workers == 3
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LDA主题模型批量推断测试
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from configs.config import TopicModelingConfig
+from backend.models.topic_modeling import LDATopicModel
+
+DOCUMENTS = [
+    "我是一名软件工程师，喜欢编程和人工智能，正在做机器学习创业项目",
+    "热爱旅行和摄影，周末经常去户外徒步爬山，喜欢拍风景照片",
+    "喜欢读书和音乐，平时弹吉他，也喜欢看电影和写作",
+    "创业公司产品经理，关注互联网产品设计和用户体验",
+    "健身爱好者，每天跑步游泳，喜欢篮球和足球运动",
+    "设计师，擅长UI设计和平面设计，喜欢艺术展览和摄影",
+] * 3
+
+def train_model():
+    model = LDATopicModel(TopicModelingConfig(num_topics=4, passes=2, iterations=20))
+    model.train(DOCUMENTS)
+    return model
+
+def test_extract_many_matches_single_inference():
+    model = train_model()
+    texts = ["喜欢人工智能和编程", "周末去户外徒步和摄影", "", "健身跑步"]
+
+    batch = model.extract_many(texts, "找队友")
+    assert len(batch) == len(texts)
+    for text, result in zip(texts, batch):
+        single = model.extract_topics_and_tags(text, "找队友")
+        assert [tid for tid, _ in result.topics] == [tid for tid, _ in single.topics]
+        assert result.text_vector == pytest.approx(single.text_vector, abs=1e-4)
+        assert set(result.extracted_tags) == set(single.extracted_tags)
+        for tag, score in single.extracted_tags.items():
+            assert result.extracted_tags[tag] == pytest.approx(score, abs=1e-4)
+
+def test_tag_matrix_matches_mapping_and_round_trips(tmp_path):
+    model = train_model()
+    distribution = model.extract_topics_and_tags("喜欢人工智能和编程", "找队友").topics
+
+    # 与逐个标签、逐个主题累加的结果一致
+    expected = {}
+    for tag in model.tag_pool.get_tag_list("找队友"):
+        if tag in model.tag_topic_mapping:
+            weights = dict(distribution)
+            confidence = sum(w * weights.get(tid, 0.0) for tid, w in model.tag_topic_mapping[tag])
+            if confidence >= 0.1:
+                expected[tag] = confidence
+    tags = model._extract_tags_from_topics(distribution, "找队友")
+    assert set(tags) == set(expected)
+
+    top = model._extract_tags_from_topics(distribution, "找队友", top_k=2)
+    assert list(top) == sorted(expected, key=expected.get, reverse=True)[:2]
+
+    model.save_model(str(tmp_path / "model"))
+    loaded = LDATopicModel(TopicModelingConfig(num_topics=4))
+    loaded.load_model(str(tmp_path / "model"))
+    assert set(loaded.tag_type_masks) == {"找对象", "找队友", "all"}
+    assert loaded.tag_topic_matrix.dtype.name == "float32"
+    assert loaded._extract_tags_from_topics(distribution, "找队友") == pytest.approx(tags)
+
+def test_model_bundle_loads_topic_keywords(tmp_path, monkeypatch):
+    model = train_model()
+    assert set(model.topic_keywords_table) == set(range(model.lda_model.num_topics))
+    model.save_model(str(tmp_path / "model"))
+
+    loaded = LDATopicModel(TopicModelingConfig(num_topics=4))
+    assert loaded.load_first_available([str(tmp_path / "missing"), str(tmp_path / "model")]) == str(tmp_path / "model")
+    assert loaded.topic_keywords_table == model.topic_keywords_table
+    # 数组单独保存，加载时内存映射
+    assert isinstance(loaded.lda_model.expElogbeta, np.memmap)
+    assert loaded.load_stats['path'] == str(tmp_path / "model")
+
+    # 请求路径只读关键词表，不再调用show_topic
+    monkeypatch.setattr(loaded.lda_model, "show_topic", lambda *args, **kwargs: pytest.fail("show_topic called"))
+    result = loaded.extract_topics_and_tags("喜欢人工智能和编程", "找队友")
+    for topic_id, words in result.topic_keywords.items():
+        assert words == model.topic_keywords_table[topic_id]
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+用户主题向量存储测试
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from backend.models.topic_modeling import TopicResult
+from backend.models.topic_vector_store import UserTopicStore
+
+class FakeLDA:
+    num_topics = 3
+
+class FakeTopicModel:
+    """按文本返回固定主题分布的假模型，记录推断次数"""
+
+    def __init__(self):
+        self.lda_model = FakeLDA()
+        self.model_version = 'v1'
+        self.calls = 0
+
+    def extract_topics_and_tags(self, text, request_type="all"):
+        self.calls += 1
+        vector = [0.8, 0.1, 0.1] if 'AI' in text else [0.1, 0.1, 0.8]
+        return TopicResult(
+            topics=[(i, p) for i, p in enumerate(vector)],
+            extracted_tags={'人工智能': 0.7} if 'AI' in text else {'旅行': 0.6},
+            topic_keywords={},
+            text_vector=vector
+        )
+
+    def extract_many(self, texts, request_type="all"):
+        self.batch_calls = getattr(self, 'batch_calls', 0) + 1
+        results = [self.extract_topics_and_tags(text, request_type) for text in texts]
+        self.calls -= len(texts)
+        return results
+
+def test_refresh_only_recomputes_on_text_change(tmp_path):
+    store = UserTopicStore(str(tmp_path / 'vectors.json'))
+    model = FakeTopicModel()
+
+    store.refresh('u1', 'AI 创业', '找队友', model)
+    store.refresh('u1', 'AI 创业', '找队友', model)
+    assert model.calls == 1
+
+    store.refresh('u1', '旅行 摄影', '找队友', model)
+    assert model.calls == 2
+    assert store.users['u1']['tags']['找队友'] == {'旅行': 0.6}
+
+def test_refresh_many_batches_only_stale_users(tmp_path):
+    store = UserTopicStore(str(tmp_path / 'vectors.json'))
+    model = FakeTopicModel()
+    store.refresh('u1', 'AI 创业', '找队友', model)
+
+    entries = store.refresh_many({'u1': 'AI 创业', 'u2': '旅行 摄影', 'u3': 'AI 产品'}, '找队友', model)
+    assert model.calls == 1
+    assert model.batch_calls == 1
+    assert set(entries) == {'u1', 'u2', 'u3'}
+    assert store.users['u2']['tags']['找队友'] == {'旅行': 0.6}
+
+def test_persisted_store_is_reused(tmp_path):
+    path = str(tmp_path / 'vectors.json')
+    store = UserTopicStore(path)
+    model = FakeTopicModel()
+    store.refresh('u1', 'AI 创业', '找队友', model)
+    store.save()
+
+    reloaded = UserTopicStore(path)
+    assert reloaded.get('u1', 'AI 创业', '找队友', 3, 'v1') is not None
+    assert reloaded.get('u1', 'AI 创业', '找对象', 3, 'v1') is None
+    assert reloaded.get('u1', '别的文本', '找队友', 3, 'v1') is None
+    assert list(tmp_path.glob('*.tmp')) == []
+
+def test_retrained_model_invalidates_entries(tmp_path):
+    store = UserTopicStore(str(tmp_path / 'vectors.json'))
+    model = FakeTopicModel()
+    store.refresh('u1', 'AI 创业', '找队友', model)
+
+    model.model_version = 'v2'
+    store.refresh('u1', 'AI 创业', '找队友', model)
+    assert model.calls == 2
+    assert store.users['u1']['model_version'] == 'v2'
+
+def test_save_is_debounced_until_forced(tmp_path):
+    path = tmp_path / 'vectors.json'
+    store = UserTopicStore(str(path), save_interval=3600)
+    model = FakeTopicModel()
+    store.refresh('u1', 'AI 创业', '找队友', model)
+    store.save()
+    assert path.exists()
+
+    store.refresh('u2', '旅行 摄影', '找队友', model)
+    store.save()
+    assert UserTopicStore(str(path)).get('u2', '旅行 摄影', '找队友', 3, 'v1') is None
+    store.save(force=True)
+    assert UserTopicStore(str(path)).get('u2', '旅行 摄影', '找队友', 3, 'v1') is not None
+
+def test_score_ranks_by_topic_similarity(tmp_path):
+    store = UserTopicStore(str(tmp_path / 'vectors.json'))
+    model = FakeTopicModel()
+    store.refresh('ai', 'AI 创业', '找队友', model)
+    store.refresh('travel', '旅行 摄影', '找队友', model)
+
+    scores = store.score(np.array([0.9, 0.05, 0.05], dtype=np.float32), ['ai', 'travel'])
+    assert scores[0] > scores[1]
+
+    store.invalidate('ai')
+    assert 'ai' not in store.users
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+用户列表和搜索接口测试（使用本地内存数据库）
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from backend.services import user_service
+from backend.services.auth_service import get_current_user
+from backend.services.local_database import LocalSupabaseClient
+from backend.services.search_index import UserSearchIndex
+
+def make_client(monkeypatch, n_users=5):
+    local = LocalSupabaseClient({
+        'user_profile': [
+            {'id': f'u{i}', 'display_name': f'user{i}', 'email': f'user{i}@example.com'}
+            for i in range(n_users)
+        ],
+        'user_metadata': [
+            {'user_id': 'u1', 'section_type': 'profile', 'section_key': 'personal', 'content': {'age_range': '25-30'}}
+        ],
+        'user_tags': [
+            {'user_id': 'u2', 'tag_name': '运动', 'tag_category': 'manual', 'confidence_score': 0.9}
+        ]
+    })
+    for db in (user_service.user_profile_db, user_service.user_metadata_db, user_service.user_tags_db):
+        monkeypatch.setattr(db, 'client', local)
+    monkeypatch.setattr(user_service, 'USER_PAGE_SIZE', 2)
+    monkeypatch.setattr(user_service, 'user_search_index', UserSearchIndex())
+
+    app = FastAPI()
+    app.include_router(user_service.router, prefix='/api/users')
+    app.dependency_overrides[get_current_user] = lambda: {'user_id': 'u0'}
+    return TestClient(app)
+
+def test_list_users_streams_all_pages(monkeypatch):
+    client = make_client(monkeypatch)
+    body = client.get('/api/users/').json()
+    assert body['total'] == 4
+    assert [user['id'] for user in body['data']] == ['u1', 'u2', 'u3', 'u4']
+    assert body['data'][0]['age'] == 25
+    assert body['data'][1]['tags'][0]['name'] == '运动'
+
+def test_list_users_keyset_pages(monkeypatch):
+    client = make_client(monkeypatch)
+    first = client.get('/api/users/', params={'limit': 3}).json()
+    assert [user['id'] for user in first['data']] == ['u1', 'u2', 'u3']
+    second = client.get('/api/users/', params={'limit': 3, 'cursor': first['next_cursor']}).json()
+    assert [user['id'] for user in second['data']] == ['u4']
+    assert second['next_cursor'] is None
+
+def test_search_users(monkeypatch):
+    client = make_client(monkeypatch)
+    body = client.get('/api/users/search/USER2').json()
+    assert body['query'] == 'USER2'
+    assert [user['id'] for user in body['data']] == ['u2']
+    assert body['data'][0]['tags'] == ['运动']
+
+    # 前缀匹配，排除当前用户
+    body = client.get('/api/users/search/user').json()
+    assert sorted(user['id'] for user in body['data']) == ['u1', 'u2', 'u3', 'u4']
+
+def test_search_index_multi_term_and_incremental_updates():
+    index = UserSearchIndex()
+    index.update_profile({'id': 'a', 'display_name': 'Alice', 'email': 'alice@example.com'})
+    index.update_profile({'id': 'b', 'display_name': 'Bob', 'email': 'bob@example.com'})
+    index.update_metadata('a', 'profile', 'professional', {'current_role': '产品经理'})
+    index.add_tag('b', '产品')
+
+    # 标签字段权重高于元数据
+    assert [user['id'] for user in index.search('产品')] == ['b', 'a']
+    assert [user['id'] for user in index.search('ali 经理')] == ['a']
+
+    index.remove_tag('b', '产品')
+    index.update_metadata('a', 'profile', 'professional', {'current_role': '设计师'})
+    assert index.search('产品') == []
+    assert 'ali' not in index.postings and '产品' not in index.sorted_terms
+
+def test_stream_reports_failure_mid_stream(monkeypatch):
+    client = make_client(monkeypatch)
+
+    async def failing_pages():
+        yield [{'id': 'u1'}]
+        raise RuntimeError('db down')
+
+    monkeypatch.setattr(user_service, 'iter_profile_pages', lambda *args, **kwargs: failing_pages())
+    monkeypatch.setattr(user_service, 'build_user_page', lambda profiles: _identity(profiles))
+    body = client.get('/api/users/').json()
+    assert body['success'] is False
+    assert 'db down' in body['error']
+    assert body['total'] == 1
+    assert body['data'] == [{'id': 'u1'}]
+
+async def _identity(items):
+    return items
+
+def test_batch_lookup_errors_propagate_when_requested(monkeypatch):
+    class BrokenClient:
+        def table(self, name):
+            raise RuntimeError('db down')
+
+    monkeypatch.setattr(user_service.user_tags_db, 'client', BrokenClient())
+    assert asyncio.run(user_service.user_tags_db.get_by_user_ids(['u1'])) == {'u1': []}
+    with pytest.raises(RuntimeError):
+        asyncio.run(user_service.user_tags_db.get_by_user_ids(['u1'], raise_errors=True))
+
+def test_stale_search_index_is_rebuilt_in_background(monkeypatch):
+    make_client(monkeypatch)
+    local = user_service.user_profile_db.client
+    index = UserSearchIndex(ttl=0)
+
+    async def scenario():
+        await index.ensure_built()
+        assert index.search('newcomer') == []
+
+        # 另一个worker写入的新用户，本进程的增量更新看不到
+        local.table('user_profile').insert({'id': 'u9', 'display_name': 'newcomer', 'email': 'n@example.com'}).execute()
+        await index.ensure_built()
+        assert index.search('newcomer') == []
+        await index._refresh_task
+        return index.search('newcomer')
+
+    assert [user['id'] for user in asyncio.run(scenario())] == ['u9']
+
+def test_writes_during_rebuild_are_replayed(monkeypatch):
+    make_client(monkeypatch)
+    index = UserSearchIndex()
+    original_load = UserSearchIndex._load
+    loaded = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_load(self, page_size):
+        await original_load(self, page_size)
+        loaded.set()
+        await release.wait()
+
+    monkeypatch.setattr(UserSearchIndex, '_load', slow_load)
+
+    async def scenario():
+        build = asyncio.create_task(index.build())
+        await loaded.wait()
+        # 数据库已读完、新索引尚未替换时到达的写入
+        index.add_tag('u1', '摄影')
+        index.remove_tag('u2', '运动')
+        release.set()
+        await build
+
+    asyncio.run(scenario())
+    assert [user['id'] for user in index.search('摄影')] == ['u1']
+    assert index.search('运动') == []
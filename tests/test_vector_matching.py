@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+向量匹配器测试
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from configs.config import VectorMatchingConfig
+from backend.models.vector_matching import VectorUserMatcher, UserVectorStore
+
+class FakeVectorizer:
+    """直接把 "x,y,z" 形式的文本解析为向量"""
+
+    def transform(self, texts):
+        return np.array([[float(v) for v in text.split(',')] for text in texts])
+
+def build_matcher():
+    matcher = VectorUserMatcher(FakeVectorizer())
+    matcher.add_users([
+        {'user_id': 'a', 'request_type': '找队友', 'text': '1,0,0'},
+        {'user_id': 'b', 'request_type': '找队友', 'text': '0.9,0.1,0'},
+        {'user_id': 'c', 'request_type': '找队友', 'text': '0,1,0'},
+        {'user_id': 'd', 'request_type': '找对象', 'text': '1,0,0'},
+        {'user_id': 'e', 'request_type': '找队友', 'text': '0,0,0'},
+    ])
+    return matcher
+
+def test_find_similar_users_filters_by_request_type():
+    matcher = build_matcher()
+    results = matcher.find_similar_users('a', top_k=5, min_similarity=0.0)
+    ids = [user_id for user_id, _ in results]
+
+    assert ids[0] == 'b'
+    assert 'a' not in ids and 'd' not in ids
+    assert results[0][1] > results[1][1]
+
+def test_find_similar_users_respects_top_k_and_threshold():
+    matcher = build_matcher()
+    assert [uid for uid, _ in matcher.find_similar_users('a', top_k=1, min_similarity=0.0)] == ['b']
+    assert [uid for uid, _ in matcher.find_similar_users('a', top_k=5, min_similarity=0.5)] == ['b']
+
+def test_find_similar_users_many_matches_single_queries():
+    matcher = build_matcher()
+    targets = ['a', 'b', 'c', 'd']
+    batched = matcher.find_similar_users_many(targets, top_k=3, min_similarity=0.0, batch_size=2)
+
+    for user_id in targets:
+        single = matcher.find_similar_users(user_id, top_k=3, min_similarity=0.0)
+        assert [uid for uid, _ in batched[user_id]] == [uid for uid, _ in single]
+        assert np.allclose([s for _, s in batched[user_id]], [s for _, s in single])
+
+def build_random_matcher(index_type, n_users=300, dim=16):
+    rng = np.random.default_rng(0)
+    matcher = VectorUserMatcher(FakeVectorizer(), VectorMatchingConfig(index_type=index_type, ivf_nlist=4, ivf_nprobe=4))
+    matcher.add_users([
+        {
+            'user_id': f'u{i}',
+            'request_type': '找队友' if i % 2 else '找对象',
+            'text': ','.join(str(v) for v in rng.random(dim))
+        }
+        for i in range(n_users)
+    ])
+    return matcher
+
+@pytest.mark.parametrize('index_type', ['IndexFlatIP', 'IndexIVFFlat', 'IndexHNSWFlat'])
+def test_faiss_indices_agree_with_numpy_search(index_type, tmp_path):
+    pytest.importorskip('faiss')
+    matcher = build_random_matcher(index_type)
+    expected = matcher.find_similar_users('u1', top_k=5, min_similarity=0.0)
+
+    matcher.build_indices()
+    assert set(matcher.indices) == {'找队友', '找对象'}
+    assert matcher.find_similar_users('u1', top_k=5, min_similarity=0.0)[0][0] == expected[0][0]
+
+    # 增量添加与删除
+    matcher.add_user('new', '1,' * 15 + '1', request_type='找队友')
+    assert 'new' in [uid for uid, _ in matcher.find_similar_users('u1', top_k=300, min_similarity=0.0)]
+    matcher.remove_user('new')
+    assert 'new' not in [uid for uid, _ in matcher.find_similar_users('u1', top_k=300, min_similarity=0.0)]
+
+    # 持久化
+    matcher.save_indices(str(tmp_path))
+    matcher.load_indices(str(tmp_path))
+    assert matcher.find_similar_users('u1', top_k=5, min_similarity=0.0)[0][0] == expected[0][0]
+
+def test_build_indices_falls_back_without_faiss(monkeypatch):
+    import backend.models.vector_matching as vector_matching
+    monkeypatch.setattr(vector_matching, 'faiss_available', lambda: False)
+
+    matcher = build_matcher()
+    matcher.build_indices()
+    assert matcher.indices == {}
+    assert matcher.find_similar_users('a', top_k=1, min_similarity=0.0)[0][0] == 'b'
+
+def test_vector_store_grows_and_compacts():
+    store = UserVectorStore(initial_capacity=2, compact_ratio=0.3)
+    for i in range(5):
+        store.put(f'u{i}', np.array([i + 1.0, 1.0]), '找队友' if i % 2 else '找对象')
+    assert store.capacity == 8 and len(store) == 5
+
+    store.delete('u1')
+    assert store.tombstones == 1 and 'u1' not in store
+    assert not store.mask('找队友')[1]
+
+    store.delete('u3')  # 墓碑比例超过阈值，触发压缩
+    assert store.tombstones == 0 and store.row_ids == ['u0', 'u2', 'u4']
+    assert store.request_types() == ['找对象']
+    assert np.allclose(np.linalg.norm(store.matrix, axis=1), 1.0)
+
+def test_remove_user_and_similarity_matrix():
+    matcher = build_matcher()
+    matcher.remove_user('b')
+    assert 'b' not in [uid for uid, _ in matcher.find_similar_users('a', top_k=5, min_similarity=0.0)]
+
+    similarity, user_ids = matcher.get_similarity_matrix('找队友')
+    assert 'b' not in user_ids and 'd' not in user_ids
+    assert similarity.shape == (len(user_ids), len(user_ids))
+
+def test_ivf_index_starts_flat_until_enough_vectors():
+    faiss = pytest.importorskip('faiss')
+    from backend.models.vector_index import FaissVectorIndex
+
+    vector_index = FaissVectorIndex(3, VectorMatchingConfig(index_type='IndexIVFFlat', ivf_nlist=4))
+    vector_index.add(['a'], np.array([[1.0, 0, 0]]))
+    assert vector_index.flat_fallback
+    assert not isinstance(faiss.downcast_index(vector_index.index.index), faiss.IndexIVFFlat)
+
+    vector_index.add(['b', 'c', 'd'], np.eye(3)[[1, 2, 0]])
+    assert not vector_index.flat_fallback
+    assert vector_index.index.nlist == 4
+    assert vector_index.search(np.array([0, 1.0, 0]), 1)[0][0] == 'b'
+
+@pytest.mark.parametrize('index_type', ['IndexFlatIP', 'IndexIVFFlat', 'IndexHNSWFlat'])
+def test_faiss_index_keeps_ids_after_removal_and_readd(index_type, tmp_path):
+    pytest.importorskip('faiss')
+    from backend.models.vector_index import FaissVectorIndex
+
+    vectors = np.random.default_rng(0).normal(size=(200, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    user_ids = [f'u{i}' for i in range(200)]
+    vector_index = FaissVectorIndex(16, VectorMatchingConfig(index_type=index_type, ivf_nlist=4))
+    vector_index.build(user_ids, vectors)
+
+    vector_index.remove(['u3'])
+    vectors[20] = -vectors[20]
+    vector_index.add(['u20'], vectors[20:21])  # 重新向量化已存在的用户
+
+    def assert_self_search(index):
+        live = [i for i in range(200) if i != 3]
+        results = index.search_many(vectors[live], 1)
+        assert [result[0][0] for result in results] == [user_ids[i] for i in live]
+
+    assert_self_search(vector_index)
+    vector_index.save(str(tmp_path / 'index'))
+    assert_self_search(FaissVectorIndex.load(str(tmp_path / 'index')))
+
+def test_load_vectors_rebuilds_stale_indices(tmp_path):
+    pytest.importorskip('faiss')
+    saved = build_matcher()
+    saved.save_vectors(str(tmp_path / 'vectors.pkl'))
+
+    matcher = build_random_matcher('IndexFlatIP', n_users=20, dim=3)
+    matcher.build_indices()
+    matcher.load_vectors(str(tmp_path / 'vectors.pkl'))
+
+    indexed = {user_id for vector_index in matcher.indices.values() for user_id in vector_index.ids_by_user}
+    assert indexed == set(saved.user_vectors)
+    assert matcher.find_similar_users('a', top_k=1, min_similarity=0.0)[0][0] == 'b'